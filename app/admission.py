@@ -0,0 +1,136 @@
+"""Admission control: bound in-flight work, shed excess load, honour deadlines.
+
+At most ``max_in_flight`` admitted requests run at once and at most
+``max_queue`` more wait for a slot; anything beyond that is rejected at once
+with 503 and ``Retry-After``, so a spike costs some clients a fast retry
+instead of making every client time out.
+
+Clients may send ``X-Deadline-Ms``, the time in milliseconds they are willing
+to wait. The deadline is tracked in a context variable: queued requests give
+up when it passes, and scoring code calls :func:`check_deadline` so expired
+work is dropped before it reaches the model.
+"""
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from starlette.exceptions import HTTPException
+
+from app.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUED,
+    DEADLINE_EXPIRED,
+    REQUESTS_SHED,
+)
+
+DEADLINE_HEADER = b"x-deadline-ms"
+
+# Monotonic time by which the current request must finish, if the client set one.
+current_deadline: ContextVar[float | None] = ContextVar("current_deadline", default=None)
+
+
+class Overloaded(HTTPException):
+    """The admission queue is full."""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(
+            status_code=503,
+            detail="Server overloaded, retry later",
+            headers={"Retry-After": str(retry_after_s)},
+        )
+
+
+class DeadlineExceeded(HTTPException):
+    """The client's deadline passed before its work was done."""
+
+    def __init__(self):
+        super().__init__(status_code=504, detail="Deadline exceeded")
+
+
+def parse_deadline(value: bytes | None, now: float) -> float | None:
+    """Turn an ``X-Deadline-Ms`` header into a monotonic deadline.
+
+    Raises ``ValueError`` for values that are not a non-negative number.
+    """
+    if value is None:
+        return None
+    budget_ms = float(value)
+    if not budget_ms >= 0:  # also rejects NaN
+        raise ValueError(f"Invalid deadline {value!r}")
+    return now + budget_ms / 1000
+
+
+def expired(deadline: float | None) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def check_deadline(stage: str) -> None:
+    """Raise DeadlineExceeded if the current request's deadline has passed."""
+    if expired(current_deadline.get()):
+        DEADLINE_EXPIRED.labels(stage=stage).inc()
+        raise DeadlineExceeded()
+
+
+class AdmissionController:
+    """A bounded slot pool with a bounded FIFO queue in front of it.
+
+    Slots are handed directly from a finishing request to the oldest waiter,
+    so waiters are served in arrival order. Waiter futures are created on the
+    running loop on demand, so one controller can serve successive loops.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, retry_after_s: int = 1):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.retry_after_s = retry_after_s
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self, endpoint: str, deadline: float | None = None) -> None:
+        """Take a slot, queueing until ``deadline`` if none is free.
+
+        Raises Overloaded if the queue is full and DeadlineExceeded if the
+        deadline passes while queued.
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self._take()
+            return
+        if len(self._waiters) >= self.max_queue:
+            REQUESTS_SHED.labels(endpoint=endpoint).inc()
+            raise Overloaded(self.retry_after_s)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUED.inc()
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            # The slot is handed over by release(), already counted as in flight.
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as we gave up: pass it on.
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, TimeoutError):
+                DEADLINE_EXPIRED.labels(stage="queue").inc()
+                raise DeadlineExceeded() from None
+            raise
+        finally:
+            ADMISSION_QUEUED.dec()
+
+    def _take(self) -> None:
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.inc()
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest live waiter if any."""
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec()
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._take()
+                waiter.set_result(None)
+                return
@@ -0,0 +1,126 @@
+"""Pickle-free model artifacts for the fused engine.
+
+An artifact is a directory holding ``manifest.json`` plus one ``.npy`` file
+per parameter array. Loading it needs only NumPy: the arrays are
+memory-mapped read-only, so startup does no unpickling, never imports
+sklearn or joblib, and worker processes share the weight pages through the
+page cache.
+
+Export a fitted joblib pipeline with::
+
+    python -m app.artifact app/model/model.pkl app/model/iris-fused --version iris-logreg-v1
+"""
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.engine import FusedLinearModel, Precision
+
+MANIFEST_NAME = "manifest.json"
+FORMAT = "ml-api-fused-linear"
+FORMAT_VERSION = 1
+
+
+def manifest_path(path: Path | str) -> Path:
+    """Manifest file of the artifact at ``path`` (a directory or the manifest)."""
+    path = Path(path)
+    return path if path.name == MANIFEST_NAME else path / MANIFEST_NAME
+
+
+def is_artifact(path: Path | str) -> bool:
+    """Whether ``path`` is a manifest artifact rather than a pickled model."""
+    return manifest_path(path).is_file()
+
+
+def _replace(path: Path, write) -> None:
+    """Write via a temporary file and rename, so readers never see partial data.
+
+    Renaming also keeps the old inode alive for processes that still have the
+    previous array memory-mapped; truncating it in place would crash them.
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def export_artifact(model: Any, out_dir: Path | str, model_version: str | None = None) -> Path:
+    """Compile ``model`` and write it as a manifest artifact in ``out_dir``.
+
+    Raises ``ValueError`` if the fused engine does not support the model.
+    """
+    from app.engine import compile_model
+
+    fused = compile_model(model, "float64")
+    if not isinstance(fused, FusedLinearModel):
+        raise ValueError(f"Model {model!r} cannot be exported to a fused artifact")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    arrays = {}
+    for name, array in (("weights", fused.weights), ("bias", fused.bias)):
+        filename = f"{name}.npy"
+        _replace(out_dir / filename, lambda f, a=array: np.save(f, a, allow_pickle=False))
+        digest = hashlib.sha256((out_dir / filename).read_bytes()).hexdigest()
+        arrays[name] = {"file": filename, "sha256": digest}
+    manifest = {
+        "format": FORMAT,
+        "format_version": FORMAT_VERSION,
+        "model_version": model_version,
+        "n_features": int(fused.n_features_in_),
+        "classes": fused.classes_.tolist(),
+        "arrays": arrays,
+    }
+    # Written last: a complete manifest means the arrays it names are in place.
+    body = json.dumps(manifest, indent=2).encode()
+    _replace(manifest_path(out_dir), lambda f: f.write(body))
+    return out_dir
+
+
+def read_manifest(path: Path | str) -> dict:
+    """Read and check an artifact manifest."""
+    manifest = json.loads(manifest_path(path).read_text())
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"Unknown artifact format {manifest.get('format')!r}")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact version {manifest.get('format_version')!r}")
+    return manifest
+
+
+def load_artifact(path: Path | str, precision: Precision = "float64") -> FusedLinearModel:
+    """Load a manifest artifact with its arrays memory-mapped read-only.
+
+    Arrays are stored as float64; asking for float32 makes an in-memory copy.
+    """
+    manifest = read_manifest(path)
+    root = manifest_path(path).parent
+    weights, bias = (
+        np.load(root / manifest["arrays"][name]["file"], mmap_mode="r", allow_pickle=False)
+        for name in ("weights", "bias")
+    )
+    if weights.shape != (manifest["n_features"], bias.shape[0]):
+        raise ValueError(f"Artifact weights have unexpected shape {weights.shape}")
+    return FusedLinearModel.from_arrays(
+        weights, bias, np.asarray(manifest["classes"]), precision
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", type=Path, help="joblib-pickled fitted model")
+    parser.add_argument("out_dir", type=Path, help="artifact directory to write")
+    parser.add_argument("--version", help="model version recorded in the manifest")
+    args = parser.parse_args()
+
+    import joblib
+
+    out_dir = export_artifact(joblib.load(args.model), args.out_dir, args.version)
+    print(f"Saved: {manifest_path(out_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Dynamic micro-batching of concurrent single-row predictions."""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+from app.admission import DeadlineExceeded, expired
+from app.metrics import DEADLINE_EXPIRED, MICROBATCH_QUEUE_DEPTH, MICROBATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+ScoreFn = Callable[[np.ndarray], Awaitable[Sequence[Any]]]
+
+
+class MicroBatcher:
+    """Coalesce concurrent rows into one vectorized scoring call.
+
+    Rows submitted via :meth:`submit` are queued. A background task takes the
+    first waiting row, then keeps collecting until either ``max_batch_size``
+    rows are gathered or ``max_wait_s`` has elapsed, scores them with a single
+    ``score_fn`` call and resolves each caller's future with its own result.
+    """
+
+    def __init__(self, score_fn: ScoreFn, max_wait_s: float, max_batch_size: int):
+        self.score_fn = score_fn
+        self.max_wait_s = max_wait_s
+        self.max_batch_size = max_batch_size
+        self._queue: asyncio.Queue[tuple[np.ndarray, asyncio.Future, float | None]] = (
+            asyncio.Queue()
+        )
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+        # Rows taken off the queue for the batch currently being formed.
+        self._collecting: list[tuple[np.ndarray, asyncio.Future, float | None]] = []
+
+    def start(self) -> None:
+        """Start the background batching task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and fail any rows not yet being scored."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        pending = self._collecting
+        self._collecting = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+        MICROBATCH_QUEUE_DEPTH.set(0)
+
+    async def submit(self, row: np.ndarray, deadline: float | None = None) -> Any:
+        """Queue a single feature row and wait for its scored result.
+
+        Rows whose monotonic ``deadline`` has passed by the time their batch
+        is formed fail with DeadlineExceeded instead of being scored.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future, deadline))
+        MICROBATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return await future
+
+    async def _collect(self) -> list[tuple[np.ndarray, asyncio.Future, float | None]]:
+        """Wait for one row, then gather more until size or time runs out.
+
+        The batch is kept on ``self`` while it forms so :meth:`stop` can fail
+        its rows if the task is cancelled mid-collection.
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._collecting
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except TimeoutError:
+                break
+        self._collecting = []
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            MICROBATCH_QUEUE_DEPTH.set(self._queue.qsize())
+            live = []
+            for row, future, deadline in batch:
+                # Callers that disconnected while queued have cancelled futures.
+                if future.done():
+                    continue
+                if expired(deadline):
+                    DEADLINE_EXPIRED.labels(stage="batch").inc()
+                    future.set_exception(DeadlineExceeded())
+                    continue
+                live.append((row, future))
+            batch = live
+            if not batch:
+                continue
+            MICROBATCH_SIZE.observe(len(batch))
+            # Score in the background so the next batch can form meanwhile.
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._on_dispatch_done)
+
+    def _on_dispatch_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Micro-batch dispatch failed: {task.exception()}")
+
+    async def _dispatch(self, batch: list[tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Score a formed batch and fan the results back to the callers."""
+        X = np.stack([row for row, _ in batch])
+        try:
+            results = await self.score_fn(X)
+        except Exception:
+            # Score rows one at a time so only the offending ones fail.
+            for row, future in batch:
+                try:
+                    _resolve(future, (await self.score_fn(row[np.newaxis, :]))[0])
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results, strict=True):
+            _resolve(future, result)
+
+
+def _resolve(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
@@ -0,0 +1,139 @@
+"""Binary (raw buffer and ``.npy``) encoding of feature and result matrices.
+
+Raw bodies are little-endian, row-major ``(N, 4)`` matrices whose dtype is
+given by a ``dtype`` media-type parameter, e.g.
+``application/octet-stream; dtype=float64`` (default ``float32``). Bodies that
+start with the ``.npy`` magic string are read as NumPy arrays instead. Both are
+wrapped with ``np.frombuffer`` so no per-row Python objects are created.
+"""
+import io
+from collections.abc import Sequence
+
+import numpy as np
+from fastapi import HTTPException
+
+JSON_MEDIA_TYPE = "application/json"
+OCTET_STREAM = "application/octet-stream"
+NPY_MEDIA_TYPE = "application/x-npy"
+BINARY_MEDIA_TYPES = (OCTET_STREAM, NPY_MEDIA_TYPE)
+SUPPORTED_DTYPES = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+DEFAULT_DTYPE = "float32"
+N_FEATURES = 4
+
+
+def parse_media_type(header: str | None) -> tuple[str, dict[str, str]]:
+    """Split a Content-Type/Accept value into its media type and parameters."""
+    media_type, *raw_params = (header or "").split(";")
+    params = {}
+    for raw in raw_params:
+        key, _, value = raw.strip().partition("=")
+        params[key.lower()] = value.strip().strip('"')
+    return media_type.strip().lower(), params
+
+
+def is_binary(content_type: str | None) -> bool:
+    """Whether a Content-Type header declares a binary body."""
+    return parse_media_type(content_type)[0] in BINARY_MEDIA_TYPES
+
+
+def _range_specificity(media_range: str, media_type: str) -> int:
+    """How specifically an Accept range matches a media type; -1 if it does not."""
+    if media_range == media_type:
+        return 2
+    if media_range.endswith("/*") and media_type.startswith(media_range[:-1]):
+        return 1
+    return 0 if media_range == "*/*" else -1
+
+
+def negotiate(accept: str | None, offered: Sequence[str]) -> str:
+    """Pick the offered media type the Accept header prefers.
+
+    Each offered type takes the q-value of the most specific range matching it;
+    the highest q wins and ties go to the earlier offer. Without a usable
+    Accept header the first offer is returned.
+    """
+    quality = dict.fromkeys(offered, (-1, 0.0))
+    for entry in (accept or "").split(","):
+        media_range, params = parse_media_type(entry)
+        if not media_range:
+            continue
+        try:
+            q = float(params.get("q", 1))
+        except ValueError:
+            q = 0.0
+        for media_type in offered:
+            specificity = _range_specificity(media_range, media_type)
+            if specificity > quality[media_type][0]:
+                quality[media_type] = (specificity, q)
+    best = max(offered, key=lambda media_type: quality[media_type][1])
+    return best if quality[best][1] > 0 else offered[0]
+
+
+def _dtype_from_params(params: dict[str, str]) -> np.dtype:
+    name = params.get("dtype", DEFAULT_DTYPE)
+    if name not in SUPPORTED_DTYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported dtype '{name}', expected one of {sorted(SUPPORTED_DTYPES)}",
+        )
+    return SUPPORTED_DTYPES[name]
+
+
+def _decode_npy(body: bytes) -> np.ndarray:
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+        else:
+            raise ValueError(f"unsupported format version {version}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid .npy payload: {e}") from e
+    if dtype.newbyteorder("<") not in SUPPORTED_DTYPES.values() or fortran_order:
+        raise HTTPException(
+            status_code=415,
+            detail=".npy payload must be a C-ordered float32 or float64 array",
+        )
+    if len(shape) != 2 or shape[1] != N_FEATURES:
+        raise HTTPException(
+            status_code=400,
+            detail=f".npy payload has shape {shape}, expected (n_rows, {N_FEATURES})",
+        )
+    expected = shape[0] * N_FEATURES * dtype.itemsize
+    if len(body) - stream.tell() != expected:
+        raise HTTPException(
+            status_code=400,
+            detail=f".npy payload has {len(body) - stream.tell()} data bytes, expected {expected}",
+        )
+    X = np.frombuffer(body, dtype=dtype, offset=stream.tell())
+    return X.reshape(shape)
+
+
+def decode_features(body: bytes, content_type: str | None) -> np.ndarray:
+    """Wrap a binary request body as an (N, 4) float array without copying."""
+    if body.startswith(b"\x93NUMPY"):
+        return _decode_npy(body)
+    _, params = parse_media_type(content_type)
+    dtype = _dtype_from_params(params)
+    row_bytes = dtype.itemsize * N_FEATURES
+    if len(body) % row_bytes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Body length {len(body)} is not a multiple of {row_bytes} bytes per row",
+        )
+    return np.frombuffer(body, dtype=dtype).reshape(-1, N_FEATURES)
+
+
+def encode_matrix(values: np.ndarray, media_type: str, dtype: np.dtype) -> tuple[bytes, str]:
+    """Encode a result matrix as ``.npy`` or a raw buffer, per ``media_type``.
+
+    Returns the body and its Content-Type.
+    """
+    values = np.ascontiguousarray(values, dtype=dtype.newbyteorder("<"))
+    if media_type == NPY_MEDIA_TYPE:
+        stream = io.BytesIO()
+        np.save(stream, values, allow_pickle=False)
+        return stream.getvalue(), NPY_MEDIA_TYPE
+    return values.tobytes(), f"{OCTET_STREAM}; dtype={values.dtype.name}"
@@ -0,0 +1,312 @@
+"""Offline bulk scoring of CSV or NDJSON files.
+
+    python -m app.bulk rows.csv scores.ndjson --workers 4
+
+Loads the model the API serves (``ML_API_MODEL_PATH`` or the bundled pickle,
+with the same precision and fused-engine settings) and writes one NDJSON line
+per input row, in input order: the object ``/predict-batch`` returns for that
+row, or ``{"line": n, "detail": ...}`` if the row fails validation, as in
+``/predict-stream``.
+
+Input is read in chunks of ``--chunk-size`` lines. Pool workers parse,
+validate, score and encode whole chunks; at most two chunks per worker are in
+flight and results are written as soon as the oldest one is ready, so memory
+stays bounded however large the input is.
+"""
+import argparse
+import csv
+import multiprocessing
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Literal, NamedTuple
+
+import numpy as np
+import orjson
+from pydantic import ValidationError
+
+from app.config import load_settings
+from app.registry import read_model
+from app.schemas.predict_schema import (
+    FEATURE_NAMES,
+    TARGET_NAMES,
+    IrisBatchFeatures,
+    IrisFeatures,
+    validate_feature_array,
+)
+from app.serialization import encode_rows
+
+MODEL_PATH = Path(__file__).resolve().parent / "model" / "model.pkl"
+DEFAULT_CHUNK_SIZE = 10_000
+IN_FLIGHT_PER_WORKER = 2
+
+InputFormat = Literal["csv", "ndjson"]
+Chunk = list[tuple[int, bytes]]
+
+
+class ChunkResult(NamedTuple):
+    output: bytes
+    rows: int
+    invalid: int
+
+
+class BulkResult(NamedTuple):
+    rows: int
+    invalid: int
+    seconds: float
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _error_line(line_no: int, detail: object) -> bytes:
+    return orjson.dumps({"line": line_no, "detail": detail}, default=str) + b"\n"
+
+
+class ChunkScorer:
+    """Turn a chunk of ``(line number, raw line)`` pairs into NDJSON output.
+
+    For CSV, ``columns`` gives the position of each of ``FEATURE_NAMES`` in
+    a row. Each chunk is parsed in one call when it is well-formed, and line
+    by line otherwise so that only the bad lines turn into errors.
+    """
+
+    def __init__(
+        self,
+        model_path: Path | str,
+        input_format: InputFormat,
+        columns: Sequence[int] = (),
+        precision: str = "float64",
+        fused: bool = True,
+        target_names: Sequence[str] = TARGET_NAMES,
+    ):
+        _, self.model = read_model(model_path, precision, fused)
+        self.input_format = input_format
+        self.columns = tuple(columns)
+        self.target_names = list(target_names)
+
+    def _parse_csv(self, lines: list[bytes]) -> tuple[np.ndarray, dict[int, object]]:
+        try:
+            return np.loadtxt(lines, delimiter=",", usecols=self.columns, ndmin=2), {}
+        except ValueError:
+            pass
+        rows, errors = [], {}
+        for i, line in enumerate(lines):
+            fields = line.decode("utf-8", "replace").split(",")
+            values = {
+                name: fields[col].strip()
+                for name, col in zip(FEATURE_NAMES, self.columns, strict=True)
+                if col < len(fields)
+            }
+            try:
+                features = IrisFeatures.model_validate(values)
+            except ValidationError as e:
+                errors[i] = e.errors(include_url=False)
+                rows.append([np.nan] * len(FEATURE_NAMES))
+            else:
+                rows.append([getattr(features, name) for name in FEATURE_NAMES])
+        return np.array(rows, dtype=float).reshape(-1, len(FEATURE_NAMES)), errors
+
+    def _parse_ndjson(self, lines: list[bytes]) -> tuple[np.ndarray, dict[int, object]]:
+        try:
+            batch = IrisBatchFeatures.model_validate_json(b'{"items":[' + b",".join(lines) + b"]}")
+            # A line such as '{...},{...}' would otherwise shift every later row.
+            if len(batch.items) != len(lines):
+                raise ValueError("line count mismatch")
+            items: list[IrisFeatures | None] = list(batch.items)
+            errors = {}
+        except ValueError:  # includes ValidationError
+            items, errors = [], {}
+            for i, line in enumerate(lines):
+                try:
+                    items.append(IrisFeatures.model_validate_json(line))
+                except ValidationError as e:
+                    errors[i] = e.errors(include_url=False)
+                    items.append(None)
+        rows = [
+            [getattr(item, name) for name in FEATURE_NAMES]
+            if item is not None
+            else [np.nan] * len(FEATURE_NAMES)
+            for item in items
+        ]
+        return np.array(rows, dtype=float).reshape(-1, len(FEATURE_NAMES)), errors
+
+    def __call__(self, chunk: Chunk) -> ChunkResult:
+        line_numbers = [line_no for line_no, _ in chunk]
+        lines = [line for _, line in chunk]
+        parse = self._parse_csv if self.input_format == "csv" else self._parse_ndjson
+        X, errors = parse(lines)
+
+        parsed = [i for i in range(len(lines)) if i not in errors]
+        for error in validate_feature_array(X[parsed], loc=()):
+            row, *loc = error["loc"]
+            errors.setdefault(parsed[row], []).append({**error, "loc": loc})
+
+        valid = [i for i in range(len(lines)) if i not in errors]
+        out: list[bytes] = [b""] * len(lines)
+        if valid:
+            proba = self.model.predict_proba(X[valid])
+            items = encode_rows(proba, self.target_names)["items"]
+            for i, item in zip(valid, items, strict=True):
+                out[i] = orjson.dumps(item) + b"\n"
+        for i, detail in errors.items():
+            out[i] = _error_line(line_numbers[i], detail)
+        return ChunkResult(b"".join(out), len(lines), len(errors))
+
+
+_scorer: ChunkScorer | None = None
+
+
+def _init_worker(*args) -> None:
+    """Build the scorer, and so load the model, once per pool worker."""
+    global _scorer
+    _scorer = ChunkScorer(*args)
+
+
+def _score_in_worker(chunk: Chunk) -> ChunkResult:
+    return _scorer(chunk)
+
+
+def csv_columns(header: bytes) -> list[int]:
+    """Position of each of ``FEATURE_NAMES`` in a CSV header line."""
+    names = [name.strip() for name in next(csv.reader([header.decode("utf-8-sig")]))]
+    missing = [name for name in FEATURE_NAMES if name not in names]
+    if missing:
+        raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+    return [names.index(name) for name in FEATURE_NAMES]
+
+
+def read_chunks(lines: Iterable[bytes], chunk_size: int, first_line: int = 1) -> Iterator[Chunk]:
+    """Group non-blank lines into chunks, keeping each line's 1-based number."""
+    numbered = (
+        (line_no, line.rstrip(b"\r\n"))
+        for line_no, line in enumerate(lines, start=first_line)
+        if line.strip()
+    )
+    while chunk := list(islice(numbered, chunk_size)):
+        yield chunk
+
+
+def score_stream(
+    source: BinaryIO,
+    sink: BinaryIO,
+    input_format: InputFormat,
+    model_path: Path | str,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    precision: str = "float64",
+    fused: bool = True,
+) -> BulkResult:
+    """Score every row of ``source`` into ``sink``, in order.
+
+    Raises ``ValueError`` if a CSV input lacks a feature column.
+    """
+    start = time.perf_counter()
+    columns: list[int] = []
+    first_line = 1
+    if input_format == "csv":
+        columns = csv_columns(source.readline())
+        first_line = 2
+    scorer_args = (model_path, input_format, columns, precision, fused)
+    rows = invalid = 0
+
+    def write(result: ChunkResult) -> None:
+        nonlocal rows, invalid
+        sink.write(result.output)
+        rows += result.rows
+        invalid += result.invalid
+
+    chunks = read_chunks(source, chunk_size, first_line)
+    if workers <= 1:
+        scorer = ChunkScorer(*scorer_args)
+        for chunk in chunks:
+            write(scorer(chunk))
+    else:
+        # spawn, like the API's process executor, so workers start clean.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=scorer_args,
+        ) as pool:
+            pending: deque[Future[ChunkResult]] = deque()
+            for chunk in chunks:
+                if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                    write(pending.popleft().result())
+                pending.append(pool.submit(_score_in_worker, chunk))
+            while pending:
+                write(pending.popleft().result())
+    sink.flush()
+    return BulkResult(rows, invalid, time.perf_counter() - start)
+
+
+def _input_format(path: str, value: str | None) -> InputFormat:
+    if value is not None:
+        return value
+    return "csv" if Path(path).suffix.lower() == ".csv" else "ndjson"
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or NDJSON file of feature rows, or - for stdin")
+    parser.add_argument("output", help="NDJSON file to write results to, or - for stdout")
+    parser.add_argument(
+        "--format",
+        choices=("csv", "ndjson"),
+        help="input format (default: from the file extension, else ndjson)",
+    )
+    parser.add_argument(
+        "--model",
+        default=settings.model_path or str(MODEL_PATH),
+        help="model artifact or pickle (default: ML_API_MODEL_PATH or the bundled model)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="scoring processes; 1 scores in this process (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"rows per chunk (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    args = parser.parse_args(argv)
+
+    with ExitStack() as stack:
+        source = (
+            sys.stdin.buffer if args.input == "-" else stack.enter_context(open(args.input, "rb"))
+        )
+        sink = (
+            sys.stdout.buffer if args.output == "-" else stack.enter_context(open(args.output, "wb"))
+        )
+        try:
+            result = score_stream(
+                source,
+                sink,
+                _input_format(args.input, args.format),
+                args.model,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                precision=settings.inference_precision,
+                fused=settings.fused_engine,
+            )
+        except ValueError as e:
+            parser.exit(2, f"error: {e}\n")
+    print(
+        f"Scored {result.rows} rows ({result.invalid} invalid) in {result.seconds:.2f} s: "
+        f"{result.rows_per_s:,.0f} rows/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
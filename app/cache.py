@@ -0,0 +1,106 @@
+"""In-process LRU/TTL cache of predicted probabilities."""
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+import numpy as np
+
+from app.metrics import (
+    PRED_CACHE_DEDUPLICATED_ROWS,
+    PRED_CACHE_EVICTIONS,
+    PRED_CACHE_HITS,
+    PRED_CACHE_MISSES,
+    PRED_CACHE_SIZE,
+)
+
+ComputeFn = Callable[[np.ndarray], Awaitable[np.ndarray]]
+
+
+class PredictionCache:
+    """Cache probability rows keyed on the feature vector and model version.
+
+    With ``quantum`` set, features are rounded to multiples of it before
+    keying, so readings that differ by less than the sensor resolution share
+    an entry. Entries expire after ``ttl_s`` seconds and the least recently
+    used entry is evicted beyond ``max_size``. The cache is cleared whenever
+    it is used with a different model object.
+
+    Not thread-safe: it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_size: int, ttl_s: float, quantum: float | None = None):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.quantum = quantum
+        self._entries: OrderedDict[bytes, tuple[float, np.ndarray]] = OrderedDict()
+        self._model: object | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self, reason: str = "clear") -> None:
+        """Drop every entry."""
+        if self._entries:
+            PRED_CACHE_EVICTIONS.labels(reason=reason).inc(len(self._entries))
+        self._entries.clear()
+        PRED_CACHE_SIZE.set(0)
+
+    def _key_matrix(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self.quantum is None:
+            return X
+        return np.round(X / self.quantum).astype(np.int64)
+
+    def _get(self, key: bytes, now: float) -> np.ndarray | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            PRED_CACHE_EVICTIONS.labels(reason="expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: bytes, value: np.ndarray, now: float) -> None:
+        self._entries[key] = (now + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            PRED_CACHE_EVICTIONS.labels(reason="size").inc()
+
+    async def get_or_compute(
+        self, X: np.ndarray, model: object, model_version: str, compute: ComputeFn
+    ) -> np.ndarray:
+        """Return probabilities for X, scoring only rows not already cached.
+
+        Duplicate rows in X are scored once; every cache miss is scored in a
+        single ``compute`` call.
+        """
+        if model is not self._model:
+            self.clear(reason="model_changed")
+            self._model = model
+
+        keys_matrix = self._key_matrix(X)
+        unique, first, inverse = np.unique(
+            keys_matrix, axis=0, return_index=True, return_inverse=True
+        )
+        PRED_CACHE_DEDUPLICATED_ROWS.inc(len(X) - len(unique))
+
+        prefix = model_version.encode() + b"\0"
+        keys = [prefix + row.tobytes() for row in unique]
+        now = time.monotonic()
+        rows: list[np.ndarray | None] = [self._get(key, now) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        PRED_CACHE_HITS.inc(len(keys) - len(missing))
+        PRED_CACHE_MISSES.inc(len(missing))
+
+        if missing:
+            scored = await compute(X[first[missing]])
+            now = time.monotonic()
+            for i, row in zip(missing, scored, strict=True):
+                rows[i] = row
+                self._put(keys[i], row.copy(), now)
+            PRED_CACHE_SIZE.set(len(self._entries))
+        return np.stack(rows)[inverse.reshape(-1)]
@@ -0,0 +1,104 @@
+"""Runtime settings loaded from ``ML_API_*`` environment variables."""
+import json
+import os
+from collections.abc import Mapping
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+ENV_PREFIX = "ML_API_"
+
+
+class Settings(BaseModel):
+    """Service tuning knobs. Each field maps to ``ML_API_<FIELD_NAME>``."""
+
+    microbatch_enabled: bool = False
+    microbatch_max_wait_ms: float = Field(2.0, ge=0)
+    microbatch_max_size: int = Field(64, ge=1)
+    fused_engine: bool = True
+    inference_precision: Literal["float64", "float32"] = "float64"
+    inference_executor: Literal["inline", "thread", "process"] = "inline"
+    inference_workers: int = Field(4, ge=1)
+    stream_chunk_size: int = Field(256, ge=1)
+    prediction_cache_size: int = Field(0, ge=0)
+    prediction_cache_ttl_s: float = Field(300.0, gt=0)
+    prediction_cache_quantum: float | None = Field(None, gt=0)
+    # Admission control for the predict endpoints; 0 disables it.
+    admission_max_in_flight: int = Field(64, ge=0)
+    admission_max_queue: int = Field(256, ge=0)
+    admission_retry_after_s: int = Field(1, ge=0)
+    rate_limit_enabled: bool = True
+    # Token buckets per path, in rows scored per period; JSON in the environment.
+    rate_limits: dict[str, str] = {
+        "/predict": "10/minute",
+        "/predict-batch": "10000/minute",
+        "/predict-stream": "10000/minute",
+        # At least jobs_max_rows, or the largest jobs could never be admitted.
+        "/jobs": "10000000/hour",
+    }
+    # Per-API-key overrides, e.g. {"<key>": {"/predict-batch": "100000/minute"}}.
+    api_key_rate_limits: dict[str, dict[str, str]] = {}
+    # Set by app.serve: an SQLite file on shared memory holding the buckets.
+    rate_limit_store_path: str | None = None
+    log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    # Fraction of successful requests logged; errors are always logged.
+    log_success_sample_rate: float = Field(1.0, ge=0, le=1)
+    # Defaults to the bundled app/model/model.pkl.
+    model_path: str | None = None
+    model_version: str = "iris-logreg-v1"
+    # Poll model_path for changes and hot-swap it in; 0 disables watching.
+    model_watch_interval_s: float = Field(0.0, ge=0)
+    # Required in X-Admin-Token for /admin and /debug endpoints; unset disables them.
+    admin_token: str | None = None
+    # Asynchronous /jobs. Results spill to jobs_dir (default <tmp>/ml-api-jobs),
+    # which workers of one server share; finished jobs are kept for jobs_ttl_s.
+    jobs_dir: str | None = None
+    jobs_workers: int = Field(1, ge=1)
+    jobs_max_queued: int = Field(16, ge=0)
+    jobs_max_rows: int = Field(10_000_000, ge=1)
+    # JSON bodies are parsed in memory at ~16x their size, so they are capped far
+    # below what binary bodies allow; 8 MiB is about 100,000 rows.
+    jobs_max_json_bytes: int = Field(8 * 1024 * 1024, ge=1)
+    jobs_chunk_size: int = Field(10_000, ge=1)
+    jobs_ttl_s: float = Field(3600.0, gt=0)
+    # Running feature and predicted-class statistics for /stats and /metrics.
+    feature_stats_enabled: bool = True
+    # Candidate model scored in the background on the same traffic as the
+    # primary and compared with it; unset disables shadowing.
+    shadow_model_path: str | None = None
+    shadow_max_queued: int = Field(64, ge=1)
+    host: str = "127.0.0.1"
+    port: int = Field(8000, ge=1, le=65535)
+    workers: int = Field(1, ge=1)
+    # Set by app.serve: a model artifact written once and memory-mapped by workers.
+    shared_model_path: str | None = None
+    latency_buckets: tuple[float, ...] = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    )
+
+    @field_validator("rate_limits", "api_key_rate_limits", mode="before")
+    @classmethod
+    def _parse_json(cls, value):
+        """Accept JSON objects, as given in environment variables."""
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    @field_validator("latency_buckets", mode="before")
+    @classmethod
+    def _split_csv(cls, value):
+        """Accept comma-separated values, as given in environment variables."""
+        if isinstance(value, str):
+            return [item for item in value.split(",") if item.strip()]
+        return value
+
+
+def load_settings(environ: Mapping[str, str] | None = None) -> Settings:
+    """Build Settings from the environment, ignoring unrelated variables."""
+    environ = os.environ if environ is None else environ
+    values = {
+        name: environ[ENV_PREFIX + name.upper()]
+        for name in Settings.model_fields
+        if ENV_PREFIX + name.upper() in environ
+    }
+    return Settings.model_validate(values)
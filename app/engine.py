@@ -0,0 +1,133 @@
+"""Fused NumPy inference for linear scikit-learn pipelines.
+
+``compile_model`` folds a ``StandardScaler`` into the coefficients of a
+following ``LogisticRegression`` so that ``predict_proba`` becomes a single
+affine transform plus softmax, with none of sklearn's per-call validation or
+step dispatch. Pipelines it does not recognise are returned unchanged.
+"""
+import logging
+from typing import Any, Literal
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Precision = Literal["float64", "float32"]
+
+
+class FusedLinearModel:
+    """Affine + softmax (or sigmoid for binary) classifier over raw features."""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        classes: np.ndarray,
+        precision: Precision = "float64",
+    ):
+        dtype = np.dtype(precision)
+        # Stored as (n_features, n_outputs) so scoring is a plain X @ W.
+        self.weights = np.ascontiguousarray(weights.T, dtype=dtype)
+        self.bias = np.ascontiguousarray(bias, dtype=dtype)
+        self.classes_ = classes
+        self.dtype = dtype
+        self.n_features_in_ = self.weights.shape[0]
+
+    @classmethod
+    def from_arrays(
+        cls,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        classes: np.ndarray,
+        precision: Precision = "float64",
+    ) -> "FusedLinearModel":
+        """Build from stored (n_features, n_outputs) weights without copying them.
+
+        Arrays that already have the requested dtype, such as memory-mapped
+        ones, are used as they are.
+        """
+        model = cls.__new__(cls)
+        dtype = np.dtype(precision)
+        model.weights = np.asarray(weights, dtype=dtype)
+        model.bias = np.asarray(bias, dtype=dtype)
+        model.classes_ = classes
+        model.dtype = dtype
+        model.n_features_in_ = model.weights.shape[0]
+        return model
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n_samples, {self.n_features_in_})"
+            )
+        return X @ self.weights + self.bias
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.hstack([1.0 - positive, positive])
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+
+def _is_multinomial(clf: Any) -> bool:
+    """Whether a LogisticRegression's probabilities can be fused.
+
+    Binary models are always supported; multiclass ones only with softmax.
+    """
+    if len(clf.classes_) <= 2:
+        return True
+    # ``multi_class`` was removed in recent sklearn, where softmax is always used.
+    multi_class = getattr(clf, "multi_class", "multinomial")
+    if multi_class in ("auto", "deprecated"):
+        return clf.solver != "liblinear"
+    return multi_class == "multinomial"
+
+
+def compile_model(model: Any, precision: Precision = "float64") -> Any:
+    """Return a fused equivalent of ``model`` if supported, else ``model`` itself.
+
+    Supported: a ``LogisticRegression``, optionally preceded by a
+    ``StandardScaler`` in a ``Pipeline``. Already-fused models are returned
+    at the requested precision without importing sklearn.
+    """
+    if isinstance(model, FusedLinearModel):
+        if model.dtype == np.dtype(precision):
+            return model
+        return FusedLinearModel.from_arrays(model.weights, model.bias, model.classes_, precision)
+    # Only reached with an already-unpickled sklearn model, so this is cheap.
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    steps = [step for _, step in model.steps] if isinstance(model, Pipeline) else [model]
+    steps = [step for step in steps if step not in (None, "passthrough")]
+    *transforms, clf = steps
+    if (
+        not isinstance(clf, LogisticRegression)
+        or not _is_multinomial(clf)
+        or len(transforms) > 1
+        or any(not isinstance(t, StandardScaler) for t in transforms)
+    ):
+        logger.info(f"Fused engine does not support {model!r}; using sklearn")
+        return model
+
+    weights = np.asarray(clf.coef_, dtype=np.float64)
+    bias = np.asarray(clf.intercept_, dtype=np.float64)
+    if len(clf.classes_) == 2 and getattr(clf, "multi_class", None) == "multinomial":
+        # Older sklearn scores binary multinomial models as softmax([-d, d]),
+        # which equals sigmoid(2d) rather than the usual sigmoid(d).
+        weights, bias = 2 * weights, 2 * bias
+    if transforms:
+        scaler = transforms[0]
+        n_features = weights.shape[1]
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+        # w . ((x - mean) / scale) + b == (w / scale) . x + (b - w . (mean / scale))
+        weights = weights / scale
+        bias = bias - weights @ mean
+    return FusedLinearModel(weights, bias, clf.classes_, precision)
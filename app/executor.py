@@ -0,0 +1,137 @@
+"""Executors that keep CPU-bound inference off the event loop."""
+import asyncio
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal, TypeVar
+
+from app.admission import DeadlineExceeded, expired
+from app.metrics import (
+    DEADLINE_EXPIRED,
+    INFERENCE_EXECUTOR_ACTIVE,
+    INFERENCE_EXECUTOR_CAPACITY,
+    INFERENCE_EXECUTOR_WAIT_SECONDS,
+    INFERENCE_EXECUTOR_WAITING,
+)
+
+ExecutorMode = Literal["inline", "thread", "process"]
+T = TypeVar("T")
+
+
+def _run_in_worker(fn: Callable[..., Any], args: tuple) -> int:
+    """Call ``fn(*args)`` and return the id of the process it ran in."""
+    fn(*args)
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """Run inference calls inline, on a thread pool, or on a process pool.
+
+    Pooled modes admit at most ``max_workers`` calls at a time; further calls
+    wait on a semaphore on the event loop (reported as ``waiting``) instead of
+    piling up inside the pool, giving up if their deadline passes meanwhile. In ``process`` mode ``initializer`` runs once
+    per worker, e.g. to load the model, and ``fn`` must be picklable.
+    """
+
+    def __init__(
+        self,
+        mode: ExecutorMode = "inline",
+        max_workers: int = 1,
+        initializer: Callable[..., None] | None = None,
+        initargs: tuple = (),
+    ):
+        self.mode = mode
+        self.max_workers = max_workers
+        self._pool: Executor | None = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="inference"
+            )
+        elif mode == "process":
+            # spawn avoids forking a process that already runs threads and a loop.
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer,
+                initargs=initargs,
+            )
+        self._semaphore = asyncio.Semaphore(max_workers)
+        # inc/dec rather than set: an old pool may drain while its replacement runs.
+        self._capacity = max_workers if self._pool is not None else 0
+        INFERENCE_EXECUTOR_CAPACITY.inc(self._capacity)
+
+    async def warm_up(
+        self, fn: Callable[..., Any], *args: Any, timeout_s: float = 60.0
+    ) -> set[int]:
+        """Start every process-pool worker and run ``fn(*args)`` on each.
+
+        ProcessPoolExecutor spawns workers, and runs ``initializer`` in them,
+        only as calls are submitted, so without this the first requests would
+        wait for processes to start and load the model. Returns the worker
+        process ids; a no-op returning an empty set in other modes. Raises
+        TimeoutError if not every worker ran ``fn`` within ``timeout_s``.
+        """
+        if self.mode != "process":
+            return set()
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout_s
+        warmed: set[int] = set()
+        while True:
+            # One call per worker not seen yet; a worker still starting up
+            # may leave its call to one that is ready, so go round again.
+            pids = await asyncio.gather(*(
+                loop.run_in_executor(self._pool, _run_in_worker, fn, args)
+                for _ in range(self.max_workers - len(warmed))
+            ))
+            warmed.update(pids)
+            if len(warmed) >= self.max_workers:
+                return warmed
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Only {len(warmed)} of {self.max_workers} inference workers warmed up"
+                )
+            await asyncio.sleep(0.01)
+
+    async def run(self, fn: Callable[..., T], *args: Any, deadline: float | None = None) -> T:
+        """Run ``fn(*args)`` on the executor and return its result.
+
+        With a monotonic ``deadline``, raises DeadlineExceeded instead of
+        running ``fn`` if it passes while the call waits for a free slot.
+        """
+        if self._pool is None:
+            return fn(*args)
+        start = time.perf_counter()
+        INFERENCE_EXECUTOR_WAITING.inc()
+        try:
+            if deadline is not None and self._semaphore.locked():
+                timeout = max(0.0, deadline - time.monotonic())
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            else:
+                await self._semaphore.acquire()
+        except TimeoutError:
+            DEADLINE_EXPIRED.labels(stage="executor").inc()
+            raise DeadlineExceeded() from None
+        finally:
+            INFERENCE_EXECUTOR_WAITING.dec()
+        INFERENCE_EXECUTOR_WAIT_SECONDS.observe(time.perf_counter() - start)
+        if expired(deadline):
+            self._semaphore.release()
+            DEADLINE_EXPIRED.labels(stage="executor").inc()
+            raise DeadlineExceeded()
+        INFERENCE_EXECUTOR_ACTIVE.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, *args)
+        finally:
+            INFERENCE_EXECUTOR_ACTIVE.dec()
+            self._semaphore.release()
+
+    def shutdown(self) -> None:
+        """Stop the pool, waiting for running calls to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        INFERENCE_EXECUTOR_CAPACITY.dec(self._capacity)
+        self._capacity = 0
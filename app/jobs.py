@@ -0,0 +1,241 @@
+"""Asynchronous scoring jobs for inputs too large for /predict-batch.
+
+Submitting a job writes its feature matrix to disk and queues it; a small
+pool of background tasks scores queued jobs in vectorized chunks and spills
+each chunk's probabilities into a memory-mapped ``.npy`` file, so neither the
+inputs nor the results of waiting or finished jobs are held in memory.
+
+Every job lives in its own directory under ``root``::
+
+    <job_id>/job.json       JobInfo, rewritten atomically as the job progresses
+    <job_id>/features.npy   input rows, removed once the job finishes
+    <job_id>/results.npy    (rows, n_classes) probabilities
+
+Because the state is on disk, any worker process sharing ``root`` can report
+a job's progress and serve its result pages, whichever worker scores it.
+Finished jobs are removed ``ttl_s`` seconds after they finish.
+"""
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import numpy as np
+
+from app.metrics import (
+    JOB_ROWS_PENDING,
+    JOB_ROWS_SCORED,
+    JOB_THROUGHPUT,
+    JOBS,
+    JOBS_QUEUED,
+    JOBS_RUNNING,
+)
+from app.schemas.job_schema import JobInfo
+
+logger = logging.getLogger(__name__)
+
+INFO_NAME = "job.json"
+FEATURES_NAME = "features.npy"
+RESULTS_NAME = "results.npy"
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+ScoreFn = Callable[[np.ndarray], Awaitable[np.ndarray]]
+
+
+class JobQueueFull(Exception):
+    """No room to queue another job."""
+
+
+class JobNotFound(KeyError):
+    """No job with this id, or it has expired."""
+
+
+class JobManager:
+    """Queue, score and serve results of jobs stored under ``root``.
+
+    ``score`` turns a feature chunk into its probability matrix;
+    ``model_version`` reports the model a job starts on. At most ``workers``
+    jobs run at once and at most ``max_queued`` more wait in this process.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        score: ScoreFn,
+        model_version: Callable[[], str],
+        workers: int = 1,
+        max_queued: int = 16,
+        chunk_size: int = 10_000,
+        ttl_s: float = 3600.0,
+    ):
+        self.root = Path(root)
+        self.score = score
+        self.model_version = model_version
+        self.workers = workers
+        self.max_queued = max_queued
+        self.chunk_size = chunk_size
+        self.ttl_s = ttl_s
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        # Jobs of this process that have not finished, to fail them on stop().
+        self._active: set[str] = set()
+
+    def start(self) -> None:
+        """Create ``root`` and start the scoring tasks on the running loop."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.sweep()
+        loop = asyncio.get_running_loop()
+        while len(self._tasks) < self.workers:
+            self._tasks.append(loop.create_task(self._run()))
+
+    async def stop(self) -> None:
+        """Stop scoring; jobs that did not finish are marked failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job_id in list(self._active):
+            info = self.info(job_id)
+            JOB_ROWS_PENDING.dec(info.rows - info.rows_done)
+            if info.status == "queued":
+                JOBS_QUEUED.dec()
+            self._finish(info, "failed", error="Server shut down before the job finished")
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    def _dir(self, job_id: str) -> Path:
+        if not _JOB_ID.fullmatch(job_id):
+            raise JobNotFound(job_id)
+        return self.root / job_id
+
+    def _write_info(self, info: JobInfo) -> None:
+        """Replace job.json atomically, so readers never see a partial file."""
+        path = self._dir(info.job_id) / INFO_NAME
+        tmp = path.with_name(f".{INFO_NAME}.{os.getpid()}.tmp")
+        tmp.write_text(info.model_dump_json())
+        os.replace(tmp, path)
+
+    def info(self, job_id: str) -> JobInfo:
+        """Current state of a job; raises JobNotFound."""
+        try:
+            return JobInfo.model_validate_json((self._dir(job_id) / INFO_NAME).read_bytes())
+        except (FileNotFoundError, NotADirectoryError):
+            raise JobNotFound(job_id) from None
+
+    async def submit(self, X: np.ndarray) -> JobInfo:
+        """Spill ``X`` to disk and queue it for scoring.
+
+        Raises JobQueueFull if ``max_queued`` jobs are already waiting.
+        """
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull()
+        self.sweep()
+        info = JobInfo(
+            job_id=uuid.uuid4().hex, status="queued", rows=len(X), created_at=time.time()
+        )
+        job_dir = self._dir(info.job_id)
+        job_dir.mkdir()
+        await asyncio.to_thread(np.save, job_dir / FEATURES_NAME, X)
+        self._write_info(info)
+        self._active.add(info.job_id)
+        self._queue.put_nowait(info.job_id)
+        JOBS.labels(status="submitted").inc()
+        JOBS_QUEUED.inc()
+        JOB_ROWS_PENDING.inc(info.rows)
+        return info
+
+    def results(self, job_id: str, offset: int, limit: int) -> np.ndarray:
+        """Probabilities of rows ``offset`` to ``offset + limit`` of a finished job."""
+        path = self._dir(job_id) / RESULTS_NAME
+        try:
+            proba = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            raise JobNotFound(job_id) from None
+        return np.array(proba[offset:offset + limit])
+
+    def delete(self, job_id: str) -> None:
+        """Remove a job and its files; raises JobNotFound."""
+        job_dir = self._dir(job_id)
+        if not job_dir.is_dir():
+            raise JobNotFound(job_id)
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    def sweep(self) -> None:
+        """Remove jobs that finished more than ``ttl_s`` seconds ago."""
+        cutoff = time.time() - self.ttl_s
+        for job_dir in self.root.iterdir():
+            try:
+                info = self.info(job_dir.name)
+            except (JobNotFound, ValueError):
+                continue
+            if info.finished_at is not None and info.finished_at < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _finish(self, info: JobInfo, status: str, error: str | None = None) -> None:
+        finished = time.time()
+        rows_per_s = None
+        if status == "succeeded" and info.started_at is not None:
+            rows_per_s = info.rows / max(finished - info.started_at, 1e-9)
+            JOB_THROUGHPUT.observe(rows_per_s)
+        self._write_info(info.model_copy(update={
+            "status": status, "finished_at": finished, "rows_per_s": rows_per_s, "error": error,
+        }))
+        (self._dir(info.job_id) / FEATURES_NAME).unlink(missing_ok=True)
+        self._active.discard(info.job_id)
+        JOBS.labels(status=status).inc()
+
+    async def _run(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            JOBS_QUEUED.dec()
+            JOBS_RUNNING.inc()
+            try:
+                await self._process(job_id)
+            except Exception:
+                # Keep the worker alive whatever happened to this job.
+                logger.exception(f"Job {job_id} could not be processed")
+            finally:
+                JOBS_RUNNING.dec()
+
+    async def _process(self, job_id: str) -> None:
+        info = self.info(job_id).model_copy(update={
+            "status": "running", "started_at": time.time(), "model_version": self.model_version(),
+        })
+        self._write_info(info)
+        job_dir = self._dir(job_id)
+        try:
+            X = np.load(job_dir / FEATURES_NAME, mmap_mode="r")
+            results = None
+            for start in range(0, len(X), self.chunk_size):
+                proba = await self.score(np.asarray(X[start:start + self.chunk_size]))
+                if results is None:
+                    results = np.lib.format.open_memmap(
+                        job_dir / RESULTS_NAME,
+                        mode="w+",
+                        dtype=proba.dtype,
+                        shape=(len(X), proba.shape[1]),
+                    )
+                results[start:start + len(proba)] = proba
+                info = info.model_copy(update={"rows_done": start + len(proba)})
+                self._write_info(info)
+                JOB_ROWS_SCORED.inc(len(proba))
+                JOB_ROWS_PENDING.dec(len(proba))
+                # Scoring may not have yielded; let requests in between chunks.
+                await asyncio.sleep(0)
+            if results is not None:
+                results.flush()
+                del results
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job_id} failed: {e}")
+            JOB_ROWS_PENDING.dec(info.rows - info.rows_done)
+            self._finish(info, "failed", error=getattr(e, "detail", None) or str(e))
+            return
+        self._finish(info, "succeeded")
+        logger.info(f"Job {job_id} scored {info.rows} rows")
@@ -1,119 +1,120 @@
-"""Structured logging configuration with JSON formatter and request ID middleware."""
+"""Structured logging configuration with a queued JSON writer and request logs."""
+import atexit
+import copy
 import json
 import logging
-import logging.config
-import uuid
-from collections.abc import Callable
-
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-
-
-def configure_logging() -> None:
-    """Configure structured JSON logging to stdout."""
-    config = {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "json": {
-                "()": "app.logging_config.JSONFormatter",
-            },
-        },
-        "handlers": {
-            "default": {
-                "level": "INFO",
-                "class": "logging.StreamHandler",
-                "formatter": "json",
-                "stream": "ext://sys.stdout",
-            },
-        },
-        "loggers": {
-            "": {
-                "handlers": ["default"],
-                "level": "INFO",
-                "propagate": True,
-            },
-        },
-    }
-    logging.config.dictConfig(config)
+import logging.handlers
+import queue
+import random
+import sys
+from typing import TextIO
 
+# ``extra`` fields copied into the JSON output when set on a record.
+EXTRA_FIELDS = ("request_id", "method", "path", "status_code", "duration_ms")
 
-class JSONFormatter(logging.Formatter):
-    """Custom JSON formatter for structured logging."""
-
-    def format(self, record: logging.LogRecord) -> str:
-        """Format log record as single-line JSON."""
-        log_data = {
-            "timestamp": self.formatTime(record),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-        }
-        if record.exc_info:
-            log_data["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_data)
+_listener: logging.handlers.QueueListener | None = None
+# Fraction of successful (< 400) requests logged; errors are always logged.
+_success_sample_rate = 1.0
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Middleware to add request ID tracking."""
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hand records to the writer thread with only the cheap work done here.
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Add request ID to request and response headers."""
-        # Read X-Request-ID or generate a short UUID
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4())[:8])
+    The base class formats the whole record on the calling thread; this keeps
+    JSON encoding and the write for the listener, and only resolves what
+    cannot be deferred: the message arguments and the active exception.
+    """
 
-        # Store in request state for logging
-        request.state.request_id = request_id
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-        # Log request
-        logger = logging.getLogger("app.request")
-        logger.info(
-            f"Request: {request.method} {request.url.path}",
-            extra={"request_id": request_id},
-        )
 
-        # Call next middleware/endpoint
-        response = await call_next(request)
+def configure_logging(
+    level: str = "INFO",
+    success_sample_rate: float = 1.0,
+    stream: TextIO | None = None,
+) -> None:
+    """Configure structured JSON logging to stdout.
 
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request_id
+    Records are put on an in-memory queue and written by a background thread,
+    so logging never blocks the event loop on formatting or I/O. Calling this
+    again replaces the previous configuration.
+    """
+    global _listener, _success_sample_rate
+    shutdown_logging()
+    _success_sample_rate = success_sample_rate
 
-        # Log response
-        logger.info(
-            f"Response: {request.method} {request.url.path} {response.status_code}",
-            extra={"request_id": request_id},
-        )
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JSONFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+    _listener.start()
 
-        return response
+    root = logging.getLogger()
+    for handler in [h for h in root.handlers if isinstance(h, _QueueHandler)]:
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
 
 
-async def add_request_id_middleware(request: Request, call_next: Callable) -> Response:
-    """Middleware function to add request ID tracking."""
-    # Read X-Request-ID or generate a short UUID
-    request_id = request.headers.get("X-Request-ID", str(uuid.uuid4())[:8])
+def shutdown_logging() -> None:
+    """Stop the writer thread after flushing queued records."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-    # Store in request state for logging
-    request.state.request_id = request_id
 
-    # Log request
-    logger = logging.getLogger("app.request")
-    logger.info(
-        f"{request.method} {request.url.path}",
-        extra={"request_id": request_id},
-    )
+atexit.register(shutdown_logging)
 
-    # Call next middleware/endpoint
-    response = await call_next(request)
 
-    # Add request ID to response headers
-    response.headers["X-Request-ID"] = request_id
+class JSONFormatter(logging.Formatter):
+    """Custom JSON formatter for structured logging."""
 
-    # Log response
-    logger.info(
-        f"{request.method} {request.url.path} {response.status_code}",
-        extra={"request_id": request_id},
-    )
+    def format(self, record: logging.LogRecord) -> str:
+        """Format log record as single-line JSON."""
+        log_data = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                log_data[field] = value
+        if record.exc_info:
+            log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
+        return json.dumps(log_data)
 
-    return response
 
+def log_request(
+    method: str, path: str, request_id: str, status_code: int, duration_s: float
+) -> None:
+    """Log one line per request: always for errors, sampled for successes."""
+    if status_code < 400 and random.random() >= _success_sample_rate:
+        return
+    level = (
+        logging.ERROR if status_code >= 500
+        else logging.WARNING if status_code >= 400
+        else logging.INFO
+    )
+    logging.getLogger("app.request").log(
+        level,
+        f"{method} {path} {status_code}",
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "duration_ms": round(duration_s * 1000, 3),
+        },
+    )
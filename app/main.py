@@ -1,40 +1,127 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+import os
+import secrets
+import tempfile
+import time
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager, suppress
+from functools import partial
 from pathlib import Path
+from typing import Literal
 
-import joblib
 import numpy as np
-from fastapi import Body, FastAPI, HTTPException, Request, Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
-from pydantic import BaseModel
-from slowapi import Limiter
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
-
-from app.logging_config import add_request_id_middleware, configure_logging
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from prometheus_client import CONTENT_TYPE_LATEST
+from pydantic import BaseModel, ValidationError
+from starlette.requests import ClientDisconnect
+
+from app.admission import (
+    AdmissionController,
+    DeadlineExceeded,
+    check_deadline,
+    current_deadline,
+)
+from app.batching import MicroBatcher
+from app.binary import (
+    BINARY_MEDIA_TYPES,
+    JSON_MEDIA_TYPE,
+    decode_features,
+    encode_matrix,
+    is_binary,
+    negotiate,
+)
+from app.cache import PredictionCache
+from app.config import load_settings
+from app.engine import compile_model
+from app.executor import InferenceExecutor
+from app.jobs import JobManager, JobNotFound, JobQueueFull
+from app.logging_config import configure_logging
+from app.metrics import (
+    BATCH_STAGES,
+    JOB_STAGES,
+    PRED_BATCH_SIZE,
+    PRED_REQUESTS,
+    PREDICT_STAGES,
+    STREAM_STAGES,
+    PrometheusMiddleware,
+    StageTimers,
+    mark_worker_dead,
+    render_metrics,
+)
+from app.middleware import RequestMiddleware
+from app.profiling import Profiler, ProfilerBusy
+from app.ratelimit import MemoryBucketStore, RateLimiter, SQLiteBucketStore, charge_rows
+from app.registry import (
+    LoadedModel,
+    ModelRegistry,
+    artifact_version,
+    load_model,
+    read_model,
+    warm_up,
+)
+from app.schemas.admin_schema import (
+    ModelReloadRequest,
+    ModelReloadResponse,
+    ProfileRequest,
+    ProfileResponse,
+)
+from app.schemas.job_schema import JobInfo
 from app.schemas.predict_schema import (
+    FEATURE_NAMES,
+    TARGET_NAMES,
+    IrisBatchFeatures,
     IrisBatchRequest,
     IrisBatchResponse,
+    IrisColumnarBatchResponse,
+    IrisFeatures,
     IrisRequest,
     IrisResponse,
+    validate_feature_array,
 )
+from app.schemas.stats_schema import StatsResponse
+from app.serialization import Layout, encode_batch
+from app.shadow import ShadowScorer
+from app.stats import FeatureStats
+from app.streaming import NDJSON_MEDIA_TYPE, BodyStreamingResponse, stream_predictions
+
+settings = load_settings()
 
 # Configure logging before app initialization
-configure_logging()
+configure_logging(settings.log_level, settings.log_success_sample_rate)
 logger = logging.getLogger(__name__)
 
 APP_ROOT = Path(__file__).resolve().parent
 MODEL_PATH = APP_ROOT / "model" / "model.pkl"
 
-# Prometheus metrics
-PRED_REQUESTS = Counter(
-    "pred_requests_total",
-    "Total number of /predict requests",
-    ["endpoint"],
+# Rate limiter
+limiter = RateLimiter(
+    settings.rate_limits,
+    settings.api_key_rate_limits,
+    store=(
+        SQLiteBucketStore(settings.rate_limit_store_path)
+        if settings.rate_limit_store_path
+        else MemoryBucketStore()
+    ),
+    enabled=settings.rate_limit_enabled,
 )
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+admission = (
+    AdmissionController(
+        settings.admission_max_in_flight,
+        settings.admission_max_queue,
+        retry_after_s=settings.admission_retry_after_s,
+    )
+    if settings.admission_max_in_flight > 0
+    else None
+)
+
+profiler = Profiler()
+
+feature_stats = (
+    FeatureStats(FEATURE_NAMES, TARGET_NAMES) if settings.feature_stats_enabled else None
+)
 
 
 class ModelBundle(BaseModel):
@@ -43,21 +130,159 @@ class ModelBundle(BaseModel):
 
 
 sk_model = None
+# (source model, precision, model used for inference); rebuilt when either changes.
+_compiled: tuple[object, str, object] | None = None
+batcher: MicroBatcher | None = None
+registry: ModelRegistry | None = None
+jobs: JobManager | None = None
+shadow: ShadowScorer | None = None
+executor = InferenceExecutor("inline")
+cache: PredictionCache | None = None
 meta = ModelBundle.model_validate({
     "model_version": "iris-logreg-v1",
-    "target_names": ["setosa", "versicolor", "virginica"],
+    "target_names": list(TARGET_NAMES),
 })
 
+
+def _make_executor(model_path: Path | str, mmap_mode: str | None) -> InferenceExecutor:
+    return InferenceExecutor(
+        settings.inference_executor,
+        max_workers=settings.inference_workers,
+        initializer=_init_inference_worker,
+        initargs=(model_path, mmap_mode),
+    )
+
+
+def _set_active(loaded: LoadedModel) -> None:
+    """Make a warmed-up model the one new requests are scored with."""
+    global sk_model, _compiled, meta
+    # No awaits here, so requests never observe a half-swapped model.
+    sk_model = loaded.model
+    _compiled = (loaded.model, settings.inference_precision, loaded.inference_model)
+    meta = meta.model_copy(update={"model_version": loaded.version})
+
+
+async def _activate(loaded: LoadedModel) -> None:
+    """Swap in a new model; calls already running finish on the old one."""
+    global executor
+    retired = None
+    if executor.mode == "process":
+        # Pool workers hold their own copy of the model, so replace the pool,
+        # once each new worker has loaded and warmed up the model.
+        replacement = _make_executor(loaded.path, None)
+        try:
+            await replacement.warm_up(_warm_up_inference_worker)
+        except BaseException:
+            await asyncio.to_thread(replacement.shutdown)
+            raise
+        retired, executor = executor, replacement
+    _set_active(loaded)
+    if retired is not None:
+        await asyncio.to_thread(retired.shutdown)
+
+
+async def _start_shadow(path: str) -> ShadowScorer | None:
+    """Load and start the shadow model; None if it cannot be loaded."""
+    try:
+        candidate = await asyncio.to_thread(
+            load_model,
+            path,
+            artifact_version(path),
+            n_classes=len(meta.target_names),
+            precision=settings.inference_precision,
+            fused=settings.fused_engine,
+        )
+    except Exception as e:
+        # The candidate is optional: serve without it rather than not at all.
+        logger.error(f"Failed to load shadow model, shadowing disabled: {e}")
+        return None
+    scorer = ShadowScorer(candidate.inference_model, candidate.version, settings.shadow_max_queued)
+    scorer.start()
+    logger.info(f"Shadowing predictions with {candidate.version}")
+    return scorer
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global sk_model
+    global batcher, executor, cache, registry, jobs, shadow
+    model_path = settings.model_path or MODEL_PATH
+    # app.serve points workers at a shared copy to memory-map instead.
+    startup_path = settings.shared_model_path or model_path
+    mmap_mode = "r" if settings.shared_model_path else None
     try:
-        sk_model = joblib.load(MODEL_PATH)
+        _set_active(load_model(
+            startup_path,
+            settings.model_version,
+            n_classes=len(meta.target_names),
+            precision=settings.inference_precision,
+            fused=settings.fused_engine,
+            mmap_mode=mmap_mode,
+        ))
         logger.info("Model loaded successfully at startup")
     except Exception as e:
         logger.error(f"Failed to load model at startup: {e}")
         raise RuntimeError(f"Failed to load model at startup: {e}") from e
+    executor = _make_executor(startup_path, mmap_mode)
+    # Have every pool worker load the model now, not on the first requests.
+    await executor.warm_up(_warm_up_inference_worker)
+    logger.info(f"Inference executor: {settings.inference_executor}")
+    if settings.shadow_model_path:
+        shadow = await _start_shadow(settings.shadow_model_path)
+    registry = ModelRegistry(
+        _activate,
+        n_classes=len(meta.target_names),
+        precision=settings.inference_precision,
+        fused=settings.fused_engine,
+    )
+    watcher = None
+    if settings.model_watch_interval_s > 0:
+        watcher = asyncio.create_task(
+            registry.watch(model_path, settings.model_watch_interval_s)
+        )
+        logger.info(f"Watching {model_path} for model updates")
+    if settings.prediction_cache_size > 0:
+        cache = PredictionCache(
+            settings.prediction_cache_size,
+            ttl_s=settings.prediction_cache_ttl_s,
+            quantum=settings.prediction_cache_quantum,
+        )
+        logger.info(f"Prediction cache enabled ({settings.prediction_cache_size} entries)")
+    if settings.microbatch_enabled:
+        batcher = MicroBatcher(
+            partial(_score_matrix, stages=PREDICT_STAGES),
+            max_wait_s=settings.microbatch_max_wait_ms / 1000,
+            max_batch_size=settings.microbatch_max_size,
+        )
+        batcher.start()
+        logger.info("Micro-batching enabled for /predict")
+    jobs = JobManager(
+        settings.jobs_dir or Path(tempfile.gettempdir()) / "ml-api-jobs",
+        partial(_predict_proba, stages=JOB_STAGES),
+        lambda: meta.model_version,
+        workers=settings.jobs_workers,
+        max_queued=settings.jobs_max_queued,
+        chunk_size=settings.jobs_chunk_size,
+        ttl_s=settings.jobs_ttl_s,
+    )
+    jobs.start()
     yield
+    await jobs.stop()
+    jobs = None
+    if watcher is not None:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    registry = None
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    executor.shutdown()
+    executor = InferenceExecutor("inline")
+    cache = None
+    if shadow is not None:
+        await asyncio.to_thread(shadow.stop)
+        shadow = None
+    mark_worker_dead(os.getpid())
     logger.info("Shutting down application")
 
 
@@ -68,12 +293,17 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Add rate limiter middleware
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+# Request ids, logging, rate limits and admission control, in one ASGI layer
+app.add_middleware(
+    RequestMiddleware,
+    limiter=limiter,
+    admission=admission,
+    admission_paths=("/predict", "/predict-batch", "/predict-stream"),
+    profiler=profiler,
+)
 
-# Add request ID middleware
-app.middleware("http")(add_request_id_middleware)
+# Outermost, so latency and status cover every other layer
+app.add_middleware(PrometheusMiddleware)
 
 @app.get("/health")
 async def health():
@@ -82,67 +312,576 @@ async def health():
     return {"status": "ok", "model_version": meta.model_version}
 
 
+def require_admin(x_admin_token: str | None = Header(None)) -> None:  # noqa: B008
+    """Allow a request only if it carries the configured admin token."""
+    if settings.admin_token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post(
+    "/admin/model/reload",
+    response_model=ModelReloadResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def reload_model(payload: ModelReloadRequest | None = None):
+    """Load, warm up and atomically swap in a model artifact.
+
+    Requests keep being served by the current model while the new one loads;
+    calls already running when it is swapped in finish on the old model. If
+    loading or warm-up fails, the current model stays active.
+    """
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model registry not ready")
+    payload = payload or ModelReloadRequest()
+    path = payload.path or settings.model_path or str(MODEL_PATH)
+    previous = meta.model_version
+    try:
+        loaded = await registry.reload(path, payload.version)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Model load failed: {e}") from e
+    return ModelReloadResponse(
+        model_version=loaded.version, previous_version=previous, path=loaded.path
+    )
+
+
+@app.post(
+    "/debug/profile",
+    response_model=ProfileResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def profile(
+    payload: ProfileRequest | None = None,
+    format: Literal["json", "collapsed"] = Query(  # noqa: B008
+        "json", description="json, or collapsed stacks as plain text"
+    ),
+):
+    """Sample this worker's stacks (and optionally allocations) for a while.
+
+    Answers once ``seconds`` have passed or ``requests`` requests have
+    completed. ``format=collapsed`` returns only the collapsed stacks as text,
+    ready for ``flamegraph.pl``.
+    """
+    payload = payload or ProfileRequest()
+    try:
+        result = await profiler.profile(
+            payload.seconds,
+            max_requests=payload.requests,
+            interval_s=payload.interval_ms / 1000,
+            memory=payload.memory,
+            top=payload.top,
+            include_idle=payload.include_idle,
+        )
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="A profile is already running") from None
+    if format == "collapsed":
+        return Response(result["collapsed"], media_type="text/plain")
+    return result
+
+
+@app.get("/stats", response_model=StatsResponse)
+async def stats():
+    """Running statistics of the features and predicted classes this worker scored."""
+    if feature_stats is None:
+        raise HTTPException(status_code=404, detail="Feature statistics are disabled")
+    return feature_stats.snapshot()
+
+
 @app.get("/metrics")
 async def metrics():
     """Return Prometheus metrics in text format."""
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    if feature_stats is not None:
+        feature_stats.flush()
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
-def _predict_single(payload: IrisRequest) -> IrisResponse:
-    """Helper function to predict on a single sample."""
-    if sk_model is None:
-        raise HTTPException(status_code=503, detail="Model not ready")
-    try:
-        X = np.array(
+def _features_to_array(payloads: Sequence[IrisRequest | IrisFeatures]) -> np.ndarray:
+    """Stack request rows into a single (N, 4) feature matrix."""
+    return np.array(
+        [
             [
-                [
-                    payload.sepal_length,
-                    payload.sepal_width,
-                    payload.petal_length,
-                    payload.petal_width,
-                ]
-            ],
-            dtype=float,
-        )
-        proba = sk_model.predict_proba(X)[0]
-        idx = int(np.argmax(proba))
-        return IrisResponse(
-            predicted_class=meta.target_names[idx],
+                payload.sepal_length,
+                payload.sepal_width,
+                payload.petal_length,
+                payload.petal_width,
+            ]
+            for payload in payloads
+        ],
+        dtype=float,
+    ).reshape(-1, 4)
+
+
+def _responses_from_proba(proba: np.ndarray) -> list[IrisResponse]:
+    """Build one IrisResponse per row of a (N, n_classes) probability matrix."""
+    names = meta.target_names
+    indices = proba.argmax(axis=1)
+    confidences = proba[np.arange(len(indices)), indices]
+    # Values come straight from the model, so skip re-validating every row.
+    return [
+        IrisResponse.model_construct(
+            predicted_class=names[idx],
             class_index=idx,
-            confidence=float(proba[idx]),
-            probabilities={
-                name: float(p)
-                for name, p in zip(meta.target_names, proba, strict=True)
-            },
+            confidence=conf,
+            probabilities=dict(zip(names, row, strict=True)),
+        )
+        for idx, conf, row in zip(
+            indices.tolist(), confidences.tolist(), proba.tolist(), strict=True
         )
+    ]
+
+
+def _inference_model():
+    """Return the fused form of sk_model when enabled and supported."""
+    global _compiled
+    model = sk_model
+    if not settings.fused_engine:
+        return model
+    precision = settings.inference_precision
+    if _compiled is None or _compiled[0] is not model or _compiled[1] != precision:
+        _compiled = (model, precision, compile_model(model, precision))
+    return _compiled[2]
+
+
+def _init_inference_worker(model_path: Path | str, mmap_mode: str | None = None) -> None:
+    """Load the model once in each process-pool worker."""
+    global sk_model, _compiled
+    sk_model, inference_model = read_model(
+        model_path, settings.inference_precision, settings.fused_engine, mmap_mode
+    )
+    _compiled = (sk_model, settings.inference_precision, inference_model)
+
+
+def _warm_up_inference_worker() -> None:
+    """Run warm-up inferences on a process-pool worker's model."""
+    warm_up(_inference_model(), len(meta.target_names))
+
+
+def _model_predict_proba(X: np.ndarray) -> np.ndarray:
+    """Score a feature matrix; this is the unit of work run on the executor."""
+    return _inference_model().predict_proba(X)
+
+
+async def _run_model(X: np.ndarray, stages: StageTimers) -> np.ndarray:
+    start = time.perf_counter()
+    # Also enforced while waiting for an executor slot, which may take long.
+    deadline = current_deadline.get()
+    try:
+        if executor.mode == "process":
+            # Workers score with their own copy, replaced with the pool on a swap.
+            return await executor.run(_model_predict_proba, X, deadline=deadline)
+        # Bind the model now so a swap mid-call cannot change it under us.
+        return await executor.run(_inference_model().predict_proba, X, deadline=deadline)
+    finally:
+        stages.predict.observe(time.perf_counter() - start)
+
+
+async def _predict_proba(X: np.ndarray, stages: StageTimers) -> np.ndarray:
+    """Run the loaded model on a feature matrix, via the cache when enabled.
+
+    Model time is recorded in ``stages``, the endpoint's stage timers. The
+    scored matrix is folded into the running feature statistics and, with a
+    shadow model configured, queued for it.
+    """
+    if sk_model is None:
+        raise HTTPException(status_code=503, detail="Model not ready")
+    check_deadline("predict")
+    try:
+        if cache is not None:
+            proba = await cache.get_or_compute(
+                X, sk_model, meta.model_version, partial(_run_model, stages=stages)
+            )
+        else:
+            proba = await _run_model(X, stages)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Inference error: {e}") from e
+    if feature_stats is not None:
+        feature_stats.update(X, proba)
+    if shadow is not None:
+        shadow.submit(X, proba)
+    return proba
 
 
-@app.post("/predict", response_model=IrisResponse)
-@limiter.limit("10/minute")
-async def predict(
-    request: Request, payload: IrisRequest = Body(...)  # noqa: B008
-):
-    """Predict Iris class for a single sample."""
+async def _score_matrix(X: np.ndarray, stages: StageTimers) -> list[IrisResponse]:
+    """Score a feature matrix into one IrisResponse per row."""
+    return _responses_from_proba(await _predict_proba(X, stages))
+
+
+async def _predict_single(payload: IrisRequest) -> IrisResponse:
+    """Helper function to predict on a single sample."""
+    return (await _score_matrix(_features_to_array([payload]), PREDICT_STAGES))[0]
+
+
+async def _predict_matrix(X: np.ndarray, stages: StageTimers) -> np.ndarray:
+    """Score a feature matrix with a single vectorized model call.
+
+    If the vectorized call fails, rows are re-scored one at a time so the
+    error reported is the one from the first offending row, as it would be
+    when scoring item by item.
+    """
+    try:
+        return await _predict_proba(X, stages)
+    except HTTPException as e:
+        if e.status_code != 400:
+            raise
+        for row in X:
+            await _predict_proba(row[np.newaxis, :], stages)
+        raise
+
+
+async def _predict_many(payloads: list[IrisRequest]) -> list[IrisResponse]:
+    """Predict on many samples with a single vectorized model call."""
+    return _responses_from_proba(
+        await _predict_matrix(_features_to_array(payloads), BATCH_STAGES)
+    )
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Read the request body, answering 413 as soon as it exceeds ``max_bytes``."""
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"JSON body exceeds {max_bytes} bytes; send a binary feature matrix instead",
+    )
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _read_batch(
+    request: Request, stages: StageTimers, max_json_bytes: int | None = None
+) -> np.ndarray:
+    """Parse a /predict-batch body (JSON or binary) into a validated feature matrix.
+
+    Items are parsed for type only and then range-checked together on the
+    stacked array, rather than through one ``IrisRequest`` validator per item.
+    JSON parsing holds every item in memory, so ``max_json_bytes`` can bound
+    JSON bodies separately.
+    """
+    content_type = request.headers.get("content-type")
+    if max_json_bytes is not None and not is_binary(content_type):
+        body = await _read_body(request, max_json_bytes)
+    else:
+        body = await request.body()
+    start = time.perf_counter()
+    if is_binary(content_type):
+        X = decode_features(body, content_type)
+        errors = validate_feature_array(X)
+        stages.parse.observe(time.perf_counter() - start)
+        if errors:
+            raise RequestValidationError(errors)
+        return X
+    try:
+        batch = IrisBatchFeatures.model_validate_json(body)
+    except ValidationError:
+        # Malformed input: re-validate with the full schema so clients get
+        # the complete error list in the usual per-item form.
+        _raise_body_errors(IrisBatchRequest, body)
+        raise
+    parsed = time.perf_counter()
+    X = _features_to_array(batch.items)
+    built = time.perf_counter()
+    errors = validate_feature_array(X, loc=("body", "items"))
+    stages.build.observe(built - parsed)
+    stages.parse.observe(parsed - start + time.perf_counter() - built)
+    if errors:
+        raise RequestValidationError(errors)
+    return X
+
+
+def _raise_body_errors(model: type[BaseModel], body: bytes) -> None:
+    """Validate body against model, raising FastAPI's 422 error on failure."""
+    try:
+        model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [
+                {**error, "loc": ["body", *error["loc"]]}
+                for error in e.errors(include_url=False)
+            ]
+        ) from e
+
+
+_BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": IrisBatchRequest.model_json_schema()},
+            **{
+                media_type: {"schema": {"type": "string", "format": "binary"}}
+                for media_type in BINARY_MEDIA_TYPES
+            },
+        },
+    }
+}
+
+
+async def _read_single(request: Request) -> np.ndarray:
+    """Parse a /predict body into a validated (1, 4) feature matrix."""
+    body = await request.body()
+    start = time.perf_counter()
+    try:
+        payload = IrisRequest.model_validate_json(body)
+    except ValidationError:
+        _raise_body_errors(IrisRequest, body)
+        raise
+    parsed = time.perf_counter()
+    X = _features_to_array([payload])
+    PREDICT_STAGES.parse.observe(parsed - start)
+    PREDICT_STAGES.build.observe(time.perf_counter() - parsed)
+    return X
+
+
+@app.post(
+    "/predict",
+    response_model=IrisResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {JSON_MEDIA_TYPE: {"schema": IrisRequest.model_json_schema()}},
+        }
+    },
+)
+async def predict(request: Request):
+    """Predict Iris class for a single sample.
+
+    The body is parsed and the response serialized here rather than by
+    FastAPI, so that both show up in the per-stage timings.
+    """
+    X = await _read_single(request)
     PRED_REQUESTS.labels(endpoint="predict").inc()
-    return _predict_single(payload)
+    if batcher is not None:
+        result = await batcher.submit(X[0], deadline=current_deadline.get())
+    else:
+        result = _responses_from_proba(await _predict_proba(X, PREDICT_STAGES))[0]
+    start = time.perf_counter()
+    content = result.model_dump_json()
+    PREDICT_STAGES.serialize.observe(time.perf_counter() - start)
+    return Response(content, media_type=JSON_MEDIA_TYPE)
 
 
-@app.post("/predict-batch", response_model=IrisBatchResponse)
-@limiter.limit("10/minute")
+@app.post(
+    "/predict-batch",
+    response_model=IrisBatchResponse | IrisColumnarBatchResponse,
+    openapi_extra=_BATCH_REQUEST_BODY,
+    responses={200: {"content": {media: {} for media in BINARY_MEDIA_TYPES}}},
+)
 async def predict_batch(
-    request: Request, batch: IrisBatchRequest = Body(...)  # noqa: B008
+    request: Request,
+    layout: Layout = Query(  # noqa: B008
+        "rows", description="`rows` (one object per item) or `columnar` (one array per field)"
+    ),
+    top_k: int | None = Query(  # noqa: B008
+        None, ge=0, description="Only return the k most likely class probabilities (0 for none)"
+    ),
 ):
-    """Predict Iris class for multiple samples in batch."""
-    payloads = batch.items
-    if not payloads:
+    """Predict Iris class for multiple samples in batch.
+
+    Accepts ``{"items": [...]}`` JSON or a binary (N, 4) feature matrix (see
+    ``app.binary``). Send ``Accept: application/octet-stream`` or
+    ``application/x-npy`` to receive the (N, n_classes) probability matrix in
+    binary form, with class names in the ``X-Class-Names`` header.
+    """
+    X = await _read_batch(request, BATCH_STAGES)
+    if len(X) == 0:
         raise HTTPException(status_code=400, detail="Empty list not allowed")
-    if len(payloads) > 1000:
+    if len(X) > 1000:
         raise HTTPException(
             status_code=400, detail="Batch size exceeds maximum of 1000"
         )
+    if (refused := charge_rows(request.scope, len(X))) is not None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: {len(X)} rows requested, limit {refused.limit}",
+        )
 
     PRED_REQUESTS.labels(endpoint="predict-batch").inc()
-    results = [_predict_single(payload) for payload in payloads]
-    return IrisBatchResponse(items=results, count=len(results))
+    PRED_BATCH_SIZE.labels(endpoint="predict-batch").observe(len(X))
+    proba = await _predict_matrix(X, BATCH_STAGES)
+    start = time.perf_counter()
+    media_type = negotiate(
+        request.headers.get("accept"), (JSON_MEDIA_TYPE, *BINARY_MEDIA_TYPES)
+    )
+    if media_type != JSON_MEDIA_TYPE:
+        content, media_type = encode_matrix(proba, media_type, X.dtype)
+        BATCH_STAGES.serialize.observe(time.perf_counter() - start)
+        return Response(
+            content,
+            media_type=media_type,
+            headers={
+                "X-Class-Names": ",".join(meta.target_names),
+                "X-Model-Version": meta.model_version,
+            },
+        )
+    response = encode_batch(proba, meta.target_names, layout, top_k)
+    BATCH_STAGES.serialize.observe(time.perf_counter() - start)
+    return response
+
+
+async def _score_stream_chunk(request: Request, X: np.ndarray) -> list[IrisResponse]:
+    PRED_BATCH_SIZE.labels(endpoint="predict-stream").observe(len(X))
+    # Headers are already sent, so rows beyond the limit put the bucket in debt.
+    charge_rows(request.scope, len(X), allow_debt=True)
+    return await _score_matrix(X, STREAM_STAGES)
+
+
+async def _request_chunks(request: Request) -> AsyncIterator[bytes]:
+    """Yield request body chunks, ending quietly if the client goes away."""
+    try:
+        async for chunk in request.stream():
+            yield chunk
+    except ClientDisconnect:
+        logger.info("Client disconnected during /predict-stream upload")
+
+
+@app.post(
+    "/predict-stream",
+    response_class=BodyStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+        }
+    },
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def predict_stream(request: Request):
+    """Predict Iris class for newline-delimited JSON rows of any count.
+
+    Rows are read incrementally and scored in chunks of
+    ``settings.stream_chunk_size``; one result line is streamed back per input
+    line, in order, as soon as its chunk is scored. Invalid rows yield
+    ``{"line": n, "detail": ...}`` instead of failing the whole stream.
+    """
+    if sk_model is None:
+        raise HTTPException(status_code=503, detail="Model not ready")
+    # X-Deadline-Ms only bounds the wait for admission: once rows stream back,
+    # failing later chunks would just truncate the response.
+    current_deadline.set(None)
+    PRED_REQUESTS.labels(endpoint="predict-stream").inc()
+    return BodyStreamingResponse(
+        stream_predictions(
+            _request_chunks(request),
+            partial(_score_stream_chunk, request),
+            settings.stream_chunk_size,
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+def _job_manager() -> JobManager:
+    if jobs is None:
+        raise HTTPException(status_code=503, detail="Job service not ready")
+    return jobs
+
+
+def _job_info(manager: JobManager, job_id: str) -> JobInfo:
+    try:
+        return manager.info(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found") from None
+
+
+@app.post(
+    "/jobs",
+    status_code=202,
+    response_model=JobInfo,
+    openapi_extra=_BATCH_REQUEST_BODY,
+)
+async def submit_job(request: Request):
+    """Queue a large scoring job and return its id at once.
+
+    Takes the same JSON or binary bodies as ``/predict-batch`` but up to
+    ``settings.jobs_max_rows`` rows; JSON bodies are limited to
+    ``settings.jobs_max_json_bytes``, as they are parsed in memory. Poll ``GET /jobs/{job_id}`` for progress
+    and page through ``GET /jobs/{job_id}/results`` once it has succeeded.
+    """
+    manager = _job_manager()
+    if sk_model is None:
+        raise HTTPException(status_code=503, detail="Model not ready")
+    X = await _read_batch(request, JOB_STAGES, max_json_bytes=settings.jobs_max_json_bytes)
+    if len(X) == 0:
+        raise HTTPException(status_code=400, detail="Empty list not allowed")
+    if len(X) > settings.jobs_max_rows:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Job size exceeds maximum of {settings.jobs_max_rows} rows",
+        )
+    if (refused := charge_rows(request.scope, len(X))) is not None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: {len(X)} rows requested, limit {refused.limit}",
+        )
+    try:
+        info = await manager.submit(X)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is full, retry later",
+            headers={"Retry-After": str(settings.admission_retry_after_s)},
+        ) from None
+    PRED_REQUESTS.labels(endpoint="jobs").inc()
+    return info
+
+
+@app.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str):
+    """Report a job's status and progress (``rows_done`` of ``rows``)."""
+    return _job_info(_job_manager(), job_id)
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0, description="First row of the page"),  # noqa: B008
+    limit: int = Query(1000, ge=1, le=10_000, description="Rows per page"),  # noqa: B008
+    layout: Layout = Query(  # noqa: B008
+        "rows", description="`rows` (one object per item) or `columnar` (one array per field)"
+    ),
+    top_k: int | None = Query(  # noqa: B008
+        None, ge=0, description="Only return the k most likely class probabilities (0 for none)"
+    ),
+):
+    """Return one page of a succeeded job's results, in input row order.
+
+    The body is a ``/predict-batch`` response for rows ``offset`` to
+    ``offset + count`` plus ``job_id``, ``offset``, ``total`` and
+    ``next_offset`` (null on the last page).
+    """
+    manager = _job_manager()
+    info = _job_info(manager, job_id)
+    if info.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {info.status}")
+    proba = await asyncio.to_thread(manager.results, job_id, offset, limit)
+    end = offset + len(proba)
+    return encode_batch(
+        proba,
+        meta.target_names,
+        layout,
+        top_k,
+        extra={
+            "job_id": job_id,
+            "offset": offset,
+            "total": info.rows,
+            "next_offset": end if end < info.rows else None,
+        },
+    )
+
+
+@app.delete("/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str):
+    """Delete a finished job and its results."""
+    manager = _job_manager()
+    info = _job_info(manager, job_id)
+    if info.status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is {info.status}")
+    manager.delete(job_id)
+    return Response(status_code=204)
@@ -0,0 +1,388 @@
+"""Prometheus metrics shared across the service."""
+import os
+import time
+from typing import NamedTuple
+
+import numpy as np
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import load_settings
+
+LATENCY_BUCKETS = load_settings().latency_buckets
+
+# Set by app.serve for multi-worker runs: each worker writes its samples to
+# files in this directory and /metrics aggregates them across workers.
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def render_metrics() -> bytes:
+    """Render metrics in text format, aggregated across workers if multi-process."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a stopped worker's live gauge samples in multi-process mode."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
+
+
+def observe_many(histogram: Histogram, values: np.ndarray) -> None:
+    """Record every value in ``values``, as ``histogram.observe`` would one by one.
+
+    Takes one increment per bucket instead of one per value. ``histogram``
+    must have no labels, or be a labelled child.
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    counts = np.bincount(
+        np.searchsorted(histogram._upper_bounds, values, side="left"),
+        minlength=len(histogram._buckets),
+    )
+    observe_bucket_counts(histogram, counts, float(values.sum()))
+
+
+def observe_bucket_counts(histogram: Histogram, counts: np.ndarray, total: float) -> None:
+    """Add values already counted per bucket, and their ``total``, to a histogram.
+
+    ``counts[i]`` is the number of values ``v`` with
+    ``bounds[i - 1] < v <= bounds[i]``, the last bound being +Inf. Relies on
+    the bucket and sum values prometheus_client keeps on each histogram, which
+    are private: app/requirements.txt pins the versions tests/test_metrics.py
+    checks this against ``observe``.
+    """
+    histogram._raise_if_not_observable()
+    histogram._sum.inc(total)
+    buckets = histogram._buckets
+    for i in np.flatnonzero(counts).tolist():
+        buckets[i].inc(int(counts[i]))
+
+
+PRED_REQUESTS = Counter(
+    "pred_requests_total",
+    "Total number of /predict requests",
+    ["endpoint"],
+)
+
+MICROBATCH_QUEUE_DEPTH = Gauge(
+    "microbatch_queue_depth",
+    "Number of /predict rows waiting to be coalesced into a micro-batch",
+    multiprocess_mode="livesum",
+)
+
+MICROBATCH_SIZE = Histogram(
+    "microbatch_size",
+    "Number of rows scored per formed micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+INFERENCE_EXECUTOR_CAPACITY = Gauge(
+    "inference_executor_capacity",
+    "Maximum number of inference calls the executor runs concurrently",
+    multiprocess_mode="livesum",
+)
+
+INFERENCE_EXECUTOR_ACTIVE = Gauge(
+    "inference_executor_active",
+    "Number of inference calls currently running on the executor",
+    multiprocess_mode="livesum",
+)
+
+INFERENCE_EXECUTOR_WAITING = Gauge(
+    "inference_executor_waiting",
+    "Number of inference calls waiting for a free executor slot",
+    multiprocess_mode="livesum",
+)
+
+INFERENCE_EXECUTOR_WAIT_SECONDS = Histogram(
+    "inference_executor_wait_seconds",
+    "Time inference calls spent waiting for a free executor slot",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+PRED_CACHE_HITS = Counter(
+    "pred_cache_hits_total",
+    "Distinct feature vectors answered from the prediction cache",
+)
+
+PRED_CACHE_MISSES = Counter(
+    "pred_cache_misses_total",
+    "Distinct feature vectors that had to be scored by the model",
+)
+
+PRED_CACHE_EVICTIONS = Counter(
+    "pred_cache_evictions_total",
+    "Prediction cache entries dropped for size, expiry or a model change",
+    ["reason"],
+)
+
+PRED_CACHE_DEDUPLICATED_ROWS = Counter(
+    "pred_cache_deduplicated_rows_total",
+    "Rows within a request that repeated an earlier row and were not scored again",
+)
+
+PRED_CACHE_SIZE = Gauge(
+    "pred_cache_size",
+    "Number of entries currently held in the prediction cache",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Admitted requests currently being processed",
+    multiprocess_mode="livesum",
+)
+
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Requests waiting for an admission slot",
+    multiprocess_mode="livesum",
+)
+
+REQUESTS_SHED = Counter(
+    "requests_shed_total",
+    "Requests rejected with 503 because the admission queue was full",
+    ["endpoint"],
+)
+
+DEADLINE_EXPIRED = Counter(
+    "requests_deadline_expired_total",
+    "Requests dropped because their X-Deadline-Ms passed, by where they were",
+    ["stage"],
+)
+
+RATE_LIMIT_STORE_BUSY = Counter(
+    "rate_limit_store_busy_total",
+    "Rate-limit checks let through because the shared bucket store stayed locked",
+)
+
+MODEL_RELOADS = Counter(
+    "model_reloads_total",
+    "Model hot-swap attempts by outcome",
+    ["result"],
+)
+
+MODEL_WARMUP_SECONDS = Histogram(
+    "model_warmup_seconds",
+    "Time to load, compile and warm up a model before it is activated",
+)
+
+JOBS = Counter(
+    "jobs_total",
+    "Asynchronous scoring jobs by event: submitted, succeeded or failed",
+    ["status"],
+)
+
+JOBS_QUEUED = Gauge(
+    "jobs_queued",
+    "Jobs waiting for a job worker",
+    multiprocess_mode="livesum",
+)
+
+JOBS_RUNNING = Gauge(
+    "jobs_running",
+    "Jobs being scored",
+    multiprocess_mode="livesum",
+)
+
+JOB_ROWS_PENDING = Gauge(
+    "job_rows_pending",
+    "Rows of queued and running jobs not scored yet",
+    multiprocess_mode="livesum",
+)
+
+JOB_ROWS_SCORED = Counter(
+    "job_rows_scored_total",
+    "Rows scored by jobs; its rate is the job throughput in rows/s",
+)
+
+JOB_THROUGHPUT = Histogram(
+    "job_throughput_rows_per_second",
+    "Rows per second of each succeeded job, from start to finish",
+    buckets=(1e3, 3e3, 1e4, 3e4, 1e5, 3e5, 1e6, 3e6, 1e7),
+)
+
+SHADOW_ROWS = Counter(
+    "shadow_rows_total",
+    "Rows scored by the shadow model, by whether its class agreed with the primary",
+    ["outcome"],
+)
+
+SHADOW_DROPPED_ROWS = Counter(
+    "shadow_dropped_rows_total",
+    "Rows not shadow-scored because the shadow queue was full",
+)
+
+SHADOW_ERRORS = Counter(
+    "shadow_errors_total",
+    "Batches the shadow model failed to score",
+)
+
+SHADOW_QUEUE_DEPTH = Gauge(
+    "shadow_queue_depth",
+    "Batches waiting to be scored by the shadow model",
+    multiprocess_mode="livesum",
+)
+
+SHADOW_PROBA_DELTA = Histogram(
+    "shadow_probability_delta",
+    "Per row, the largest absolute difference between shadow and primary probabilities",
+    buckets=(0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0),
+)
+
+SHADOW_LATENCY = Histogram(
+    "shadow_predict_duration_seconds",
+    "Time the shadow model took to score each batch",
+    buckets=LATENCY_BUCKETS,
+)
+
+# Upper bounds of the per-feature value histograms: 0.5 cm steps up to the
+# 10 cm that accepted lengths and widths may reach.
+FEATURE_BUCKET_WIDTH = 0.5
+FEATURE_BUCKETS = tuple(FEATURE_BUCKET_WIDTH * i for i in range(1, 21))
+
+FEATURE_VALUE = Histogram(
+    "feature_value",
+    "Distribution of scored feature values, in cm",
+    ["feature"],
+    buckets=FEATURE_BUCKETS,
+)
+
+FEATURE_VALUE_SQUARES = Counter(
+    "feature_value_squares",
+    "Sum of squared scored feature values; with feature_value_sum/_count gives the variance",
+    ["feature"],
+)
+
+FEATURE_MIN = Gauge(
+    "feature_value_min",
+    "Smallest scored value of each feature",
+    ["feature"],
+    multiprocess_mode="livemin",
+)
+
+FEATURE_MAX = Gauge(
+    "feature_value_max",
+    "Largest scored value of each feature",
+    ["feature"],
+    multiprocess_mode="livemax",
+)
+
+PREDICTED_CLASS = Counter(
+    "predicted_class",
+    "Scored rows by predicted class",
+    ["predicted_class"],
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "End-to-end request latency, until the last response byte is sent",
+    ["endpoint", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+
+REQUEST_ERRORS = Counter(
+    "http_request_errors_total",
+    "Responses with a 4xx/5xx status, including unhandled exceptions as 500",
+    ["endpoint", "status"],
+)
+
+PRED_STAGE_LATENCY = Histogram(
+    "pred_stage_duration_seconds",
+    "Time spent in each stage of the prediction hot path, per endpoint",
+    ["endpoint", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+class StageTimers(NamedTuple):
+    """The ``pred_stage_duration_seconds`` children of one endpoint."""
+
+    parse: Histogram
+    build: Histogram
+    predict: Histogram
+    serialize: Histogram
+
+    @classmethod
+    def bind(cls, endpoint: str) -> "StageTimers":
+        return cls(*(
+            PRED_STAGE_LATENCY.labels(endpoint=endpoint, stage=stage) for stage in cls._fields
+        ))
+
+
+# Bound children so the hot path skips the labels() lookup.
+PREDICT_STAGES = StageTimers.bind("predict")
+BATCH_STAGES = StageTimers.bind("predict-batch")
+STREAM_STAGES = StageTimers.bind("predict-stream")
+JOB_STAGES = StageTimers.bind("jobs")
+
+PRED_BATCH_SIZE = Histogram(
+    "pred_batch_size",
+    "Rows per /predict-batch request or /predict-stream chunk",
+    ["endpoint"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording latency, in-flight requests and error statuses.
+
+    Requests are labelled by path when it is one of the app's routes and as
+    ``other`` otherwise, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._paths: frozenset[str] | None = None
+
+    def _endpoint(self, scope: Scope) -> str:
+        if self._paths is None:
+            self._paths = frozenset(
+                getattr(route, "path", "") for route in scope["app"].routes
+            )
+        path = scope["path"]
+        return path if path in self._paths else "other"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(endpoint=endpoint)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(endpoint=endpoint, method=scope["method"]).observe(
+                time.perf_counter() - start
+            )
+            in_progress.dec()
+            if status >= 400:
+                REQUEST_ERRORS.labels(endpoint=endpoint, status=str(status)).inc()
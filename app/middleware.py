@@ -0,0 +1,131 @@
+"""Single pure-ASGI middleware for request ids, logging, rate limits and admission."""
+import time
+import uuid
+from collections.abc import Collection
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.admission import (
+    DEADLINE_HEADER,
+    AdmissionController,
+    current_deadline,
+    parse_deadline,
+)
+from app.logging_config import log_request
+from app.profiling import Profiler
+from app.ratelimit import RateLimiter
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class RequestMiddleware:
+    """Tag, rate-limit and log each HTTP request in one layer.
+
+    - Reads ``X-Request-ID`` (or generates a short id), stores it in
+      ``request.state.request_id`` and echoes it on the response.
+    - Takes one token from the caller's bucket for rate-limited paths,
+      answering 429 without calling the app when it is empty. Endpoints
+      charge the remaining rows with ``app.ratelimit.charge_rows``; the
+      latest decision is reported in ``RateLimit-*`` headers.
+    - Reads the optional ``X-Deadline-Ms`` into ``app.admission.current_deadline``
+      and, for ``admission_paths``, waits for an admission slot, answering
+      503 if the queue is full or 504 if the deadline passes first.
+    - Logs one line per request with its status and duration, and counts it
+      towards the running ``profiler`` session, if any.
+
+    Unlike ``BaseHTTPMiddleware`` it never wraps the response body in a
+    stream or runs the app in a separate task: it only edits the headers of
+    the ``http.response.start`` message on its way out.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        admission: AdmissionController | None = None,
+        admission_paths: Collection[str] = (),
+        profiler: Profiler | None = None,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.admission = admission
+        self.admission_paths = frozenset(admission_paths)
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        raw_id = next(
+            (value for name, value in scope["headers"] if name == REQUEST_ID_HEADER), None
+        )
+        if raw_id is None:
+            raw_id = uuid.uuid4().hex[:8].encode()
+        request_id = raw_id.decode("latin-1")
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [*message.get("headers", ()), (REQUEST_ID_HEADER, raw_id)]
+                if (decision := state.get("rate_limit")) is not None:
+                    headers.extend(decision.headers())
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self._admit_and_call(scope, receive, send_wrapper)
+        except HTTPException as e:
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers=e.headers
+            )
+            await response(scope, receive, send_wrapper)
+        finally:
+            log_request(
+                scope["method"],
+                scope["path"],
+                request_id,
+                status,
+                time.perf_counter() - start,
+            )
+            if self.profiler is not None and self.profiler.session is not None:
+                self.profiler.session.request_done()
+
+    async def _admit_and_call(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Apply rate limits, deadline and admission, then call the app.
+
+        Rejections are raised as HTTPException for ``__call__`` to render.
+        """
+        state = scope["state"]
+        decision = self.limiter.take(scope, 1)
+        if decision is not None:
+            state.update(rate_limiter=self.limiter, rate_limit=decision, rate_limit_prepaid=1)
+            if not decision.allowed:
+                raise HTTPException(429, f"Rate limit exceeded: {decision.limit}")
+
+        raw_deadline = next(
+            (value for name, value in scope["headers"] if name == DEADLINE_HEADER), None
+        )
+        try:
+            deadline = parse_deadline(raw_deadline, time.monotonic())
+        except ValueError:
+            raise HTTPException(400, "X-Deadline-Ms must be a non-negative number") from None
+
+        admitted = False
+        if self.admission is not None and scope["path"] in self.admission_paths:
+            await self.admission.acquire(scope["path"], deadline)
+            admitted = True
+        token = current_deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_deadline.reset(token)
+            if admitted:
+                self.admission.release()
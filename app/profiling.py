@@ -0,0 +1,178 @@
+"""On-demand CPU sampling and allocation tracing for a live worker.
+
+Nothing is installed until a session starts, so a worker that is not being
+profiled pays nothing beyond one ``None`` check per request. While a session
+runs:
+
+- a daemon thread wakes every ``interval_s``, reads the current stack of
+  every other thread from ``sys._current_frames()`` and counts each stack in
+  collapsed form (``thread;module:func;module:func``), the input format of
+  ``flamegraph.pl`` and speedscope;
+- ``tracemalloc`` optionally records where memory still live at the end of
+  the session was allocated. It slows every allocation down while it is on,
+  so leave it off when only CPU time matters.
+
+A session ends after ``seconds`` or once ``max_requests`` requests have
+completed, whichever comes first. Only the worker process that serves the
+profiling request is profiled.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import suppress
+from types import CodeType, FrameType
+
+# Leaf frames of threads waiting for work. Their stacks are dropped unless
+# idle time is asked for, so the flamegraph shows where busy time goes.
+IDLE_FRAMES = frozenset({
+    "selectors:EpollSelector.select",
+    "selectors:KqueueSelector.select",
+    "selectors:PollSelector.select",
+    "selectors:SelectSelector.select",
+    "threading:Condition.wait",
+    "threading:Event.wait",
+    "concurrent.futures.thread:_worker",
+    "logging.handlers:QueueListener.dequeue",
+    "queue:Queue.get",
+})
+
+
+class ProfilerBusy(Exception):
+    """A profiling session is already running."""
+
+
+class ProfileSession:
+    """Samples collected by one profiling session."""
+
+    def __init__(self, interval_s: float, max_requests: int | None, include_idle: bool):
+        self.interval_s = interval_s
+        self.max_requests = max_requests
+        self.include_idle = include_idle
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.requests = 0
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._done = asyncio.Event()
+
+    def request_done(self) -> None:
+        """Count a finished request; called on the event loop."""
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self._done.set()
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+            self._labels[code] = label
+        return label
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            # ";" separates frames in collapsed stacks.
+            names = {t.ident: t.name.replace(";", ",") for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame))
+                    frame = frame.f_back
+                if not self.include_idle and stack[0] in IDLE_FRAMES:
+                    continue
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One ``stack count`` line per distinct stack, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _site(filename: str) -> str:
+    """Shorten a file path to its path relative to the sys.path entry holding it."""
+    roots = [p for p in sys.path if p and filename.startswith(p.rstrip(os.sep) + os.sep)]
+    return os.path.relpath(filename, max(roots, key=len)) if roots else filename
+
+
+def _allocations(snapshot: tracemalloc.Snapshot, top: int) -> list[dict]:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    return [
+        {
+            "site": f"{_site(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+
+class Profiler:
+    """Runs at most one profiling session at a time in this process."""
+
+    def __init__(self):
+        # Checked by RequestMiddleware after every request.
+        self.session: ProfileSession | None = None
+
+    async def profile(
+        self,
+        seconds: float,
+        max_requests: int | None = None,
+        interval_s: float = 0.005,
+        memory: bool = False,
+        top: int = 25,
+        include_idle: bool = False,
+    ) -> dict:
+        """Profile this process until ``seconds`` pass or ``max_requests`` finish.
+
+        Returns the collapsed stacks and, with ``memory``, the ``top``
+        allocation sites of memory still live at the end. Raises
+        ProfilerBusy if another session is running.
+        """
+        if self.session is not None:
+            raise ProfilerBusy()
+        session = ProfileSession(interval_s, max_requests, include_idle)
+        # tracemalloc may already be on (PYTHONTRACEMALLOC); leave it on then.
+        start_tracing = memory and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        if memory:
+            tracemalloc.reset_peak()
+        sampler = threading.Thread(target=session._sample, name="ml-api-profiler", daemon=True)
+        self.session = session
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(session._done.wait(), seconds)
+        finally:
+            self.session = None
+            session._stop.set()
+            sampler.join()
+            elapsed = time.perf_counter() - start
+            snapshot = traced = None
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+                traced = tracemalloc.get_traced_memory()
+            if start_tracing:
+                tracemalloc.stop()
+        return {
+            "seconds": elapsed,
+            "requests": session.requests,
+            "samples": session.samples,
+            "interval_ms": interval_s * 1000,
+            "collapsed": session.collapsed(),
+            "allocations": _allocations(snapshot, top) if snapshot is not None else None,
+            "traced_current_bytes": traced[0] if traced is not None else None,
+            "traced_peak_bytes": traced[1] if traced is not None else None,
+        }
@@ -0,0 +1,292 @@
+"""Row-weighted token-bucket rate limiting, shareable between worker processes.
+
+Each (endpoint, client) pair owns a bucket holding up to ``capacity`` tokens
+that refills continuously at ``capacity / period``. A request takes one token
+per row it scores, so a 1000-row batch costs 1000 single predictions. Clients
+are identified by a configured API key (``X-API-Key``) or else by address;
+unknown keys fall back to the address so they cannot mint fresh buckets.
+
+Buckets live in a :class:`MemoryBucketStore` for a single process, or in a
+:class:`SQLiteBucketStore` on shared memory so that local workers draw from
+the same buckets instead of each enforcing the full limit. Takes run on the
+event loop, so a store that cannot get its lock within a few milliseconds
+fails open: the request is let through rather than stalling the loop.
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import closing
+from typing import NamedTuple, Protocol
+
+from starlette.exceptions import HTTPException
+from starlette.types import Scope
+
+from app.metrics import RATE_LIMIT_STORE_BUSY
+
+API_KEY_HEADER = b"x-api-key"
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+
+class Limit(NamedTuple):
+    """A bucket of ``capacity`` tokens refilled over ``period`` seconds."""
+
+    capacity: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse ``"<tokens>/<second|minute|hour|day>"``, e.g. ``"1000/minute"``."""
+        amount, _, unit = value.partition("/")
+        unit = unit.strip().rstrip("s")
+        if unit not in PERIODS or not amount.strip().isdigit() or int(amount) < 1:
+            raise ValueError(f"Invalid rate limit {value!r}, expected e.g. '1000/minute'")
+        return cls(int(amount), PERIODS[unit])
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def __str__(self) -> str:
+        unit = next(name for name, seconds in PERIODS.items() if seconds == self.period)
+        return f"{self.capacity}/{unit}"
+
+
+class Decision(NamedTuple):
+    """Outcome of taking tokens from a bucket, as reported in response headers."""
+
+    allowed: bool
+    limit: Limit
+    remaining: float
+    # Seconds until the bucket is full again, and until ``cost`` tokens are available.
+    reset_s: float
+    retry_after_s: float
+
+    def headers(self) -> list[tuple[bytes, bytes]]:
+        """``RateLimit-*`` headers, plus ``Retry-After`` when refused."""
+        headers = [
+            (b"ratelimit-limit", str(self.limit.capacity).encode()),
+            (b"ratelimit-remaining", str(max(0, math.floor(self.remaining))).encode()),
+            (b"ratelimit-reset", str(math.ceil(self.reset_s)).encode()),
+        ]
+        if not self.allowed:
+            headers.append((b"retry-after", str(math.ceil(self.retry_after_s)).encode()))
+        return headers
+
+
+class ExceedsCapacity(HTTPException):
+    """A request scores more rows than its bucket can ever hold."""
+
+    def __init__(self, rows: int, limit: Limit):
+        super().__init__(
+            status_code=413,
+            detail=f"{rows} rows exceed the rate limit of {limit}; split them into smaller requests",
+        )
+
+
+class StoreBusy(Exception):
+    """The bucket store could not be locked in time; nothing was taken."""
+
+
+class BucketStore(Protocol):
+    def take(
+        self, key: str, cost: float, limit: Limit, allow_debt: bool
+    ) -> tuple[bool, float]:
+        """Take ``cost`` tokens if available (or always, with ``allow_debt``).
+
+        Returns whether they were taken and the tokens left afterwards.
+        Raises StoreBusy if the bucket could not be locked in time.
+        """
+
+    def reset(self) -> None: ...
+
+
+def _refill(tokens: float, updated: float, now: float, limit: Limit) -> float:
+    return min(float(limit.capacity), tokens + (now - updated) * limit.rate)
+
+
+class MemoryBucketStore:
+    """Buckets in a dict, for a single process."""
+
+    def __init__(self):
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float, limit: Limit, allow_debt: bool) -> tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limit.capacity), now))
+            tokens = _refill(tokens, updated, now, limit)
+            allowed = allow_debt or tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Buckets in an SQLite file shared by local worker processes.
+
+    Kept on ``/dev/shm`` by ``app.serve``, so it is a shared-memory table with
+    SQLite's file locking serializing updates across processes; each take is
+    one short ``BEGIN IMMEDIATE`` transaction. Takes wait at most
+    ``busy_timeout_s`` for another worker's transaction and then raise
+    StoreBusy, since they block the event loop while they wait.
+    """
+
+    def __init__(self, path: str, busy_timeout_s: float = 0.005):
+        self.path = path
+        self.busy_timeout_s = busy_timeout_s
+        self._local = threading.local()
+        # Workers create the table as they start, so allow these a longer wait.
+        with closing(sqlite3.connect(path, timeout=5, isolation_level=None)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets"
+                " (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout_s, isolation_level=None
+            )
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, cost: float, limit: Limit, allow_debt: bool) -> tuple[bool, float]:
+        conn = self._connect()
+        # CLOCK_MONOTONIC is system-wide, so workers agree on it.
+        now = time.monotonic()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            raise StoreBusy(str(e)) from None
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (float(limit.capacity), now)
+            tokens = _refill(tokens, updated, now, limit)
+            allowed = allow_debt or tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+    def reset(self) -> None:
+        self._connect().execute("DELETE FROM buckets")
+
+
+class RateLimiter:
+    """Per-endpoint, per-client token buckets with optional per-API-key limits.
+
+    ``limits`` maps paths to limits such as ``"1000/minute"``; ``key_limits``
+    maps API keys to per-path limits that override the defaults for requests
+    carrying that key.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, str],
+        key_limits: Mapping[str, Mapping[str, str]] | None = None,
+        store: BucketStore | None = None,
+        enabled: bool = True,
+    ):
+        self.limits = {path: Limit.parse(limit) for path, limit in limits.items()}
+        self.key_limits = {
+            key: {**self.limits, **{path: Limit.parse(limit) for path, limit in per_path.items()}}
+            for key, per_path in (key_limits or {}).items()
+        }
+        self.store = store or MemoryBucketStore()
+        self.enabled = enabled
+
+    def _client(self, scope: Scope) -> tuple[str, Mapping[str, Limit]]:
+        """Bucket identity for the caller and the limits that apply to it."""
+        api_key = next(
+            (value for name, value in scope["headers"] if name == API_KEY_HEADER), None
+        )
+        if api_key is not None:
+            key = api_key.decode("latin-1")
+            if key in self.key_limits:
+                # Never store the key itself.
+                return "key:" + hashlib.sha256(api_key).hexdigest()[:16], self.key_limits[key]
+        client = scope.get("client")
+        return "addr:" + (client[0] if client else "unknown"), self.limits
+
+    def limit(self, scope: Scope) -> Limit | None:
+        """The limit that applies to this request; None if it is not rate limited."""
+        if not self.enabled:
+            return None
+        return self._client(scope)[1].get(scope["path"])
+
+    def take(self, scope: Scope, cost: float, allow_debt: bool = False) -> Decision | None:
+        """Take ``cost`` tokens for this request; None if it is not rate limited.
+
+        Also None, letting the request through, when the store is busy.
+        """
+        if not self.enabled:
+            return None
+        client, limits = self._client(scope)
+        limit = limits.get(scope["path"])
+        if limit is None:
+            return None
+        try:
+            allowed, remaining = self.store.take(
+                f"{scope['path']}|{client}", cost, limit, allow_debt
+            )
+        except StoreBusy:
+            # Fail open: an unmetered request is cheaper than a stalled loop.
+            RATE_LIMIT_STORE_BUSY.inc()
+            return None
+        missing = max(0.0, cost - remaining) if not allowed else 0.0
+        return Decision(
+            allowed=allowed,
+            limit=limit,
+            remaining=remaining,
+            reset_s=max(0.0, limit.capacity - remaining) / limit.rate,
+            retry_after_s=missing / limit.rate,
+        )
+
+    def reset(self) -> None:
+        self.store.reset()
+
+
+def charge_rows(scope: Scope, rows: int, allow_debt: bool = False) -> Decision | None:
+    """Charge a request for rows it scores, net of the token taken up front.
+
+    Uses the limiter ``RequestMiddleware`` stored in the scope and records the
+    decision there, so the response carries the updated ``RateLimit-*``
+    headers. Streams, whose headers are already sent, charge each chunk with
+    ``allow_debt`` so the bucket goes negative rather than cutting them off.
+    Returns the refusing decision if the rows are not covered, else None.
+    Raises ExceedsCapacity, rather than refusing with a ``Retry-After`` that
+    could never be honoured, if ``rows`` exceed what the bucket can hold.
+    """
+    state = scope.get("state", {})
+    limiter: RateLimiter | None = state.get("rate_limiter")
+    cost = rows - state.pop("rate_limit_prepaid", 0)
+    if limiter is None or cost <= 0:
+        return None
+    if not allow_debt and (limit := limiter.limit(scope)) is not None and rows > limit.capacity:
+        raise ExceedsCapacity(rows, limit)
+    decision = limiter.take(scope, cost, allow_debt=allow_debt)
+    if decision is None:
+        return None
+    state["rate_limit"] = decision
+    return None if decision.allowed else decision
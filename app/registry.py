@@ -0,0 +1,161 @@
+"""Load, warm up and hot-swap model artifacts without dropping requests."""
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from app.artifact import is_artifact, load_artifact, manifest_path, read_manifest
+from app.engine import compile_model
+from app.metrics import MODEL_RELOADS, MODEL_WARMUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# One row per class region, tiled to the batch sizes the endpoints see.
+WARMUP_ROWS = np.array([
+    [5.1, 3.5, 1.4, 0.2],
+    [6.1, 2.8, 4.7, 1.2],
+    [6.3, 3.3, 6.0, 2.5],
+])
+WARMUP_BATCH_SIZES = (1, 64, 1000)
+
+
+class LoadedModel(NamedTuple):
+    """A model ready to serve: the loaded artifact and its inference form."""
+
+    model: Any
+    inference_model: Any
+    version: str
+    path: str
+
+
+def watched_file(path: Path | str) -> Path:
+    """File whose changes signal a new model: the manifest or the pickle itself."""
+    return manifest_path(path) if is_artifact(path) else Path(path)
+
+
+def artifact_version(path: Path | str) -> str:
+    """Version recorded in a manifest, else the artifact's name and content hash.
+
+    Manifests record the checksums of their arrays, so hashing the manifest
+    covers the whole artifact.
+    """
+    path = Path(path)
+    if is_artifact(path) and (version := read_manifest(path).get("model_version")):
+        return version
+    digest = hashlib.sha256(watched_file(path).read_bytes()).hexdigest()[:12]
+    return f"{path.stem}-{digest}"
+
+
+def read_model(
+    path: Path | str,
+    precision: str = "float64",
+    fused: bool = True,
+    mmap_mode: str | None = None,
+) -> tuple[Any, Any]:
+    """Load ``(model, inference_model)`` from a manifest artifact or a pickle.
+
+    Manifest artifacts are always memory-mapped and need neither joblib nor
+    sklearn; pickles are the fallback and are compiled when ``fused`` is set.
+    """
+    if is_artifact(path):
+        model = load_artifact(path, precision)
+        return model, model
+    import joblib
+
+    model = joblib.load(path, mmap_mode=mmap_mode)
+    return model, compile_model(model, precision) if fused else model
+
+
+def warm_up(inference_model: Any, n_classes: int) -> None:
+    """Score the warm-up batches, checking they give ``n_classes`` probabilities."""
+    for size in WARMUP_BATCH_SIZES:
+        X = np.resize(WARMUP_ROWS, (size, WARMUP_ROWS.shape[1]))
+        proba = inference_model.predict_proba(X)
+        if proba.shape != (size, n_classes):
+            raise ValueError(
+                f"Expected probabilities of shape {(size, n_classes)}, got {proba.shape}"
+            )
+
+
+def load_model(
+    path: Path | str,
+    version: str,
+    n_classes: int,
+    precision: str = "float64",
+    fused: bool = True,
+    mmap_mode: str | None = None,
+) -> LoadedModel:
+    """Load an artifact, compile it and run warm-up inferences.
+
+    Raises ``ValueError`` if the model cannot score a feature row into
+    ``n_classes`` probabilities, so a bad artifact never becomes active.
+    """
+    start = time.perf_counter()
+    model, inference_model = read_model(path, precision, fused, mmap_mode)
+    warm_up(inference_model, n_classes)
+    MODEL_WARMUP_SECONDS.observe(time.perf_counter() - start)
+    return LoadedModel(model, inference_model, version, str(path))
+
+
+class ModelRegistry:
+    """Prepare new models off the event loop and hand them to ``activate``.
+
+    Loading and warm-up run in a worker thread, so requests keep being served
+    by the active model meanwhile. ``activate`` is only called with a model
+    that warmed up successfully, and may itself fail to leave the active
+    model in place; reloads are serialized by a lock.
+    """
+
+    def __init__(
+        self,
+        activate: Callable[[LoadedModel], Awaitable[None]],
+        n_classes: int,
+        precision: str = "float64",
+        fused: bool = True,
+    ):
+        self.activate = activate
+        self.n_classes = n_classes
+        self.precision = precision
+        self.fused = fused
+        self._lock = asyncio.Lock()
+
+    async def reload(self, path: Path | str, version: str | None = None) -> LoadedModel:
+        """Load, warm up and activate the artifact at ``path``."""
+        async with self._lock:
+            try:
+                if version is None:
+                    version = await asyncio.to_thread(artifact_version, path)
+                loaded = await asyncio.to_thread(
+                    load_model, path, version, self.n_classes, self.precision, self.fused
+                )
+                await self.activate(loaded)
+            except Exception:
+                MODEL_RELOADS.labels(result="failed").inc()
+                raise
+            MODEL_RELOADS.labels(result="ok").inc()
+            logger.info(f"Activated model {version} from {path}")
+            return loaded
+
+    async def watch(self, path: Path | str, interval_s: float) -> None:
+        """Reload ``path`` whenever its modification time changes."""
+        path = Path(path)
+        watched = watched_file(path)
+        last_mtime = watched.stat().st_mtime_ns
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                mtime = watched.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if mtime == last_mtime:
+                continue
+            last_mtime = mtime
+            try:
+                await self.reload(path)
+            except Exception as e:
+                logger.error(f"Model reload from {path} failed: {e}")
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field
+
+
+class ModelReloadRequest(BaseModel):
+    """Artifact to hot-swap in; defaults to the configured model path."""
+
+    path: str | None = Field(None, description="Model artifact to load")
+    version: str | None = Field(
+        None, description="Version to report; derived from the artifact if omitted"
+    )
+
+
+class ModelReloadResponse(BaseModel):
+    model_version: str
+    previous_version: str
+    path: str
+
+
+class ProfileRequest(BaseModel):
+    """What to profile, and for how long."""
+
+    seconds: float = Field(10.0, gt=0, le=300, description="Stop after this many seconds")
+    requests: int | None = Field(
+        None, ge=1, description="Stop earlier once this many requests have completed"
+    )
+    interval_ms: float = Field(5.0, ge=1, le=1000, description="CPU sampling interval")
+    memory: bool = Field(False, description="Trace allocations with tracemalloc")
+    top: int = Field(25, ge=1, le=1000, description="Allocation sites to return")
+    include_idle: bool = Field(False, description="Keep stacks of threads waiting for work")
+
+
+class AllocationSite(BaseModel):
+    site: str
+    size_bytes: int
+    count: int
+
+
+class ProfileResponse(BaseModel):
+    seconds: float
+    requests: int
+    samples: int
+    interval_ms: float
+    # Collapsed stacks, one "frame;frame;frame count" line each.
+    collapsed: str
+    allocations: list[AllocationSite] | None = None
+    traced_current_bytes: int | None = None
+    traced_peak_bytes: int | None = None
@@ -0,0 +1,21 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobInfo(BaseModel):
+    """State of an asynchronous scoring job, as stored next to its results."""
+
+    job_id: str
+    status: JobStatus
+    rows: int
+    rows_done: int = 0
+    model_version: str | None = None
+    # Unix timestamps.
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    rows_per_s: float | None = None
+    error: str | None = None
@@ -1,5 +1,15 @@
+"""Pydantic schemas for request/response validation."""
+
+import numpy as np
 from pydantic import BaseModel, Field, model_validator
 
+FEATURE_NAMES = ("sepal_length", "sepal_width", "petal_length", "petal_width")
+TARGET_NAMES = ("setosa", "versicolor", "virginica")
+LENGTH_RANGE = (0.5, 10.0)
+WIDTH_RANGE = (0.1, 10.0)
+LENGTH_RANGE_ERROR = "lengths look out of range (0.5–10 cm)"
+WIDTH_RANGE_ERROR = "widths look out of range (0.1–10 cm)"
+
 
 class IrisRequest(BaseModel):
     sepal_length: float = Field(..., gt=0, description="cm")
@@ -9,13 +19,73 @@ class IrisRequest(BaseModel):
 
     @model_validator(mode="after")
     def check_ranges(self):
-        if not (0.5 <= self.sepal_length <= 10 and 0.5 <= self.petal_length <= 10):
-            raise ValueError("lengths look out of range (0.5–10 cm)")
-        if not (0.1 <= self.sepal_width <= 10 and 0.1 <= self.petal_width <= 10):
-            raise ValueError("widths look out of range (0.1–10 cm)")
+        lo, hi = LENGTH_RANGE
+        if not (lo <= self.sepal_length <= hi and lo <= self.petal_length <= hi):
+            raise ValueError(LENGTH_RANGE_ERROR)
+        lo, hi = WIDTH_RANGE
+        if not (lo <= self.sepal_width <= hi and lo <= self.petal_width <= hi):
+            raise ValueError(WIDTH_RANGE_ERROR)
         return self
 
 
+class IrisFeatures(BaseModel):
+    """Iris measurements parsed for type only.
+
+    Used where rows are range-checked together with ``validate_feature_array``
+    rather than one ``IrisRequest`` at a time.
+    """
+
+    sepal_length: float
+    sepal_width: float
+    petal_length: float
+    petal_width: float
+
+
+def _json_float(value: float) -> float | str:
+    """Return value as a JSON-safe float; NaN and infinities become strings."""
+    value = float(value)
+    return value if np.isfinite(value) else str(value)
+
+
+def validate_feature_array(X: np.ndarray, loc: tuple = ("body",)) -> list[dict]:
+    """Apply IrisRequest's field and range checks to a (N, 4) array at once.
+
+    Returns errors in the shape FastAPI reports for request validation, with
+    ``loc`` extended by the row index (and field name for ``gt=0`` failures).
+    An empty list means every row is valid.
+    """
+    positive = X > 0
+    lengths_ok = ((X[:, [0, 2]] >= LENGTH_RANGE[0]) & (X[:, [0, 2]] <= LENGTH_RANGE[1])).all(axis=1)
+    widths_ok = ((X[:, [1, 3]] >= WIDTH_RANGE[0]) & (X[:, [1, 3]] <= WIDTH_RANGE[1])).all(axis=1)
+    fields_ok = positive.all(axis=1)
+    bad_rows = np.flatnonzero(~(fields_ok & lengths_ok & widths_ok))
+
+    errors = []
+    for row in bad_rows.tolist():
+        if not fields_ok[row]:
+            # Like pydantic, range checks only run once every field is valid.
+            for col in np.flatnonzero(~positive[row]).tolist():
+                errors.append({
+                    "type": "greater_than",
+                    "loc": [*loc, row, FEATURE_NAMES[col]],
+                    "msg": "Input should be greater than 0",
+                    "input": _json_float(X[row, col]),
+                    "ctx": {"gt": 0.0},
+                })
+            continue
+        message = LENGTH_RANGE_ERROR if not lengths_ok[row] else WIDTH_RANGE_ERROR
+        errors.append({
+            "type": "value_error",
+            "loc": [*loc, row],
+            "msg": f"Value error, {message}",
+            "input": {
+                name: _json_float(value) for name, value in zip(FEATURE_NAMES, X[row], strict=True)
+            },
+            "ctx": {"error": message},
+        })
+    return errors
+
+
 class IrisResponse(BaseModel):
     predicted_class: str
     class_index: int
@@ -29,8 +99,26 @@ class IrisBatchRequest(BaseModel):
     items: list[IrisRequest]
 
 
+class IrisBatchFeatures(BaseModel):
+    """Batch request parsed for type only; ranges go through validate_feature_array."""
+
+    items: list[IrisFeatures]
+
+
 class IrisBatchResponse(BaseModel):
     """Batch prediction response."""
 
     items: list[IrisResponse]
     count: int
+
+
+class IrisColumnarBatchResponse(BaseModel):
+    """Batch prediction response with one array per field (``layout=columnar``)."""
+
+    classes: list[str]
+    class_index: list[int]
+    confidence: list[float]
+    count: int
+    probabilities: list[list[float]] | None = None
+    top_k_index: list[list[int]] | None = None
+    top_k_probabilities: list[list[float]] | None = None
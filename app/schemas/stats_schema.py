@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+
+
+class FeatureSummary(BaseModel):
+    """Running aggregates of one feature over every scored row."""
+
+    mean: float
+    variance: float
+    stddev: float
+    min: float | None
+    max: float | None
+    # Rows per bucket of StatsResponse.bucket_bounds; the last counts rows above them.
+    histogram: list[int]
+
+
+class StatsResponse(BaseModel):
+    rows: int
+    bucket_bounds: list[float]
+    features: dict[str, FeatureSummary]
+    predicted_classes: dict[str, int]
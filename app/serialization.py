@@ -0,0 +1,99 @@
+"""Fast JSON encoding of prediction results straight from NumPy arrays.
+
+Batch results are built from the probability matrix with vectorized NumPy
+and serialized with orjson (which writes arrays natively), skipping the
+per-row pydantic models and FastAPI's generic ``jsonable_encoder`` path.
+"""
+from typing import Any, Literal
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse
+
+Layout = Literal["rows", "columnar"]
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, with NumPy arrays serialized directly."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _top_k(proba: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Class indices and probabilities of the k most likely classes per row."""
+    order = np.ascontiguousarray(np.argsort(-proba, axis=1, kind="stable")[:, :k])
+    return order, np.take_along_axis(proba, order, axis=1)
+
+
+def encode_rows(
+    proba: np.ndarray, target_names: list[str], top_k: int | None = None
+) -> dict[str, Any]:
+    """Build the ``IrisBatchResponse`` body for a probability matrix.
+
+    ``top_k`` limits each row's ``probabilities`` to its k most likely
+    classes; 0 leaves them empty and ``None`` keeps every class.
+    """
+    indices = proba.argmax(axis=1)
+    confidences = proba[np.arange(len(indices)), indices]
+    if top_k is None:
+        probabilities = [dict(zip(target_names, row, strict=True)) for row in proba.tolist()]
+    else:
+        order, top = _top_k(proba, top_k)
+        probabilities = [
+            {target_names[i]: p for i, p in zip(row_order, row_top, strict=True)}
+            for row_order, row_top in zip(order.tolist(), top.tolist(), strict=True)
+        ]
+    items = [
+        {
+            "predicted_class": target_names[idx],
+            "class_index": idx,
+            "confidence": conf,
+            "probabilities": probs,
+        }
+        for idx, conf, probs in zip(
+            indices.tolist(), confidences.tolist(), probabilities, strict=True
+        )
+    ]
+    return {"items": items, "count": len(items)}
+
+
+def encode_columnar(
+    proba: np.ndarray, target_names: list[str], top_k: int | None = None
+) -> dict[str, Any]:
+    """Build the ``IrisColumnarBatchResponse`` body for a probability matrix.
+
+    Per-row values are parallel arrays indexed like the request rows, and
+    ``class_index`` refers into ``classes``. With ``top_k`` the full
+    ``probabilities`` matrix is replaced by ``top_k_index`` and
+    ``top_k_probabilities`` (omitted entirely for 0).
+    """
+    indices = proba.argmax(axis=1)
+    body: dict[str, Any] = {
+        "classes": target_names,
+        "class_index": indices,
+        "confidence": proba[np.arange(len(indices)), indices],
+        "count": len(indices),
+    }
+    if top_k is None:
+        body["probabilities"] = np.ascontiguousarray(proba)
+    elif top_k > 0:
+        body["top_k_index"], body["top_k_probabilities"] = _top_k(proba, top_k)
+    return body
+
+
+def encode_batch(
+    proba: np.ndarray,
+    target_names: list[str],
+    layout: Layout,
+    top_k: int | None,
+    extra: dict[str, Any] | None = None,
+) -> NumpyJSONResponse:
+    """Serialize batch results in the requested layout, plus any ``extra`` fields."""
+    if top_k is not None:
+        top_k = min(top_k, proba.shape[1])
+    encode = encode_columnar if layout == "columnar" else encode_rows
+    body = encode(proba, target_names, top_k)
+    if extra:
+        body.update(extra)
+    return NumpyJSONResponse(body)
@@ -0,0 +1,91 @@
+"""Run the API under uvicorn, optionally with several worker processes.
+
+Usage:
+    python -m app.serve            # honours ML_API_HOST/PORT/WORKERS
+
+With more than one worker, a pickled model is loaded once here, before the
+workers start, and re-written to shared memory (``/dev/shm`` when
+available): as a manifest artifact (see ``app.artifact``) if the fused engine
+supports it, else as an uncompressed joblib dump. Workers memory-map it, so
+the weight arrays are mapped from the same pages instead of copied into every
+process. Manifest artifacts are already memory-mapped and are used in place.
+Prometheus metrics are written to a shared multiprocess directory and
+aggregated by ``/metrics``, and rate-limit buckets are kept in a shared SQLite
+file so limits apply across all workers rather than per worker.
+"""
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from app.artifact import export_artifact, is_artifact
+from app.config import ENV_PREFIX, load_settings
+from app.logging_config import configure_logging
+from app.metrics import MULTIPROC_DIR_ENV
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = Path(__file__).resolve().parent / "model" / "model.pkl"
+
+# Route uvicorn's own logs through our queued JSON handler, and drop its
+# synchronous access log: the request middleware already logs each request.
+UVICORN_LOGGING = {"log_config": None, "access_log": False}
+
+
+def _shared_root() -> str | None:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def export_shared_model(model_path: Path, out_dir: Path, precision: str, fused: bool) -> Path:
+    """Load a pickled model once and write it where workers can memory-map it."""
+    import joblib
+
+    model = joblib.load(model_path)
+    if fused:
+        try:
+            return export_artifact(model, out_dir / "model")
+        except ValueError:
+            from app.engine import compile_model
+
+            model = compile_model(model, precision)
+    out_path = out_dir / "model.joblib"
+    # No compression: joblib can only memory-map arrays stored raw.
+    joblib.dump(model, out_path)
+    return out_path
+
+
+def main() -> None:
+    settings = load_settings()
+    configure_logging(settings.log_level, settings.log_success_sample_rate)
+    source = Path(settings.model_path or MODEL_PATH)
+    if settings.workers == 1:
+        uvicorn.run("app.main:app", host=settings.host, port=settings.port, **UVICORN_LOGGING)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="ml-api-", dir=_shared_root()) as shared:
+        shared_dir = Path(shared)
+        metrics_dir = shared_dir / "metrics"
+        metrics_dir.mkdir()
+        # Workers are started with this environment, so they pick these up.
+        os.environ[MULTIPROC_DIR_ENV] = str(metrics_dir)
+        os.environ[ENV_PREFIX + "RATE_LIMIT_STORE_PATH"] = str(shared_dir / "ratelimit.sqlite")
+        model_path = source
+        if not is_artifact(source):
+            model_path = export_shared_model(
+                source, shared_dir, settings.inference_precision, settings.fused_engine
+            )
+            os.environ[ENV_PREFIX + "SHARED_MODEL_PATH"] = str(model_path)
+        logger.info(f"Starting {settings.workers} workers sharing {model_path}")
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=settings.workers,
+            **UVICORN_LOGGING,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Score live traffic with a candidate model without slowing requests down.
+
+Every feature matrix the primary model scores can be handed to
+:meth:`ShadowScorer.submit` together with the primary probabilities. It is
+queued for a background thread, which scores it with the candidate model and
+records how the two compare in Prometheus:
+
+- ``shadow_rows_total{outcome}``: rows whose predicted class agreed with the
+  primary or not; agreement rate is the ``agree`` share of its rate.
+- ``shadow_probability_delta``: per row, the largest absolute difference
+  between the two probability vectors.
+- ``shadow_predict_duration_seconds``: candidate scoring latency per batch.
+
+``submit`` never waits: when ``max_queued`` batches are already waiting, the
+batch is dropped and counted in ``shadow_dropped_rows_total``.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+from app.metrics import (
+    SHADOW_DROPPED_ROWS,
+    SHADOW_ERRORS,
+    SHADOW_LATENCY,
+    SHADOW_PROBA_DELTA,
+    SHADOW_QUEUE_DEPTH,
+    SHADOW_ROWS,
+    observe_many,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bound children so compare() skips the labels() lookup.
+SHADOW_AGREE = SHADOW_ROWS.labels(outcome="agree")
+SHADOW_DISAGREE = SHADOW_ROWS.labels(outcome="disagree")
+
+
+class ShadowScorer:
+    """Compare a candidate model with the primary on a background thread.
+
+    ``model`` needs only ``predict_proba``; ``version`` names it in logs.
+    """
+
+    def __init__(self, model: Any, version: str, max_queued: int = 64):
+        self.model = model
+        self.version = version
+        self._queue: queue.Queue[tuple[np.ndarray, np.ndarray] | None] = queue.Queue(max_queued)
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the background scoring thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ml-api-shadow", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Score what is already queued, then stop the thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        SHADOW_QUEUE_DEPTH.set(0)
+
+    def submit(self, X: np.ndarray, proba: np.ndarray) -> bool:
+        """Queue a scored batch for comparison; False if it was dropped.
+
+        Neither array may be modified afterwards: they are read later, on the
+        scoring thread, without being copied.
+        """
+        try:
+            self._queue.put_nowait((X, proba))
+        except queue.Full:
+            SHADOW_DROPPED_ROWS.inc(len(X))
+            return False
+        SHADOW_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def _run(self) -> None:
+        while (item := self._queue.get()) is not None:
+            SHADOW_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                self.compare(*item)
+            except Exception:
+                # A failing candidate must not stop the comparison of later batches.
+                SHADOW_ERRORS.inc()
+                logger.exception(f"Shadow model {self.version} failed to score a batch")
+
+    def compare(self, X: np.ndarray, proba: np.ndarray) -> None:
+        """Score ``X`` with the candidate and record how it differs from ``proba``."""
+        start = time.perf_counter()
+        shadow = np.asarray(self.model.predict_proba(X))
+        SHADOW_LATENCY.observe(time.perf_counter() - start)
+        if shadow.shape != proba.shape:
+            raise ValueError(f"Expected probabilities of shape {proba.shape}, got {shadow.shape}")
+        agree = int(np.count_nonzero(shadow.argmax(axis=1) == proba.argmax(axis=1)))
+        SHADOW_AGREE.inc(agree)
+        SHADOW_DISAGREE.inc(len(X) - agree)
+        observe_many(SHADOW_PROBA_DELTA, np.abs(shadow - proba).max(axis=1))
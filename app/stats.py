@@ -0,0 +1,175 @@
+"""Constant-memory running statistics of scored features and predictions.
+
+:class:`FeatureStats` folds each scored batch into fixed-size aggregates:
+
+- per feature: row count, mean and variance (Welford's algorithm, merged a
+  batch at a time), min, max and counts over fixed histogram buckets;
+- per class: number of rows predicted as that class.
+
+The batch's own aggregates are computed with a handful of vectorized numpy
+calls outside any lock; the lock only guards merging them into the running
+totals, a few operations on arrays of length ``n_features``. Memory does not
+grow with traffic.
+
+The same aggregates are added to Prometheus (``feature_value``,
+``feature_value_squares``, ``feature_value_min``/``max`` and
+``predicted_class``), which combine across worker processes, in one
+:meth:`FeatureStats.flush` per ``flush_interval_s`` rather than on every
+batch. :meth:`FeatureStats.snapshot` reports the exact running values of
+this process.
+"""
+import threading
+import time
+from collections.abc import Sequence
+
+import numpy as np
+
+from app.metrics import (
+    FEATURE_BUCKET_WIDTH,
+    FEATURE_BUCKETS,
+    FEATURE_MAX,
+    FEATURE_MIN,
+    FEATURE_VALUE,
+    FEATURE_VALUE_SQUARES,
+    PREDICTED_CLASS,
+    observe_bucket_counts,
+)
+
+
+class FeatureStats:
+    """Running aggregates of scored feature rows and their predicted classes."""
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        class_names: Sequence[str],
+        bucket_width: float = FEATURE_BUCKET_WIDTH,
+        bucket_count: int = len(FEATURE_BUCKETS),
+        flush_interval_s: float = 1.0,
+    ):
+        self.feature_names = list(feature_names)
+        self.class_names = list(class_names)
+        # Equal-width buckets, so a value's bucket is arithmetic, not a search.
+        self.bucket_width = bucket_width
+        self.bucket_bounds = [bucket_width * i for i in range(1, bucket_count + 1)]
+        self.flush_interval_s = flush_interval_s
+        n_features = len(self.feature_names)
+        n_buckets = bucket_count + 1
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self._m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+        # The last bucket holds values above the last bound.
+        self.histogram = np.zeros((n_features, n_buckets), dtype=np.int64)
+        self.class_counts = np.zeros(len(self.class_names), dtype=np.int64)
+        self._lock = threading.Lock()
+        # Offsets that give each feature its own range of bins in one bincount.
+        self._bins = np.arange(n_features) * n_buckets
+        # Prometheus counters take sums; mean and variance come from Welford.
+        self._sums = np.zeros(n_features)
+        self._squares_sum = np.zeros(n_features)
+        # Totals as of the last flush(), to add only what came since.
+        self._flushed = self._totals()
+        self._flushed_at = time.monotonic()
+        self._values = [FEATURE_VALUE.labels(feature=name) for name in self.feature_names]
+        self._squares = [FEATURE_VALUE_SQUARES.labels(feature=name) for name in self.feature_names]
+        self._classes = [PREDICTED_CLASS.labels(predicted_class=name) for name in self.class_names]
+
+    def _totals(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Copies of the (histogram, sums, squares, class counts) totals."""
+        return (
+            self.histogram.copy(),
+            self._sums.copy(),
+            self._squares_sum.copy(),
+            self.class_counts.copy(),
+        )
+
+    def update(self, X: np.ndarray, proba: np.ndarray) -> None:
+        """Fold a scored (N, n_features) batch and its probabilities in."""
+        n = len(X)
+        if n == 0:
+            return
+        X = np.asarray(X, dtype=float)
+        n_features, n_buckets = self.histogram.shape
+        sums = X.sum(axis=0)
+        squares = np.einsum("ij,ij->j", X, X)
+        batch_mean = sums / n
+        centered = X - batch_mean
+        batch_m2 = np.einsum("ij,ij->j", centered, centered)
+        # Bucket i holds bounds[i - 1] < x <= bounds[i]; the last one the rest.
+        buckets = np.clip(np.ceil(X / self.bucket_width), 1, n_buckets).astype(np.intp)
+        buckets += self._bins - 1
+        histogram = np.bincount(buckets.ravel(), minlength=n_features * n_buckets).reshape(
+            n_features, n_buckets
+        )
+        classes = np.bincount(proba.argmax(axis=1), minlength=len(self.class_names))
+
+        with self._lock:
+            total = self.count + n
+            delta = batch_mean - self.mean
+            self.mean += delta * (n / total)
+            self._m2 += batch_m2 + delta * delta * (self.count * n / total)
+            self.count = total
+            np.minimum(self.min, X.min(axis=0), out=self.min)
+            np.maximum(self.max, X.max(axis=0), out=self.max)
+            self.histogram += histogram
+            self.class_counts += classes
+            self._sums += sums
+            self._squares_sum += squares
+        if time.monotonic() - self._flushed_at >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        """Add everything folded in since the last flush to Prometheus.
+
+        ``update`` calls this at most every ``flush_interval_s``, so requests
+        do not each pay for a dozen metric updates; call it before rendering
+        metrics to include the latest rows.
+        """
+        with self._lock:
+            totals = self._totals()
+            histogram, sums, squares, classes = (
+                now - before for now, before in zip(totals, self._flushed, strict=True)
+            )
+            self._flushed = totals
+            minimum = self.min.tolist()
+            maximum = self.max.tolist()
+            self._flushed_at = time.monotonic()
+        for j in range(len(self.feature_names)):
+            if histogram[j].any():
+                observe_bucket_counts(self._values[j], histogram[j], float(sums[j]))
+                self._squares[j].inc(float(squares[j]))
+                # Created on first use: an unset min/max gauge would read as 0.
+                FEATURE_MIN.labels(feature=self.feature_names[j]).set(minimum[j])
+                FEATURE_MAX.labels(feature=self.feature_names[j]).set(maximum[j])
+        for i in np.flatnonzero(classes).tolist():
+            self._classes[i].inc(int(classes[i]))
+
+    def snapshot(self) -> dict:
+        """Current aggregates, as returned by ``GET /stats``."""
+        with self._lock:
+            count = self.count
+            mean = self.mean.tolist()
+            variance = (self._m2 / count).tolist() if count else [0.0] * len(mean)
+            minimum = self.min.tolist()
+            maximum = self.max.tolist()
+            histogram = self.histogram.tolist()
+            class_counts = self.class_counts.tolist()
+        features = {
+            name: {
+                "mean": mean[j],
+                "variance": variance[j],
+                "stddev": variance[j] ** 0.5,
+                "min": minimum[j] if count else None,
+                "max": maximum[j] if count else None,
+                "histogram": histogram[j],
+            }
+            for j, name in enumerate(self.feature_names)
+        }
+        return {
+            "rows": count,
+            "bucket_bounds": self.bucket_bounds,
+            "features": features,
+            "predicted_classes": dict(zip(self.class_names, class_counts, strict=True)),
+        }
@@ -0,0 +1,129 @@
+"""Incremental NDJSON scoring for /predict-stream.
+
+Request lines are parsed as they arrive, grouped into fixed-size chunks,
+validated and scored one chunk at a time, and each chunk's result lines are
+yielded before the next chunk is read, so memory stays bounded by the chunk
+size no matter how long the upload is.
+"""
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any
+
+import anyio
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.types import Receive
+
+from app.schemas.predict_schema import FEATURE_NAMES, IrisFeatures, validate_feature_array
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+ScoreFn = Callable[[np.ndarray], Awaitable[Sequence[Any]]]
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """StreamingResponse whose content is still reading the request body.
+
+    Starlette's StreamingResponse watches for client disconnects by calling
+    ``receive`` while it streams, which would swallow the request body chunks
+    the content generator is waiting for. Here disconnects surface instead as
+    ``ClientDisconnect`` from ``request.stream()``.
+    """
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        await anyio.sleep_forever()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Re-split an async byte stream into non-empty newline-delimited lines."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+def _error_line(line_no: int, detail: Any) -> bytes:
+    return json.dumps({"line": line_no, "detail": detail}, default=str).encode() + b"\n"
+
+
+async def _score_rows(score: ScoreFn, X: np.ndarray) -> list[Any]:
+    """Score X in one call; on failure, row by row so only bad rows error."""
+    try:
+        return list(await score(X))
+    except HTTPException:
+        results = []
+        for row in X:
+            try:
+                results.append((await score(row[np.newaxis, :]))[0])
+            except HTTPException as e:
+                results.append(e)
+        return results
+
+
+async def _score_chunk(
+    score: ScoreFn, line_numbers: list[int], rows: list[list[float]]
+) -> list[tuple[int, bytes]]:
+    X = np.array(rows, dtype=float)
+    invalid: dict[int, list[dict]] = {}
+    for error in validate_feature_array(X, loc=()):
+        row, *loc = error["loc"]
+        invalid.setdefault(row, []).append({**error, "loc": loc})
+
+    valid = [i for i in range(len(rows)) if i not in invalid]
+    out = [
+        (line_numbers[i], _error_line(line_numbers[i], errors))
+        for i, errors in invalid.items()
+    ]
+    if valid:
+        results = await _score_rows(score, X[valid])
+        for i, result in zip(valid, results, strict=True):
+            if isinstance(result, HTTPException):
+                out.append((line_numbers[i], _error_line(line_numbers[i], result.detail)))
+            else:
+                out.append((line_numbers[i], result.model_dump_json().encode() + b"\n"))
+    return sorted(out, key=lambda item: item[0])
+
+
+async def stream_predictions(
+    chunks: AsyncIterator[bytes], score: ScoreFn, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Yield one NDJSON result line per input line, in input order.
+
+    Valid rows produce the ``/predict`` response object; rows that fail to
+    parse, validate or score produce ``{"line": n, "detail": ...}`` with n
+    counted from 1.
+    """
+    pending: list[tuple[int, bytes]] = []
+    line_numbers: list[int] = []
+    rows: list[list[float]] = []
+    line_no = 0
+
+    async def flush() -> list[bytes]:
+        scored = await _score_chunk(score, line_numbers, rows) if rows else []
+        merged = sorted(pending + scored, key=lambda item: item[0])
+        pending.clear()
+        line_numbers.clear()
+        rows.clear()
+        return [line for _, line in merged]
+
+    async for line in iter_lines(chunks):
+        line_no += 1
+        try:
+            features = IrisFeatures.model_validate_json(line)
+        except ValidationError as e:
+            pending.append((line_no, _error_line(line_no, e.errors(include_url=False))))
+        else:
+            line_numbers.append(line_no)
+            rows.append([getattr(features, name) for name in FEATURE_NAMES])
+        if len(rows) + len(pending) >= chunk_size:
+            for out in await flush():
+                yield out
+    for out in await flush():
+        yield out
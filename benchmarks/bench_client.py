@@ -0,0 +1,107 @@
+"""Compare the client SDK with naive one-request-per-row calling.
+
+Usage:
+    python -m benchmarks.bench_client
+
+The API runs in-process on a uvicorn thread (rate limiting and admission
+control disabled). Every scenario scores ROWS rows (the first only ROWS // 10, it is slow):
+
+    naive sequential    a new httpx.post() per row: new connection each time
+    naive pooled x16    16 threads sharing one keep-alive httpx.Client
+    sdk sync x16        16 threads calling Client.predict(); calls coalesce
+    sdk async gather    AsyncClient.predict() for every row at once
+    sdk predict_many    one call; rows are sent in chunks of 1000
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("ML_API_RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ML_API_ADMISSION_MAX_IN_FLIGHT", "0")
+os.environ.setdefault("ML_API_LOG_SUCCESS_SAMPLE_RATE", "0")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.main import app  # noqa: E402
+from ml_api_client import AsyncClient, Client  # noqa: E402
+
+ROWS = 2000
+THREADS = 16
+PAYLOAD = {"sepal_length": 6.1, "sepal_width": 2.8, "petal_length": 4.7, "petal_width": 1.2}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def naive_sequential(url: str) -> None:
+    for _ in range(ROWS // 10):
+        httpx.post(f"{url}/predict", json=PAYLOAD).raise_for_status()
+
+
+def naive_pooled(url: str) -> None:
+    with httpx.Client(base_url=url) as http, ThreadPoolExecutor(THREADS) as pool:
+        for response in pool.map(lambda _: http.post("/predict", json=PAYLOAD), range(ROWS)):
+            response.raise_for_status()
+
+
+def sdk_sync(url: str) -> None:
+    with Client(url) as client, ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(lambda _: client.predict(PAYLOAD), range(ROWS)))
+
+
+def sdk_async(url: str) -> None:
+    async def run() -> None:
+        async with AsyncClient(url) as client:
+            await asyncio.gather(*(client.predict(PAYLOAD) for _ in range(ROWS)))
+
+    asyncio.run(run())
+
+
+def sdk_predict_many(url: str) -> None:
+    with Client(url) as client:
+        client.predict_many([PAYLOAD] * ROWS)
+
+
+SCENARIOS = {
+    "naive sequential": (naive_sequential, ROWS // 10),
+    f"naive pooled x{THREADS}": (naive_pooled, ROWS),
+    f"sdk sync x{THREADS}": (sdk_sync, ROWS),
+    "sdk async gather": (sdk_async, ROWS),
+    "sdk predict_many": (sdk_predict_many, ROWS),
+}
+
+
+def main() -> None:
+    port = _free_port()
+    server = _serve(port)
+    url = f"http://127.0.0.1:{port}"
+    print(f"{'scenario':<20} {'seconds':>8} {'rows/s':>10}")
+    try:
+        for name, (scenario, rows) in SCENARIOS.items():
+            start = time.perf_counter()
+            scenario(url)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<20} {elapsed:>8.2f} {rows / elapsed:>10.0f}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Measure per-request middleware overhead before and after the ASGI rewrite.
+
+Usage:
+    python -m benchmarks.bench_middleware
+
+Requests are driven straight through the ASGI interface (no sockets) against
+a trivial endpoint, so the difference between stacks is the middleware cost.
+"before" reproduces the previous layering: SlowAPIMiddleware, a decorator
+limit and an ``app.middleware("http")`` request-id function. It needs
+slowapi, which the service no longer depends on, and is skipped without it.
+"""
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+
+from app.middleware import RequestMiddleware
+from app.ratelimit import RateLimiter
+
+try:
+    from slowapi import Limiter
+    from slowapi.middleware import SlowAPIMiddleware
+    from slowapi.util import get_remote_address
+except ImportError:
+    Limiter = None
+
+REQUESTS = 20_000
+LIMIT = "1000000/minute"
+
+
+def bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def before_app() -> FastAPI:
+    app = FastAPI()
+    limiter = Limiter(key_func=get_remote_address)
+    app.state.limiter = limiter
+    app.add_middleware(SlowAPIMiddleware)
+
+    async def add_request_id(request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4())[:8])
+        request.state.request_id = request_id
+        logger = logging.getLogger("app.request")
+        logger.info(f"{request.method} {request.url.path}", extra={"request_id": request_id})
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        logger.info(
+            f"{request.method} {request.url.path} {response.status_code}",
+            extra={"request_id": request_id},
+        )
+        return response
+
+    app.middleware("http")(add_request_id)
+
+    @app.get("/ping")
+    @limiter.limit(LIMIT)
+    async def ping(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+def after_app() -> FastAPI:
+    app = bare_app()
+    app.add_middleware(RequestMiddleware, limiter=RateLimiter({"/ping": LIMIT}))
+    return app
+
+
+async def _drive(app) -> float:
+    """Mean seconds per request through the ASGI app."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 5000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(500):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def main() -> None:
+    # Measure the middleware, not log I/O.
+    logging.getLogger("app.request").setLevel(logging.CRITICAL)
+    base = asyncio.run(_drive(bare_app()))
+    print(f"{'stack':<8} {'us/request':>11} {'overhead us':>12}")
+    print(f"{'none':<8} {base * 1e6:>11.1f} {0:>12.1f}")
+    stacks = [("after", after_app)]
+    if Limiter is not None:
+        stacks.insert(0, ("before", before_app))
+    else:
+        print("before   skipped (slowapi not installed)")
+    for name, factory in stacks:
+        seconds = asyncio.run(_drive(factory()))
+        print(f"{name:<8} {seconds * 1e6:>11.1f} {(seconds - base) * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
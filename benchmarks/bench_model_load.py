@@ -0,0 +1,61 @@
+"""Compare cold-start time and memory of the joblib and manifest model formats.
+
+Usage:
+    python -m benchmarks.bench_model_load
+
+Each measurement runs in a fresh interpreter, timing the import of the model
+loader plus the first prediction, and reporting peak RSS and whether sklearn
+was imported.
+"""
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+
+from app.artifact import export_artifact
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "app" / "model" / "model.pkl"
+RUNS = 5
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import numpy as np
+from app.registry import read_model
+_, model = read_model(sys.argv[1])
+model.predict_proba(np.array([[5.1, 3.5, 1.4, 0.2]]))
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "sklearn": "sklearn" in sys.modules,
+}))
+"""
+
+
+def _probe(model_path: Path) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE, str(model_path)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = export_artifact(joblib.load(MODEL_PATH), Path(tmp) / "iris")
+        print(f"{'format':<10} {'load+first ms':>14} {'peak RSS MB':>12} {'sklearn':>8}")
+        for name, path in (("joblib", MODEL_PATH), ("manifest", artifact)):
+            runs = [_probe(path) for _ in range(RUNS)]
+            seconds = statistics.median(run["seconds"] for run in runs)
+            rss = statistics.median(run["max_rss_mb"] for run in runs)
+            print(f"{name:<10} {seconds * 1e3:>14.1f} {rss:>12.1f} {runs[0]['sklearn']!s:>8}")
+
+
+if __name__ == "__main__":
+    main()
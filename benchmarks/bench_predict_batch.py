@@ -0,0 +1,68 @@
+"""Benchmark per-item vs vectorized batch inference.
+
+Usage:
+    python -m benchmarks.bench_predict_batch
+"""
+import asyncio
+import time
+
+import joblib
+
+import app.main as main_module
+from app.schemas.predict_schema import IrisRequest
+
+BATCH_SIZES = [1, 10, 100, 1000]
+MIN_SECONDS = 0.5
+
+SAMPLE = IrisRequest(sepal_length=5.9, sepal_width=3.0, petal_length=4.2, petal_width=1.5)
+
+
+async def _rows_per_second(fn, payloads) -> float:
+    rows = 0
+    start = time.perf_counter()
+    while True:
+        await fn(payloads)
+        rows += len(payloads)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return rows / elapsed
+
+
+async def per_item(payloads):
+    return [await main_module._predict_single(p) for p in payloads]
+
+
+async def vectorized(payloads):
+    return await main_module._predict_many(payloads)
+
+
+def _with_fused(enabled: bool):
+    base = main_module.settings
+
+    def run(fn, payloads):
+        main_module.settings = base.model_copy(update={"fused_engine": enabled})
+        try:
+            return asyncio.run(_rows_per_second(fn, payloads))
+        finally:
+            main_module.settings = base
+
+    return run
+
+
+def main() -> None:
+    main_module.sk_model = joblib.load(main_module.MODEL_PATH)
+    sklearn_run, fused_run = _with_fused(False), _with_fused(True)
+    print(
+        f"{'batch':>6} {'per-item rows/s':>16} {'vectorized rows/s':>18} "
+        f"{'fused rows/s':>14} {'speedup':>8}"
+    )
+    for size in BATCH_SIZES:
+        payloads = [SAMPLE] * size
+        slow = sklearn_run(per_item, payloads)
+        fast = sklearn_run(vectorized, payloads)
+        fused = fused_run(vectorized, payloads)
+        print(f"{size:>6} {slow:>16,.0f} {fast:>18,.0f} {fused:>14,.0f} {fused / slow:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare batch response payload size and encode time across layouts.
+
+Usage:
+    python -m benchmarks.bench_serialization
+"""
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import app.main as main_module
+from app.schemas.predict_schema import IrisBatchResponse
+from app.serialization import encode_batch
+
+BATCH_SIZE = 1000
+MIN_SECONDS = 0.5
+
+
+def _time(fn) -> tuple[float, int]:
+    """Mean seconds per call and payload size in bytes."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        body = fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return elapsed / calls, len(body)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    proba = rng.dirichlet(np.ones(3), size=BATCH_SIZE)
+    names = main_module.meta.target_names
+
+    def pydantic_rows() -> bytes:
+        # Today's path: per-row models, then FastAPI's response_model encoding.
+        items = main_module._responses_from_proba(proba)
+        response = IrisBatchResponse(items=items, count=len(items))
+        return JSONResponse(jsonable_encoder(response)).body
+
+    cases = {
+        "pydantic rows (before)": pydantic_rows,
+        "orjson rows": lambda: encode_batch(proba, names, "rows", None).body,
+        "orjson rows top_k=1": lambda: encode_batch(proba, names, "rows", 1).body,
+        "orjson rows top_k=0": lambda: encode_batch(proba, names, "rows", 0).body,
+        "columnar": lambda: encode_batch(proba, names, "columnar", None).body,
+        "columnar top_k=1": lambda: encode_batch(proba, names, "columnar", 1).body,
+        "columnar top_k=0": lambda: encode_batch(proba, names, "columnar", 0).body,
+    }
+    print(f"batch size {BATCH_SIZE}")
+    print(f"{'format':<24} {'bytes':>9} {'encode ms':>10}")
+    for label, fn in cases.items():
+        seconds, size = _time(fn)
+        print(f"{label:<24} {size:>9,} {seconds * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure /predict throughput with 1, 2 and 4 uvicorn workers.
+
+Usage:
+    python -m benchmarks.bench_workers
+
+Each configuration is started with ``python -m app.serve`` (rate limiting
+disabled) and driven by concurrent httpx clients for a fixed duration.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+PORT = 8765
+WORKER_COUNTS = (1, 2, 4)
+CONCURRENCY = 64
+DURATION_S = 5.0
+PAYLOAD = {"sepal_length": 6.1, "sepal_width": 2.8, "petal_length": 4.7, "petal_width": 1.2}
+
+
+def _start_server(workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "ML_API_WORKERS": str(workers),
+        "ML_API_PORT": str(PORT),
+        "ML_API_RATE_LIMIT_ENABLED": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.serve"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _wait_ready(url: str, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def _drive(url: str) -> tuple[int, int]:
+    """Issue requests from CONCURRENCY clients; return (ok, failed) counts."""
+    ok = failed = 0
+    deadline = time.monotonic() + DURATION_S
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+
+        async def worker() -> None:
+            nonlocal ok, failed
+            while time.monotonic() < deadline:
+                response = await client.post("/predict", json=PAYLOAD)
+                if response.status_code == 200:
+                    ok += 1
+                else:
+                    failed += 1
+
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return ok, failed
+
+
+def main() -> None:
+    url = f"http://127.0.0.1:{PORT}"
+    print(f"{'workers':>8} {'req/s':>10} {'failed':>8}")
+    for workers in WORKER_COUNTS:
+        server = _start_server(workers)
+        try:
+            _wait_ready(url)
+            ok, failed = asyncio.run(_drive(url))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{workers:>8} {ok / DURATION_S:>10.0f} {failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Compare benchmark results with a saved baseline.
+
+Kept free of app imports so the regression rule can be tested on its own.
+"""
+import json
+from pathlib import Path
+
+Results = dict[str, float]
+
+
+def load_results(path: Path) -> Results:
+    """Read the ``results`` mapping written by ``benchmarks.suite --output``."""
+    return json.loads(path.read_text())["results"]
+
+
+def compare(results: Results, baseline: Results, max_regression: float) -> list[str]:
+    """Describe every benchmark slower than its baseline by more than ``max_regression``.
+
+    Benchmarks missing from either side are ignored, so adding or renaming one
+    does not fail the gate until a new baseline is saved.
+    """
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or base <= 0:
+            continue
+        change = seconds / base - 1
+        if change > max_regression:
+            regressions.append(
+                f"{name}: {base * 1e6:.1f} us -> {seconds * 1e6:.1f} us (+{change:.0%})"
+            )
+    return regressions
@@ -0,0 +1,202 @@
+"""Benchmark suite for the inference and HTTP hot paths, with a regression gate.
+
+Usage:
+    python -m benchmarks.suite [--output FILE] [--baseline FILE] [--max-regression 0.25]
+    make bench            # run, write JSON and compare with the saved baseline
+    make bench-baseline   # run and save the results as the new baseline
+
+Micro-benchmarks time the building blocks of a request (array building,
+schema validation, ``predict_proba``, response construction and encoding);
+end-to-end benchmarks drive ``/predict`` and ``/predict-batch`` through the
+ASGI app in-process at batch sizes 1/10/100/1000. Each result is the median
+seconds per call over several timed rounds. With ``--baseline``, the run
+fails if any benchmark is slower than the baseline by more than
+``--max-regression`` (a fraction, 0.25 = 25%).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+# Measure the code paths, not the protections in front of them.
+os.environ.setdefault("ML_API_RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ML_API_ADMISSION_MAX_IN_FLIGHT", "0")
+os.environ.setdefault("ML_API_LOG_SUCCESS_SAMPLE_RATE", "0")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import app.main as main_module  # noqa: E402
+from app.schemas.predict_schema import IrisBatchFeatures, IrisBatchRequest  # noqa: E402
+from app.serialization import encode_batch  # noqa: E402
+from benchmarks.regression import Results, compare, load_results  # noqa: E402
+
+BATCH_SIZES = (1, 10, 100, 1000)
+ROUNDS = 5
+ROUND_SECONDS = 0.2
+ITEM = {"sepal_length": 5.9, "sepal_width": 3.0, "petal_length": 4.2, "petal_width": 1.5}
+
+
+def _calibrate(fn: Callable[[], object]) -> int:
+    """Calls per round so that one round lasts about ROUND_SECONDS."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= ROUND_SECONDS / 10:
+            return max(1, int(calls * ROUND_SECONDS / elapsed))
+        calls *= 2
+
+
+def time_sync(fn: Callable[[], object]) -> float:
+    """Median seconds per call of ``fn`` over ROUNDS rounds."""
+    calls = _calibrate(fn)
+    rounds = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        rounds.append((time.perf_counter() - start) / calls)
+    return statistics.median(rounds)
+
+
+async def time_async(fn: Callable[[], Awaitable[object]]) -> float:
+    """Median seconds per call of the coroutine function ``fn``."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            await fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= ROUND_SECONDS / 10:
+            calls = max(1, int(calls * ROUND_SECONDS / elapsed))
+            break
+        calls *= 2
+    rounds = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await fn()
+        rounds.append((time.perf_counter() - start) / calls)
+    return statistics.median(rounds)
+
+
+def micro_benchmarks() -> Results:
+    rng = np.random.default_rng(0)
+    model = main_module._inference_model()
+    names = main_module.meta.target_names
+    results: Results = {}
+    for size in (1, 1000):
+        X = rng.uniform(0, 8, size=(size, 4))
+        results[f"micro.predict_proba.{size}"] = time_sync(lambda X=X: model.predict_proba(X))
+
+    body = {"items": [ITEM] * 100}
+    raw = json.dumps(body).encode()
+    payloads = IrisBatchRequest.model_validate(body).items
+    proba = model.predict_proba(rng.uniform(0, 8, size=(100, 4)))
+    big_proba = model.predict_proba(rng.uniform(0, 8, size=(1000, 4)))
+    results["micro.validate_request_model.100"] = time_sync(
+        lambda: IrisBatchRequest.model_validate(body)
+    )
+    results["micro.validate_features_json.100"] = time_sync(
+        lambda: IrisBatchFeatures.model_validate_json(raw)
+    )
+    results["micro.build_array.100"] = time_sync(lambda: main_module._features_to_array(payloads))
+    results["micro.build_responses.100"] = time_sync(
+        lambda: main_module._responses_from_proba(proba)
+    )
+    results["micro.encode_rows.1000"] = time_sync(
+        lambda: encode_batch(big_proba, names, "rows", None).body
+    )
+    results["micro.encode_columnar.1000"] = time_sync(
+        lambda: encode_batch(big_proba, names, "columnar", None).body
+    )
+    return results
+
+
+async def end_to_end_benchmarks() -> Results:
+    results: Results = {}
+    transport = httpx.ASGITransport(app=main_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def predict():
+            response = await client.post("/predict", json=ITEM)
+            response.raise_for_status()
+
+        results["e2e.predict.1"] = await time_async(predict)
+        for size in BATCH_SIZES:
+            body = json.dumps({"items": [ITEM] * size}).encode()
+
+            async def predict_batch(body=body):
+                response = await client.post(
+                    "/predict-batch",
+                    content=body,
+                    headers={"Content-Type": "application/json"},
+                )
+                response.raise_for_status()
+
+            results[f"e2e.predict_batch.{size}"] = await time_async(predict_batch)
+    return results
+
+
+async def run() -> Results:
+    """Run every benchmark with the model loaded as at startup."""
+    app = main_module.app
+    async with app.router.lifespan_context(app):
+        results = micro_benchmarks()
+        results.update(await end_to_end_benchmarks())
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, help="write results as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="compare with results in this file")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="allowed slowdown versus the baseline, as a fraction (default 0.25)",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run())
+    baseline: Results = {}
+    if args.baseline is not None and args.baseline.exists():
+        baseline = load_results(args.baseline)
+
+    print(f"{'benchmark':<36} {'us/call':>12} {'baseline':>12} {'change':>8}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        change = f"{seconds / base - 1:+.0%}" if base else ""
+        base_us = f"{base * 1e6:.1f}" if base else ""
+        print(f"{name:<36} {seconds * 1e6:>12.1f} {base_us:>12} {change:>8}")
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2))
+
+    if args.baseline is not None and not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run `make bench-baseline` to create one")
+    regressions = compare(results, baseline, args.max_regression)
+    if regressions:
+        print(f"\nRegressions beyond {args.max_regression:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,221 @@
-"""Load testing script for ml-api using Locust."""
-from locust import HttpUser, task, between
+"""Load testing scenarios for ml-api using Locust.
+
+Two ways to generate load:
+
+- ``--load-profile closed`` (default): the classic ``-u``/``-r``/``-t`` run where
+  each user thinks for 1-3 s between requests, so the request rate falls as
+  the server slows down.
+- ``--load-profile constant|step|spike``: open-loop arrivals. Each user fires
+  requests as a Poisson process of ``--user-rps``, independent of response
+  times, and :class:`LoadProfile` sizes the user pool so the total follows a
+  target request rate over time.
+
+Feature vectors are randomized, batch sizes are drawn from ``--batch-sizes``,
+and ``--summary-json`` writes p50/p95/p99 per endpoint when the run ends
+(``--csv`` gives Locust's own full percentile tables).
+"""
+import json
+import math
+import random
+import struct
+import time
+
+from locust import HttpUser, LoadTestShape, between, events, task
+from locust.runners import WorkerRunner
+
+# Observed range of each Iris feature, in cm.
+FEATURE_RANGES = {
+    "sepal_length": (4.3, 7.9),
+    "sepal_width": (2.0, 4.4),
+    "petal_length": (1.0, 6.9),
+    "petal_width": (0.1, 2.5),
+}
+PROFILES = ("closed", "constant", "step", "spike")
+SUMMARY_PERCENTILES = (0.50, 0.95, 0.99)
+think_time = between(1, 3)
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser):
+    group = parser.add_argument_group("ml-api load profile")
+    group.add_argument(
+        "--load-profile", choices=PROFILES, default="closed",
+        help="closed: -u/-r/-t with think time; otherwise open-loop at --target-rps",
+    )
+    group.add_argument(
+        "--target-rps", type=float, default=20,
+        help="requests per second for 'constant', and the base rate for 'step'/'spike'",
+    )
+    group.add_argument(
+        "--user-rps", type=float, default=2,
+        help="requests per second each open-loop user generates",
+    )
+    group.add_argument(
+        "--profile-duration", type=float, default=300,
+        help="seconds the 'constant' and 'spike' profiles run for",
+    )
+    group.add_argument("--step-rps", type=float, default=20, help="rate added at each step")
+    group.add_argument("--step-seconds", type=float, default=60, help="length of each step")
+    group.add_argument("--steps", type=int, default=5, help="number of steps")
+    group.add_argument("--spike-rps", type=float, default=200, help="rate during the spike")
+    group.add_argument(
+        "--spike-at", type=float, default=120, help="seconds into the run the spike starts"
+    )
+    group.add_argument("--spike-seconds", type=float, default=30, help="length of the spike")
+    group.add_argument(
+        "--batch-sizes", default="1:50,10:30,100:15,1000:5",
+        help="batch size distribution as size:weight pairs",
+    )
+    group.add_argument(
+        "--summary-json", default="",
+        help="write p50/p95/p99 per endpoint to this file when the run ends",
+    )
+
+
+def target_rate(options, elapsed: float) -> float | None:
+    """Requests per second the profile asks for ``elapsed`` s in; None once it ends."""
+    if options.load_profile == "step":
+        step = int(elapsed // options.step_seconds)
+        if step >= options.steps:
+            return None
+        return options.target_rps + step * options.step_rps
+    if elapsed >= options.profile_duration:
+        return None
+    if options.load_profile == "spike":
+        in_spike = options.spike_at <= elapsed < options.spike_at + options.spike_seconds
+        return options.spike_rps if in_spike else options.target_rps
+    return options.target_rps
+
+
+class LoadProfile(LoadTestShape):
+    """Run enough open-loop users to produce the profile's target rate."""
+
+    use_common_options = True
+
+    def tick(self):
+        options = self.runner.environment.parsed_options
+        if options.load_profile == "closed":
+            if options.run_time and self.get_run_time() >= options.run_time:
+                return None
+            return options.num_users or 1, options.spawn_rate
+        rate = target_rate(options, self.get_run_time())
+        if rate is None:
+            return None
+        users = max(1, math.ceil(rate / options.user_rps))
+        # Reach spikes and steps within a second rather than ramping into them.
+        return users, users
+
+
+def parse_batch_sizes(value: str) -> tuple[list[int], list[float]]:
+    """Parse ``"1:50,10:30"`` into batch sizes and their weights."""
+    sizes, weights = [], []
+    for pair in value.split(","):
+        size, _, weight = pair.partition(":")
+        sizes.append(int(size))
+        weights.append(float(weight or 1))
+    return sizes, weights
+
+
+def random_item() -> dict[str, float]:
+    return {
+        name: round(random.uniform(low, high), 2) for name, (low, high) in FEATURE_RANGES.items()
+    }
+
+
+def pack_float32(items: list[dict[str, float]]) -> bytes:
+    """Row-major little-endian float32 matrix, the raw /predict-batch body."""
+    values = [value for item in items for value in item.values()]
+    return struct.pack(f"<{len(values)}f", *values)
 
 
 class IrisAPIUser(HttpUser):
-    """Simulated user for load testing the Iris API."""
+    """Simulated client mixing single, batch (JSON and binary) and streamed predictions."""
 
-    wait_time = between(1, 3)
+    def on_start(self):
+        options = self.environment.parsed_options
+        self.sizes, self.weights = parse_batch_sizes(options.batch_sizes)
+        self.next_arrival = time.monotonic()
 
-    @task(3)
+    def wait_time(self):
+        options = self.environment.parsed_options
+        if options.load_profile == "closed":
+            return think_time(self)
+        # Exponential gaps make each user a Poisson source. If a slow response
+        # made us miss arrivals, start again from now rather than bursting.
+        now = time.monotonic()
+        self.next_arrival = max(self.next_arrival, now) + random.expovariate(options.user_rps)
+        return self.next_arrival - now
+
+    def batch(self) -> list[dict[str, float]]:
+        size = random.choices(self.sizes, self.weights)[0]
+        return [random_item() for _ in range(size)]
+
+    @task(6)
     def predict_single(self):
-        """Test single prediction endpoint."""
-        payload = {
-            "sepal_length": 5.1,
-            "sepal_width": 3.5,
-            "petal_length": 1.4,
-            "petal_width": 0.2,
-        }
-        self.client.post("/predict", json=payload)
+        self.client.post("/predict", json=random_item())
 
-    @task(1)
+    @task(3)
     def predict_batch(self):
-        """Test batch prediction endpoint."""
-        payloads = [
-            {
-                "sepal_length": 5.1,
-                "sepal_width": 3.5,
-                "petal_length": 1.4,
-                "petal_width": 0.2,
-            },
-            {
-                "sepal_length": 7.0,
-                "sepal_width": 3.2,
-                "petal_length": 4.7,
-                "petal_width": 1.4,
-            },
-            {
-                "sepal_length": 6.3,
-                "sepal_width": 3.3,
-                "petal_length": 6.0,
-                "petal_width": 2.5,
+        self.client.post("/predict-batch", json={"items": self.batch()})
+
+    @task(1)
+    def predict_batch_binary(self):
+        self.client.post(
+            "/predict-batch",
+            data=pack_float32(self.batch()),
+            headers={
+                "Content-Type": "application/octet-stream; dtype=float32",
+                "Accept": "application/octet-stream",
             },
-        ]
-        self.client.post("/predict-batch", json=payloads)
+            name="/predict-batch [binary]",
+        )
+
+    @task(1)
+    def predict_stream(self):
+        body = b"".join(json.dumps(item).encode() + b"\n" for item in self.batch())
+        with self.client.post(
+            "/predict-stream",
+            data=body,
+            headers={"Content-Type": "application/x-ndjson"},
+            catch_response=True,
+        ) as response:
+            # Rows are scored after the 200 is sent, so failures show up per line.
+            if response.ok and b'"detail"' in response.content:
+                response.failure("stream contained row errors")
 
     @task(1)
     def health_check(self):
-        """Test health endpoint."""
         self.client.get("/health")
 
     @task(1)
     def metrics(self):
-        """Test metrics endpoint."""
         self.client.get("/metrics")
 
+
+@events.quitting.add_listener
+def _write_summary(environment, **kwargs):
+    path = environment.parsed_options.summary_json
+    if not path or isinstance(environment.runner, WorkerRunner):
+        return
+    stats = environment.stats
+    entries = [*stats.entries.values(), stats.total]
+    summary = {
+        "profile": environment.parsed_options.load_profile,
+        "endpoints": [
+            {
+                "method": entry.method or "",
+                "name": entry.name,
+                "requests": entry.num_requests,
+                "failures": entry.num_failures,
+                "rps": round(entry.total_rps, 2),
+                "avg_ms": round(entry.avg_response_time, 1),
+                **{
+                    f"p{round(p * 100)}_ms": entry.get_response_time_percentile(p)
+                    for p in SUMMARY_PERCENTILES
+                },
+            }
+            for entry in entries
+        ],
+    }
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
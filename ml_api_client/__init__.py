@@ -0,0 +1,21 @@
+"""Python client for the ml-api Iris service.
+
+    from ml_api_client import Client
+
+    with Client("http://127.0.0.1:8000") as client:
+        client.predict({"sepal_length": 5.1, "sepal_width": 3.5,
+                        "petal_length": 1.4, "petal_width": 0.2})
+
+Individual ``predict()`` calls made close together, from several threads or
+tasks, are coalesced into one ``/predict-batch`` request. See
+:mod:`ml_api_client.client` for details.
+"""
+from ml_api_client.client import (
+    APIError,
+    AsyncClient,
+    Client,
+    Prediction,
+    RateLimitState,
+)
+
+__all__ = ["APIError", "AsyncClient", "Client", "Prediction", "RateLimitState"]
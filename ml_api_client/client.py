@@ -0,0 +1,461 @@
+"""Sync and async clients with keep-alive pools and client-side batching.
+
+Both clients keep one pooled ``httpx`` client open, so calls reuse
+connections instead of paying a TCP (and TLS) handshake each.
+
+``predict()`` does not send a request per call: calls are queued, and
+whatever arrives within ``batch_window_s`` of the first queued call (up to
+``max_batch_size`` rows) is sent as one ``/predict-batch`` request, each
+caller getting its own row back. While a batch is in flight new calls keep
+queueing, so batches grow with load. If the server rejects some rows of a
+batch, only those calls fail; the others are re-sent.
+
+Rate limits are honoured on both sides of a refusal: the ``RateLimit-*``
+headers of each response are tracked per path and a request that would
+exceed the remaining budget waits for the bucket to refill first, and 429 or
+503 responses are retried after their ``Retry-After``.
+"""
+import asyncio
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from concurrent.futures import Future
+from queue import Empty, SimpleQueue
+from typing import Any, NamedTuple
+
+import httpx
+
+FEATURE_NAMES = ("sepal_length", "sepal_width", "petal_length", "petal_width")
+MAX_BATCH_SIZE = 1000
+RETRY_STATUSES = (429, 503)
+
+Features = Mapping[str, float] | Sequence[float]
+
+
+class Prediction(NamedTuple):
+    predicted_class: str
+    class_index: int
+    confidence: float
+    probabilities: dict[str, float]
+
+
+class APIError(Exception):
+    """The API answered with an error status."""
+
+    def __init__(self, status_code: int, detail: Any, retry_after: float | None = None):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "APIError":
+        try:
+            detail = response.json().get("detail", response.text)
+        except ValueError:
+            detail = response.text
+        return cls(response.status_code, detail, _retry_after(response))
+
+
+class RateLimitState(NamedTuple):
+    """The last ``RateLimit-*`` headers seen for a path."""
+
+    limit: int
+    remaining: float
+    # Tokens per second, inferred from how long the bucket takes to refill.
+    # RateLimit-Reset is rounded up, so this errs on the slow side.
+    rate: float
+    observed_at: float
+
+    @classmethod
+    def from_headers(cls, headers: httpx.Headers, now: float) -> "RateLimitState | None":
+        try:
+            limit = int(headers["ratelimit-limit"])
+            remaining = float(headers["ratelimit-remaining"])
+            reset_s = float(headers["ratelimit-reset"])
+        except (KeyError, ValueError):
+            return None
+        rate = (limit - remaining) / reset_s if reset_s > 0 else float("inf")
+        return cls(limit, remaining, rate, now)
+
+    def wait_for(self, cost: int, now: float) -> float:
+        """Seconds until ``cost`` tokens should be available (0 if they are).
+
+        Costs above the whole limit are never waited for: the server refuses
+        them however long we wait.
+        """
+        if cost > self.limit or self.rate <= 0:
+            return 0.0
+        tokens = min(self.limit, self.remaining + (now - self.observed_at) * self.rate)
+        return max(0.0, (cost - tokens) / self.rate)
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _item(features: Features) -> dict[str, float]:
+    if isinstance(features, Mapping):
+        return {name: float(features[name]) for name in FEATURE_NAMES}
+    if len(features) != len(FEATURE_NAMES):
+        raise ValueError(f"Expected {len(FEATURE_NAMES)} features, got {len(features)}")
+    return dict(zip(FEATURE_NAMES, map(float, features), strict=True))
+
+
+def _predictions(response: httpx.Response, n_rows: int) -> list[Prediction]:
+    """The predictions of a successful /predict-batch response for ``n_rows`` rows.
+
+    Raises ValueError if the body is not one prediction per row.
+    """
+    try:
+        predictions = [Prediction(**item) for item in response.json()["items"]]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed /predict-batch response: {e!r}") from e
+    if len(predictions) != n_rows:
+        raise ValueError(f"Expected {n_rows} predictions, got {len(predictions)}")
+    return predictions
+
+
+def _set_result(future: Future | asyncio.Future, prediction: Prediction) -> None:
+    # The caller may have cancelled the future in the meantime.
+    if not future.done():
+        future.set_result(prediction)
+
+
+def _set_exception(future: Future | asyncio.Future, error: BaseException) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
+def _invalid_rows(error: APIError, n_rows: int) -> dict[int, APIError]:
+    """Per-row errors from a 422 on /predict-batch, keyed by row index.
+
+    Empty unless the error names specific rows, in which case the other rows
+    can be re-sent on their own.
+    """
+    if error.status_code != 422 or not isinstance(error.detail, list):
+        return {}
+    by_row: dict[int, list] = {}
+    for entry in error.detail:
+        loc = entry.get("loc", []) if isinstance(entry, dict) else []
+        if len(loc) < 3 or loc[:2] != ["body", "items"] or not isinstance(loc[2], int):
+            return {}
+        by_row.setdefault(loc[2], []).append({**entry, "loc": loc[3:]})
+    if not by_row or max(by_row) >= n_rows:
+        return {}
+    return {row: APIError(422, detail) for row, detail in by_row.items()}
+
+
+class _Base:
+    """Settings, rate-limit tracking and retry decisions shared by both clients."""
+
+    def __init__(
+        self,
+        api_key: str | None,
+        batch_window_s: float,
+        max_batch_size: int,
+        max_retries: int,
+        max_retry_wait_s: float,
+    ):
+        self.headers = {"X-API-Key": api_key} if api_key else {}
+        self.batch_window_s = batch_window_s
+        self.max_batch_size = min(max_batch_size, MAX_BATCH_SIZE)
+        self.max_retries = max_retries
+        self.max_retry_wait_s = max_retry_wait_s
+        self.rate_limits: dict[str, RateLimitState] = {}
+        self._lock = threading.Lock()
+
+    def _throttle_delay(self, path: str, cost: int) -> float:
+        state = self.rate_limits.get(path)
+        if state is None:
+            return 0.0
+        return min(state.wait_for(cost, time.monotonic()), self.max_retry_wait_s)
+
+    def _record(self, path: str, response: httpx.Response) -> None:
+        state = RateLimitState.from_headers(response.headers, time.monotonic())
+        if state is not None:
+            with self._lock:
+                self.rate_limits[path] = state
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float | None:
+        """Seconds to wait before retrying, or None to give up."""
+        if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        delay = _retry_after(response)
+        if delay is None:
+            delay = 0.1 * 2**attempt
+        return delay if delay <= self.max_retry_wait_s else None
+
+    def _chunks(self, rows: list[dict]) -> list[list[dict]]:
+        return [rows[i:i + self.max_batch_size] for i in range(0, len(rows), self.max_batch_size)]
+
+
+class Client(_Base):
+    """Blocking client; safe to share between threads.
+
+    Pass ``http`` to use your own ``httpx.Client`` (e.g. a test client).
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8000",
+        *,
+        api_key: str | None = None,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+        batch_window_s: float = 0.002,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_retries: int = 3,
+        max_retry_wait_s: float = 30.0,
+        http: httpx.Client | None = None,
+    ):
+        super().__init__(api_key, batch_window_s, max_batch_size, max_retries, max_retry_wait_s)
+        self._http = http or httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+        self._queue: SimpleQueue[tuple[dict, Future] | None] = SimpleQueue()
+        self._worker: threading.Thread | None = None
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Send any queued calls, then close the connection pool."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+        self._http.close()
+
+    def _request(self, method: str, path: str, cost: int = 1, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            if delay := self._throttle_delay(path, cost):
+                time.sleep(delay)
+            response = self._http.request(method, path, headers=self.headers, **kwargs)
+            self._record(path, response)
+            if response.is_success:
+                return response
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+        raise APIError.from_response(response)
+
+    def health(self) -> dict:
+        return self._request("GET", "/health").json()
+
+    def predict_many(self, rows: Sequence[Features]) -> list[Prediction]:
+        """Score rows in ``/predict-batch`` requests of at most ``max_batch_size``."""
+        results = []
+        for chunk in self._chunks([_item(row) for row in rows]):
+            response = self._request("POST", "/predict-batch", len(chunk), json={"items": chunk})
+            results.extend(_predictions(response, len(chunk)))
+        return results
+
+    def predict(self, features: Features) -> Prediction:
+        """Score one row, batched with concurrent calls from other threads."""
+        return self.predict_async(features).result()
+
+    def predict_async(self, features: Features) -> "Future[Prediction]":
+        """Queue one row for the next batch and return a future for its result."""
+        future: Future[Prediction] = Future()
+        self._queue.put((_item(features), future))
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="ml-api-client-batcher", daemon=True
+                )
+                self._worker.start()
+        return future
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window_s
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._send(batch)
+
+    def _send(self, batch: list[tuple[dict, Future]]) -> None:
+        # Every future must be resolved here: an exception escaping would end
+        # the batching thread and leave later predict() calls waiting forever.
+        try:
+            response = self._request(
+                "POST", "/predict-batch", len(batch), json={"items": [row for row, _ in batch]}
+            )
+            predictions = _predictions(response, len(batch))
+        except APIError as e:
+            if invalid := _invalid_rows(e, len(batch)):
+                for row, error in invalid.items():
+                    _set_exception(batch[row][1], error)
+                rest = [item for i, item in enumerate(batch) if i not in invalid]
+                if rest:
+                    self._send(rest)
+                return
+            for _, future in batch:
+                _set_exception(future, e)
+            return
+        except Exception as e:
+            for _, future in batch:
+                _set_exception(future, e)
+            return
+        for (_, future), prediction in zip(batch, predictions, strict=True):
+            _set_result(future, prediction)
+
+
+class AsyncClient(_Base):
+    """asyncio client; ``predict()`` calls from concurrent tasks share batches.
+
+    Use one instance per event loop. Pass ``http`` to use your own
+    ``httpx.AsyncClient`` (e.g. with an ``ASGITransport``).
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:8000",
+        *,
+        api_key: str | None = None,
+        timeout: float = 10.0,
+        max_connections: int = 10,
+        batch_window_s: float = 0.002,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_retries: int = 3,
+        max_retry_wait_s: float = 30.0,
+        http: httpx.AsyncClient | None = None,
+    ):
+        super().__init__(api_key, batch_window_s, max_batch_size, max_retries, max_retry_wait_s)
+        self._http = http or httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+        self._queue: asyncio.Queue[tuple[dict, asyncio.Future]] | None = None
+        self._worker: asyncio.Task | None = None
+        # Calls taken off the queue for the batch being collected; kept here,
+        # not in _run, so aclose() can still send them after cancelling it.
+        self._collecting: list[tuple[dict, asyncio.Future]] = []
+        self._inflight: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Send any queued calls, then close the connection pool."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        pending, self._collecting = self._collecting, []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for start in range(0, len(pending), self.max_batch_size):
+            await self._send(pending[start:start + self.max_batch_size])
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self._http.aclose()
+
+    async def _request(self, method: str, path: str, cost: int = 1, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            if delay := self._throttle_delay(path, cost):
+                await asyncio.sleep(delay)
+            response = await self._http.request(method, path, headers=self.headers, **kwargs)
+            self._record(path, response)
+            if response.is_success:
+                return response
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        raise APIError.from_response(response)
+
+    async def health(self) -> dict:
+        return (await self._request("GET", "/health")).json()
+
+    async def predict_many(self, rows: Sequence[Features]) -> list[Prediction]:
+        """Score rows in ``/predict-batch`` requests of at most ``max_batch_size``."""
+        results = []
+        for chunk in self._chunks([_item(row) for row in rows]):
+            response = await self._request(
+                "POST", "/predict-batch", len(chunk), json={"items": chunk}
+            )
+            results.extend(_predictions(response, len(chunk)))
+        return results
+
+    async def predict(self, features: Features) -> Prediction:
+        """Score one row, batched with concurrent calls from other tasks."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((_item(features), future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._collecting.append(await self._queue.get())
+            deadline = loop.time() + self.batch_window_s
+            while len(self._collecting) < self.max_batch_size:
+                try:
+                    self._collecting.append(
+                        await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                    )
+                except TimeoutError:
+                    break
+            # Send in the background and start collecting the next batch.
+            batch, self._collecting = self._collecting, []
+            task = loop.create_task(self._send(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            response = await self._request(
+                "POST", "/predict-batch", len(batch), json={"items": [row for row, _ in batch]}
+            )
+            predictions = _predictions(response, len(batch))
+        except APIError as e:
+            if invalid := _invalid_rows(e, len(batch)):
+                for row, error in invalid.items():
+                    _set_exception(batch[row][1], error)
+                rest = [item for i, item in enumerate(batch) if i not in invalid]
+                if rest:
+                    await self._send(rest)
+                return
+            for _, future in batch:
+                _set_exception(future, e)
+            return
+        except Exception as e:
+            for _, future in batch:
+                _set_exception(future, e)
+            return
+        for (_, future), prediction in zip(batch, predictions, strict=True):
+            _set_result(future, prediction)
@@ -1,5 +1,5 @@
-"""Demo script to test the /predict endpoint."""
-import requests
+"""Demo script to test the API with the Python client."""
+from ml_api_client import Client
 
 payload = {
     "sepal_length": 5.1,
@@ -7,5 +7,5 @@ payload = {
     "petal_length": 1.4,
     "petal_width": 0.2,
 }
-r = requests.post("http://127.0.0.1:8000/predict", json=payload, timeout=10)
-print(r.status_code, r.json())
+with Client("http://127.0.0.1:8000") as client:
+    print(client.predict(payload))
@@ -38,3 +38,10 @@ def client():
     """Provide a test client for the FastAPI app."""
     return TestClient(main_module.app)
 
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Start each test with a fresh rate-limit window."""
+    main_module.limiter.reset()
+    yield
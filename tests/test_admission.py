@@ -0,0 +1,105 @@
+"""Tests for admission control, load shedding and request deadlines."""
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+import app.main as main_module
+from app.admission import AdmissionController, DeadlineExceeded, Overloaded
+from app.batching import MicroBatcher
+
+ITEM = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestAdmissionController:
+    """Test suite for AdmissionController."""
+
+    async def test_sheds_beyond_queue_and_serves_fifo(self):
+        """Test that excess requests are rejected and queued ones get freed slots."""
+        controller = AdmissionController(max_in_flight=1, max_queue=1, retry_after_s=2)
+        await controller.acquire("/predict")
+        queued = asyncio.create_task(controller.acquire("/predict"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.acquire("/predict")
+        assert shed.value.status_code == 503
+        assert shed.value.headers == {"Retry-After": "2"}
+        controller.release()
+        await queued
+        assert controller.in_flight == 1
+
+    async def test_queued_request_expires_at_deadline(self):
+        """Test that a queued request gives up when its deadline passes."""
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        await controller.acquire("/predict")
+        with pytest.raises(DeadlineExceeded):
+            await controller.acquire("/predict", deadline=time.monotonic() + 0.01)
+        # The expired waiter no longer occupies the queue.
+        queued = asyncio.create_task(controller.acquire("/predict"))
+        await asyncio.sleep(0)
+        controller.release()
+        await queued
+
+    async def test_batcher_drops_expired_rows(self):
+        """Test that rows past their deadline are not scored by the micro-batcher."""
+        scored = []
+
+        async def score(X):
+            scored.append(len(X))
+            return X[:, 0].tolist()
+
+        batcher = MicroBatcher(score, max_wait_s=0.01, max_batch_size=8)
+        live, dead = await asyncio.gather(
+            batcher.submit(np.full(4, 1.0)),
+            batcher.submit(np.full(4, 2.0), deadline=time.monotonic() - 1),
+            return_exceptions=True,
+        )
+        await batcher.stop()
+        assert live == 1.0
+        assert isinstance(dead, DeadlineExceeded)
+        assert scored == [1]
+
+
+def test_overload_returns_503_with_retry_after(client, monkeypatch):
+    """Test that requests beyond the admission queue get a fast 503."""
+    monkeypatch.setattr(main_module.admission, "max_in_flight", 0)
+    monkeypatch.setattr(main_module.admission, "max_queue", 0)
+    before = _sample("requests_shed_total", endpoint="/predict")
+    response = client.post("/predict", json=ITEM)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert _sample("requests_shed_total", endpoint="/predict") == before + 1
+    # Other endpoints are not subject to admission control.
+    assert client.get("/health").status_code == 200
+
+
+def test_expired_deadline_never_reaches_model(client, monkeypatch):
+    """Test that work whose deadline has passed is dropped before predict_proba."""
+
+    class Untouchable:
+        def predict_proba(self, X):
+            raise AssertionError("model should not be called")
+
+    monkeypatch.setattr(main_module, "sk_model", Untouchable())
+    before = _sample("requests_deadline_expired_total", stage="predict")
+    response = client.post("/predict", json=ITEM, headers={"X-Deadline-Ms": "0"})
+    assert response.status_code == 504
+    assert _sample("requests_deadline_expired_total", stage="predict") == before + 1
+
+
+def test_generous_deadline_is_served(client):
+    """Test that requests within their deadline are answered normally."""
+    response = client.post("/predict", json=ITEM, headers={"X-Deadline-Ms": "5000"})
+    assert response.status_code == 200
+
+
+def test_invalid_deadline_rejected(client):
+    """Test that a malformed deadline header is a client error."""
+    response = client.post("/predict", json=ITEM, headers={"X-Deadline-Ms": "soon"})
+    assert response.status_code == 400
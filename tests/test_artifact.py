@@ -0,0 +1,95 @@
+"""Tests for the pickle-free model artifact format."""
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.artifact import export_artifact, is_artifact, load_artifact, manifest_path
+from app.config import Settings
+from app.registry import artifact_version
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    return export_artifact(main_module.sk_model, tmp_path / "iris", model_version="iris-v9")
+
+
+def test_artifact_matches_sklearn(artifact):
+    """Test that the exported artifact reproduces sklearn's probabilities."""
+    X = np.random.default_rng(0).uniform(0, 8, size=(50, 4))
+    model = load_artifact(artifact)
+    np.testing.assert_allclose(
+        model.predict_proba(X), main_module.sk_model.predict_proba(X), rtol=0, atol=1e-12
+    )
+    assert isinstance(model.weights.base, np.memmap)
+
+
+def test_artifact_float32_precision(artifact):
+    """Test that float32 loading works on the float64 stored arrays."""
+    model = load_artifact(artifact, precision="float32")
+    assert model.weights.dtype == np.float32
+
+
+def test_is_artifact(artifact):
+    """Test that directories and manifests are artifacts, pickles are not."""
+    assert is_artifact(artifact)
+    assert is_artifact(manifest_path(artifact))
+    assert not is_artifact(main_module.MODEL_PATH)
+
+
+def test_unknown_format_rejected(artifact):
+    """Test that a manifest from another format is refused."""
+    manifest = manifest_path(artifact)
+    manifest.write_text(json.dumps({**json.loads(manifest.read_text()), "format": "other"}))
+    with pytest.raises(ValueError, match="format"):
+        load_artifact(artifact)
+
+
+def test_unsupported_model_not_exported(tmp_path):
+    """Test that models the fused engine cannot express are refused."""
+    from sklearn.tree import DecisionTreeClassifier
+
+    model = DecisionTreeClassifier().fit([[0, 0, 0, 0], [1, 1, 1, 1]], [0, 1])
+    with pytest.raises(ValueError, match="cannot be exported"):
+        export_artifact(model, tmp_path / "tree")
+
+
+def test_serving_from_artifact_skips_sklearn(artifact):
+    """Test that the app serves an artifact without importing sklearn or joblib."""
+    code = f"""
+import sys
+from fastapi.testclient import TestClient
+import app.main as main_module
+main_module.settings = main_module.settings.model_copy(update={{"model_path": {str(artifact)!r}}})
+with TestClient(main_module.app) as client:
+    row = {{"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}}
+    assert client.post("/predict", json=row).json()["predicted_class"] == "setosa"
+print(sorted(m for m in sys.modules if m.split(".")[0] in ("sklearn", "joblib")))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_lifespan_loads_artifact(artifact, monkeypatch):
+    """Test that ML_API_MODEL_PATH may point at an artifact."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    monkeypatch.setattr(main_module, "settings", Settings(model_path=str(artifact)))
+    with TestClient(main_module.app) as client:
+        response = client.post(
+            "/predict-batch",
+            json={"items": [{"sepal_length": 6.3, "sepal_width": 3.3,
+                             "petal_length": 6.0, "petal_width": 2.5}]},
+        )
+    assert response.json()["items"][0]["predicted_class"] == "virginica"
+
+
+def test_reload_version_from_manifest(artifact):
+    """Test that hot-swapped artifacts report the version in their manifest."""
+    assert artifact_version(artifact) == "iris-v9"
@@ -0,0 +1,99 @@
+"""Tests for dynamic micro-batching of /predict."""
+import asyncio
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.batching import MicroBatcher
+from app.config import Settings
+
+
+def _row(value: float) -> np.ndarray:
+    return np.full(4, value)
+
+
+class TestMicroBatcher:
+    """Test suite for MicroBatcher."""
+
+    async def test_concurrent_rows_share_one_call(self):
+        """Test that concurrent submits are scored in a single call."""
+        calls = []
+
+        async def score(X):
+            calls.append(len(X))
+            return X[:, 0].tolist()
+
+        batcher = MicroBatcher(score, max_wait_s=0.05, max_batch_size=64)
+        results = await asyncio.gather(*(batcher.submit(_row(i)) for i in range(10)))
+        await batcher.stop()
+        assert results == list(range(10))
+        assert calls == [10]
+
+    async def test_max_batch_size_splits_batches(self):
+        """Test that batches never exceed max_batch_size."""
+        calls = []
+
+        async def score(X):
+            calls.append(len(X))
+            return X[:, 0].tolist()
+
+        batcher = MicroBatcher(score, max_wait_s=0.05, max_batch_size=4)
+        results = await asyncio.gather(*(batcher.submit(_row(i)) for i in range(10)))
+        await batcher.stop()
+        assert results == list(range(10))
+        assert max(calls) <= 4
+        assert sum(calls) == 10
+
+    async def test_stop_fails_partly_collected_batch(self):
+        """Test that rows in a batch still being formed are failed on stop."""
+
+        async def score(X):
+            return X[:, 0].tolist()
+
+        batcher = MicroBatcher(score, max_wait_s=10, max_batch_size=64)
+        pending = [asyncio.ensure_future(batcher.submit(_row(i))) for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert len(batcher._collecting) == 3
+        await batcher.stop()
+        results = await asyncio.wait_for(
+            asyncio.gather(*pending, return_exceptions=True), timeout=1
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def test_failing_row_does_not_fail_others(self):
+        """Test that an error is only delivered to the offending row."""
+
+        async def score(X):
+            if (X[:, 0] < 0).any():
+                raise ValueError("negative")
+            return X[:, 0].tolist()
+
+        batcher = MicroBatcher(score, max_wait_s=0.05, max_batch_size=64)
+        results = await asyncio.gather(
+            batcher.submit(_row(1)),
+            batcher.submit(_row(-1)),
+            batcher.submit(_row(2)),
+            return_exceptions=True,
+        )
+        await batcher.stop()
+        assert results[0] == 1
+        assert isinstance(results[1], ValueError)
+        assert results[2] == 2
+
+
+def test_predict_uses_microbatcher(monkeypatch):
+    """Test that /predict is routed through the batcher when enabled."""
+    monkeypatch.setattr(
+        main_module, "settings", Settings(microbatch_enabled=True, microbatch_max_wait_ms=1)
+    )
+    payload = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+    with TestClient(main_module.app) as client:
+        assert main_module.batcher is not None
+        response = client.post("/predict", json=payload)
+        metrics = client.get("/metrics").text
+    assert main_module.batcher is None
+    assert response.status_code == 200
+    assert response.json()["predicted_class"] == "setosa"
+    assert "microbatch_size_count" in metrics
+    assert "microbatch_queue_depth" in metrics
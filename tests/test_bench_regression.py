@@ -0,0 +1,23 @@
+import json
+
+from benchmarks.regression import compare, load_results
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"a": 1e-3, "b": 1e-3, "c": 1e-3}
+    results = {"a": 1.2e-3, "b": 1.3e-3, "c": 0.5e-3}
+    regressions = compare(results, baseline, max_regression=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
+    assert "+30%" in regressions[0]
+
+
+def test_compare_ignores_benchmarks_without_baseline():
+    assert compare({"new": 1.0}, {"old": 1e-6}, max_regression=0.0) == []
+    assert compare({"zero": 1.0}, {"zero": 0.0}, max_regression=0.0) == []
+
+
+def test_load_results_reads_suite_output(tmp_path):
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"python": "3.12", "machine": "x86_64", "results": {"a": 0.5}}))
+    assert load_results(path) == {"a": 0.5}
@@ -0,0 +1,171 @@
+"""Tests for binary input/output on /predict-batch."""
+import io
+import json
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.binary import JSON_MEDIA_TYPE, NPY_MEDIA_TYPE, OCTET_STREAM, negotiate
+from app.schemas.predict_schema import FEATURE_NAMES, IrisRequest, validate_feature_array
+
+ROWS = np.array(
+    [
+        [5.1, 3.5, 1.4, 0.2],
+        [5.9, 3.0, 4.2, 1.5],
+        [6.3, 3.3, 6.0, 2.5],
+    ]
+)
+
+
+def _npy(X: np.ndarray) -> bytes:
+    stream = io.BytesIO()
+    np.save(stream, X)
+    return stream.getvalue()
+
+
+class TestBinaryPredictBatch:
+    """Test suite for binary /predict-batch requests."""
+
+    def test_raw_float32_matches_json(self, client):
+        """Test that a raw float32 body scores like the JSON equivalent."""
+        response = client.post(
+            "/predict-batch",
+            content=ROWS.astype("<f4").tobytes(),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200
+        classes = [item["predicted_class"] for item in response.json()["items"]]
+        assert classes == ["setosa", "versicolor", "virginica"]
+
+    def test_raw_float64_binary_response(self, client):
+        """Test raw float64 in and out, with class names in a header."""
+        response = client.post(
+            "/predict-batch",
+            content=ROWS.astype("<f8").tobytes(),
+            headers={
+                "Content-Type": "application/octet-stream; dtype=float64",
+                "Accept": "application/octet-stream",
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Class-Names"] == "setosa,versicolor,virginica"
+        proba = np.frombuffer(response.content, dtype="<f8").reshape(len(ROWS), -1)
+        assert proba.argmax(axis=1).tolist() == [0, 1, 2]
+        np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+
+    def test_npy_round_trip(self, client):
+        """Test that .npy input can be answered with .npy output."""
+        response = client.post(
+            "/predict-batch",
+            content=_npy(ROWS.astype(np.float32)),
+            headers={"Content-Type": "application/x-npy", "Accept": "application/x-npy"},
+        )
+        assert response.status_code == 200
+        proba = np.load(io.BytesIO(response.content))
+        assert proba.dtype == np.float32
+        assert proba.shape == (3, 3)
+        assert proba.argmax(axis=1).tolist() == [0, 1, 2]
+
+    def test_truncated_body(self, client):
+        """Test that a body that is not whole rows is rejected."""
+        response = client.post(
+            "/predict-batch",
+            content=ROWS.astype("<f4").tobytes()[:-2],
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 400
+
+    def test_unsupported_dtype(self, client):
+        """Test that unknown dtype parameters return 415."""
+        response = client.post(
+            "/predict-batch",
+            content=b"\x00" * 16,
+            headers={"Content-Type": "application/octet-stream; dtype=int32"},
+        )
+        assert response.status_code == 415
+
+    def test_invalid_rows_report_indices(self, client):
+        """Test that out-of-range rows are reported by index."""
+        X = ROWS.copy()
+        X[1, 0] = 15.0
+        X[2, 3] = -1.0
+        response = client.post(
+            "/predict-batch",
+            content=X.astype("<f4").tobytes(),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 422
+        locs = [error["loc"] for error in response.json()["detail"]]
+        assert locs == [["body", 1], ["body", 2, "petal_width"]]
+
+    @pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+    def test_non_finite_values_return_422(self, client, value):
+        """Test that NaN/inf rows are rejected with a JSON-encodable 422."""
+        X = ROWS.copy()
+        X[0, 0] = value
+        response = client.post(
+            "/predict-batch",
+            content=X.astype("<f4").tobytes(),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 422
+        error = response.json()["detail"][0]
+        assert error["loc"][:2] == ["body", 0]
+        assert str(value) in json.dumps(error["input"])
+
+    @pytest.mark.parametrize("edit", [lambda b: b[:-8], lambda b: b + b"junk"])
+    def test_npy_with_wrong_data_length(self, client, edit):
+        """Test that truncated or padded .npy bodies are rejected with 400."""
+        response = client.post(
+            "/predict-batch",
+            content=edit(_npy(np.ones((5, 4), dtype=np.float32))),
+            headers={"Content-Type": "application/x-npy"},
+        )
+        assert response.status_code == 400
+
+    def test_accept_prefers_json_by_q_value(self, client):
+        """Test that a lower q-value binary type does not win over JSON."""
+        response = client.post(
+            "/predict-batch",
+            content=ROWS.astype("<f4").tobytes(),
+            headers={
+                "Content-Type": "application/octet-stream",
+                "Accept": "application/json, application/octet-stream;q=0.1",
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        (None, JSON_MEDIA_TYPE),
+        ("*/*", JSON_MEDIA_TYPE),
+        ("application/octet-stream", OCTET_STREAM),
+        ("application/x-npy;q=0.9, application/octet-stream;q=0.5", NPY_MEDIA_TYPE),
+        ("application/*;q=0.2, application/x-npy", NPY_MEDIA_TYPE),
+        ("text/html", JSON_MEDIA_TYPE),
+    ],
+)
+def test_negotiate(accept, expected):
+    """Test Accept header negotiation with q-values and wildcards."""
+    assert negotiate(accept, (JSON_MEDIA_TYPE, OCTET_STREAM, NPY_MEDIA_TYPE)) == expected
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_array_validation_matches_pydantic(seed):
+    """Test that array validation flags exactly the rows pydantic rejects."""
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(-1, 12, size=(500, 4))
+    X[rng.integers(0, 500, 10), rng.integers(0, 4, 10)] = np.nan
+    errors = validate_feature_array(X)
+    flagged = {error["loc"][1] for error in errors}
+    rejected = set()
+    for i, row in enumerate(X.tolist()):
+        try:
+            IrisRequest(**dict(zip(FEATURE_NAMES, row, strict=True)))
+        except ValidationError:
+            rejected.add(i)
+    assert flagged == rejected
@@ -0,0 +1,100 @@
+"""Tests for the offline bulk scoring CLI."""
+import io
+import json
+
+import pytest
+
+import app.main as main_module
+from app.bulk import main, score_stream
+
+ROWS = [
+    {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+    {"sepal_length": 6.1, "sepal_width": 2.8, "petal_length": 4.7, "petal_width": 1.2},
+    {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5},
+    {"sepal_length": 5.9, "sepal_width": 3.0, "petal_length": 5.1, "petal_width": 1.8},
+]
+
+
+def _ndjson(rows) -> bytes:
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+def _csv(rows) -> bytes:
+    # Columns in a different order, plus one the scorer ignores.
+    header = "id,petal_width,petal_length,sepal_width,sepal_length\n"
+    return (header + "".join(
+        f"{i},{r['petal_width']},{r['petal_length']},{r['sepal_width']},{r['sepal_length']}\n"
+        for i, r in enumerate(rows)
+    )).encode()
+
+
+def _score(data: bytes, input_format: str, **kwargs) -> tuple[list[dict], object]:
+    sink = io.BytesIO()
+    result = score_stream(
+        io.BytesIO(data), sink, input_format, main_module.MODEL_PATH, **kwargs
+    )
+    return [json.loads(line) for line in sink.getvalue().splitlines()], result
+
+
+@pytest.mark.parametrize("input_format", ["csv", "ndjson"])
+def test_bulk_output_matches_predict_batch(client, input_format):
+    """Test that each output line is the /predict-batch item for that row."""
+    data = _csv(ROWS) if input_format == "csv" else _ndjson(ROWS)
+    lines, result = _score(data, input_format, chunk_size=3)
+
+    expected = client.post("/predict-batch", json={"items": ROWS}).json()["items"]
+    assert lines == expected
+    assert (result.rows, result.invalid) == (len(ROWS), 0)
+
+
+def test_bulk_reports_invalid_rows_in_place():
+    """Test that bad rows yield line-numbered errors without failing the rest."""
+    data = (
+        _ndjson(ROWS[:1])
+        + b"not json\n"
+        + b"\n"
+        + _ndjson([{**ROWS[1], "petal_length": 50.0}])
+        + _ndjson(ROWS[2:3])
+    )
+    lines, result = _score(data, "ndjson")
+
+    assert [line.get("line") for line in lines] == [None, 2, 4, None]
+    assert lines[0]["predicted_class"] == "setosa"
+    assert lines[2]["detail"][0]["type"] == "value_error"
+    assert lines[3]["predicted_class"] == "virginica"
+    assert (result.rows, result.invalid) == (4, 2)
+
+
+def test_bulk_csv_parse_errors_count_header_line():
+    """Test that CSV errors report file line numbers, the header being line 1."""
+    data = _csv(ROWS[:2]) + b"9,abc,1.0,1.0,5.0\n"
+    lines, _ = _score(data, "csv")
+    assert lines[2]["line"] == 4
+    assert lines[2]["detail"][0]["loc"] == ["petal_width"]
+
+
+def test_bulk_csv_requires_feature_columns():
+    """Test that a CSV without every feature column is rejected up front."""
+    with pytest.raises(ValueError, match="petal_width"):
+        _score(b"sepal_length,sepal_width,petal_length\n1,2,3\n", "csv")
+
+
+def test_bulk_process_pool_keeps_input_order():
+    """Test that chunks scored across processes are written in input order."""
+    rows = [ROWS[i % len(ROWS)] for i in range(50)]
+    inline, _ = _score(_ndjson(rows), "ndjson", chunk_size=7)
+    pooled, result = _score(_ndjson(rows), "ndjson", chunk_size=7, workers=2)
+    assert pooled == inline
+    assert result.rows == 50
+
+
+def test_bulk_cli_writes_output_and_reports_throughput(tmp_path, capsys):
+    """Test the command line entry point end to end."""
+    source = tmp_path / "rows.csv"
+    source.write_bytes(_csv(ROWS))
+    out = tmp_path / "scores.ndjson"
+
+    main([str(source), str(out), "--workers", "1"])
+
+    assert len(out.read_bytes().splitlines()) == len(ROWS)
+    assert "Scored 4 rows (0 invalid)" in capsys.readouterr().err
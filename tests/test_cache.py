@@ -0,0 +1,99 @@
+"""Tests for the prediction cache."""
+import numpy as np
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.cache import PredictionCache
+from app.config import Settings
+
+
+class CountingModel:
+    """Fake scorer that records how many rows it was asked to score."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, X):
+        self.calls.append(len(X))
+        return np.column_stack([X[:, 0], 1 - X[:, 0]])
+
+
+async def test_duplicate_rows_scored_once():
+    """Test that repeated rows within a batch are deduplicated."""
+    cache = PredictionCache(max_size=10, ttl_s=60)
+    compute = CountingModel()
+    X = np.array([[0.1, 1, 1, 1], [0.2, 1, 1, 1], [0.1, 1, 1, 1]])
+    proba = await cache.get_or_compute(X, "model", "v1", compute)
+    assert compute.calls == [2]
+    np.testing.assert_allclose(proba[:, 0], [0.1, 0.2, 0.1])
+
+
+async def test_hits_skip_inference():
+    """Test that cached rows are not scored again."""
+    cache = PredictionCache(max_size=10, ttl_s=60)
+    compute = CountingModel()
+    await cache.get_or_compute(np.array([[0.1, 1, 1, 1]]), "model", "v1", compute)
+    proba = await cache.get_or_compute(
+        np.array([[0.1, 1, 1, 1], [0.3, 1, 1, 1]]), "model", "v1", compute
+    )
+    assert compute.calls == [1, 1]
+    np.testing.assert_allclose(proba[:, 0], [0.1, 0.3])
+
+
+async def test_lru_eviction():
+    """Test that the least recently used entry is evicted past max_size."""
+    cache = PredictionCache(max_size=2, ttl_s=60)
+    compute = CountingModel()
+    for value in (0.1, 0.2, 0.1, 0.3):
+        await cache.get_or_compute(np.array([[value, 1, 1, 1]]), "m", "v1", compute)
+    assert len(cache) == 2
+    await cache.get_or_compute(np.array([[0.1, 1, 1, 1]]), "m", "v1", compute)
+    await cache.get_or_compute(np.array([[0.2, 1, 1, 1]]), "m", "v1", compute)
+    assert compute.calls == [1, 1, 1, 1]
+
+
+async def test_ttl_expiry(monkeypatch):
+    """Test that expired entries are scored again."""
+    now = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(max_size=10, ttl_s=5)
+    compute = CountingModel()
+    X = np.array([[0.1, 1, 1, 1]])
+    await cache.get_or_compute(X, "m", "v1", compute)
+    now[0] += 10
+    await cache.get_or_compute(X, "m", "v1", compute)
+    assert compute.calls == [1, 1]
+
+
+async def test_model_change_and_version_invalidate():
+    """Test that a new model object or version does not reuse old entries."""
+    cache = PredictionCache(max_size=10, ttl_s=60)
+    compute = CountingModel()
+    X = np.array([[0.1, 1, 1, 1]])
+    await cache.get_or_compute(X, "m1", "v1", compute)
+    await cache.get_or_compute(X, "m1", "v2", compute)
+    await cache.get_or_compute(X, "m2", "v2", compute)
+    assert compute.calls == [1, 1, 1]
+
+
+async def test_quantization_shares_entries():
+    """Test that readings within one quantum share a cache entry."""
+    cache = PredictionCache(max_size=10, ttl_s=60, quantum=0.1)
+    compute = CountingModel()
+    X = np.array([[5.11, 3.5, 1.4, 0.2], [5.09, 3.5, 1.4, 0.2]])
+    await cache.get_or_compute(X, "m", "v1", compute)
+    assert compute.calls == [1]
+
+
+def test_cache_metrics_exported(monkeypatch):
+    """Test that the batch path uses the cache and exports hit/miss counters."""
+    monkeypatch.setattr(main_module, "settings", Settings(prediction_cache_size=100))
+    item = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+    with TestClient(main_module.app) as client:
+        assert main_module.cache is not None
+        first = client.post("/predict-batch", json={"items": [item, item]}).json()
+        second = client.post("/predict", json=item).json()
+        metrics = client.get("/metrics").text
+    assert first["items"][0]["confidence"] == second["confidence"]
+    for name in ("pred_cache_hits_total", "pred_cache_misses_total", "pred_cache_evictions_total"):
+        assert name in metrics
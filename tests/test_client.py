@@ -0,0 +1,150 @@
+"""Tests for the ml_api_client SDK."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.config import Settings
+from ml_api_client import APIError, AsyncClient, Client, RateLimitState
+
+ROWS = [
+    {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+    {"sepal_length": 6.1, "sepal_width": 2.8, "petal_length": 4.7, "petal_width": 1.2},
+    {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5},
+]
+BAD_ROW = {**ROWS[0], "petal_length": 50.0}
+PREDICTION = {
+    "predicted_class": "setosa",
+    "class_index": 0,
+    "confidence": 1.0,
+    "probabilities": {"setosa": 1.0, "versicolor": 0.0, "virginica": 0.0},
+}
+
+
+@pytest.fixture
+def served_app(monkeypatch):
+    """Restore the model globals the lifespan replaces."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    monkeypatch.setattr(main_module, "settings", Settings())
+    return main_module.app
+
+
+def _counting(requests: list):
+    async def hook(request):
+        requests.append(request.url.path)
+    return hook
+
+
+async def test_async_predict_calls_are_coalesced(served_app):
+    """Test that concurrent predict() calls share one /predict-batch request."""
+    sent = []
+    http = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=served_app),
+        base_url="http://test",
+        event_hooks={"request": [_counting(sent)]},
+    )
+    async with served_app.router.lifespan_context(served_app):
+        async with AsyncClient(http=http, batch_window_s=0.05) as client:
+            rows = [ROWS[i % 3] for i in range(30)]
+            predictions = await asyncio.gather(*(client.predict(row) for row in rows))
+            expected = await client.predict_many(rows)
+    assert predictions == expected
+    assert [p.predicted_class for p in predictions[:3]] == ["setosa", "versicolor", "virginica"]
+    assert sent == ["/predict-batch", "/predict-batch"]
+
+
+async def test_async_invalid_row_fails_only_its_caller(served_app):
+    """Test that a 422 for one row does not fail the rows batched with it."""
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=served_app), base_url="http://test")
+    async with served_app.router.lifespan_context(served_app):
+        async with AsyncClient(http=http, batch_window_s=0.05) as client:
+            good, bad = await asyncio.gather(
+                client.predict(ROWS[0]), client.predict(BAD_ROW), return_exceptions=True
+            )
+    assert good.predicted_class == "setosa"
+    assert isinstance(bad, APIError)
+    assert bad.status_code == 422
+
+
+async def test_aclose_sends_the_batch_being_collected(served_app):
+    """Test that calls still inside the batch window are sent, not lost, on aclose()."""
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=served_app), base_url="http://test")
+    async with served_app.router.lifespan_context(served_app):
+        client = AsyncClient(http=http, batch_window_s=10)
+        calls = [asyncio.create_task(client.predict(row)) for row in ROWS]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(client.aclose(), timeout=5)
+        predictions = await asyncio.wait_for(asyncio.gather(*calls), timeout=1)
+    assert [p.predicted_class for p in predictions] == ["setosa", "versicolor", "virginica"]
+
+
+def test_sync_client_coalesces_threads(served_app):
+    """Test the thread-safe client over a TestClient."""
+    sent = []
+    with TestClient(served_app) as http:
+        http.event_hooks["request"] = [lambda r: sent.append(r.url.path)]
+        with Client(http=http, batch_window_s=0.05, max_batch_size=2) as client:
+            with ThreadPoolExecutor(4) as pool:
+                predictions = list(pool.map(client.predict, [list(r.values()) for r in ROWS]))
+            many = client.predict_many(ROWS)
+            with pytest.raises(APIError) as excinfo:
+                client.predict(BAD_ROW)
+    assert predictions == many
+    assert excinfo.value.status_code == 422
+    # Three threads fit in two batches of two; predict_many chunks the same way.
+    assert sent.count("/predict-batch") == 5
+
+
+def test_retries_after_retry_after():
+    """Test that 429 and 503 responses are retried after Retry-After."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"detail": "slow down"})
+        return httpx.Response(200, json={"status": "ok"})
+
+    with Client(http=httpx.Client(transport=httpx.MockTransport(handler), base_url="http://t")) as c:
+        assert c.health() == {"status": "ok"}
+        assert len(calls) == 3
+        calls.clear()
+        c.max_retries = 1
+        with pytest.raises(APIError) as excinfo:
+            c.health()
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after == 0
+
+
+@pytest.mark.parametrize("body", [{"items": []}, {"results": []}, [1, 2]])
+def test_malformed_batch_response_fails_only_that_batch(body):
+    """Test that a bad 200 body fails its callers without stopping the batcher."""
+    bodies = [body, {"items": [PREDICTION]}]
+
+    def handler(request):
+        return httpx.Response(200, json=bodies.pop(0))
+
+    http = httpx.Client(transport=httpx.MockTransport(handler), base_url="http://t")
+    with Client(http=http, batch_window_s=0) as c:
+        with pytest.raises(ValueError):
+            c.predict(ROWS[0])
+        assert c.predict(ROWS[0]).predicted_class == "setosa"
+
+
+def test_rate_limit_state_wait_for():
+    """Test the refill estimate derived from RateLimit-* headers."""
+    headers = httpx.Headers(
+        {"RateLimit-Limit": "100", "RateLimit-Remaining": "0", "RateLimit-Reset": "10"}
+    )
+    state = RateLimitState.from_headers(headers, now=0.0)
+    assert state.rate == 10.0
+    assert state.wait_for(20, now=0.0) == 2.0
+    assert state.wait_for(20, now=1.0) == 1.0
+    assert state.wait_for(20, now=5.0) == 0.0
+    # Requests larger than the whole bucket are not waited for.
+    assert state.wait_for(500, now=0.0) == 0.0
+    assert RateLimitState.from_headers(httpx.Headers(), now=0.0) is None
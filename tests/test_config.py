@@ -0,0 +1,35 @@
+"""Tests for environment-driven settings."""
+import pytest
+
+from app.config import Settings, load_settings
+
+
+@pytest.mark.parametrize(
+    ("environ", "expected"),
+    [
+        ({}, Settings()),
+        (
+            {"ML_API_MICROBATCH_ENABLED": "true", "ML_API_MICROBATCH_MAX_SIZE": "8"},
+            Settings(microbatch_enabled=True, microbatch_max_size=8),
+        ),
+    ],
+)
+def test_load_settings_from_environ(environ, expected):
+    """Test that ML_API_* variables populate Settings."""
+    assert load_settings(environ) == expected
+
+
+def test_latency_buckets_from_environ():
+    """Test that latency buckets can be configured as a comma-separated list."""
+    settings = load_settings({"ML_API_LATENCY_BUCKETS": "0.01, 0.1,1"})
+    assert settings.latency_buckets == (0.01, 0.1, 1.0)
+
+
+def test_rate_limits_from_environ():
+    """Test that rate limits can be given as JSON objects."""
+    settings = load_settings({
+        "ML_API_RATE_LIMITS": '{"/predict": "5/second"}',
+        "ML_API_API_KEY_RATE_LIMITS": '{"k": {"/predict": "50/second"}}',
+    })
+    assert settings.rate_limits == {"/predict": "5/second"}
+    assert settings.api_key_rate_limits == {"k": {"/predict": "50/second"}}
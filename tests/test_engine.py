@@ -0,0 +1,85 @@
+"""Tests for the fused NumPy inference engine."""
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+import app.main as main_module
+from app.engine import FusedLinearModel, compile_model
+
+
+@pytest.fixture(scope="module")
+def iris():
+    return load_iris(return_X_y=True)
+
+
+def test_fused_matches_shipped_model(iris):
+    """Test that the compiled shipped model matches sklearn predict_proba."""
+    X, _ = iris
+    fused = compile_model(main_module.sk_model)
+    assert isinstance(fused, FusedLinearModel)
+    np.testing.assert_allclose(
+        fused.predict_proba(X), main_module.sk_model.predict_proba(X), rtol=0, atol=1e-12
+    )
+
+
+def test_float32_precision(iris):
+    """Test that float32 mode stays close to sklearn and computes in float32."""
+    X, _ = iris
+    fused = compile_model(main_module.sk_model, precision="float32")
+    proba = fused.predict_proba(X)
+    assert proba.dtype == np.float32
+    np.testing.assert_allclose(proba, main_module.sk_model.predict_proba(X), atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "scaler",
+    [StandardScaler(with_mean=False), StandardScaler(with_std=False)],
+)
+def test_scaler_options(iris, scaler):
+    """Test folding scalers that skip centering or scaling."""
+    X, y = iris
+    pipe = Pipeline([("scaler", scaler), ("clf", LogisticRegression(max_iter=1000))]).fit(X, y)
+    np.testing.assert_allclose(compile_model(pipe).predict_proba(X), pipe.predict_proba(X), atol=1e-12)
+
+
+def test_binary_logistic_regression(iris):
+    """Test the sigmoid path for two-class models."""
+    X, y = iris
+    clf = LogisticRegression(max_iter=1000).fit(X, y == 0)
+    np.testing.assert_allclose(compile_model(clf).predict_proba(X), clf.predict_proba(X), atol=1e-12)
+
+
+@pytest.mark.skipif(
+    "multi_class" not in LogisticRegression().get_params(),
+    reason="multi_class was removed from LogisticRegression in this sklearn version",
+)
+def test_binary_multinomial_logistic_regression(iris):
+    """Test binary models fitted with multi_class='multinomial' (softmax of [-d, d])."""
+    X, y = iris
+    clf = LogisticRegression(multi_class="multinomial", max_iter=1000).fit(X, y == 0)
+    np.testing.assert_allclose(compile_model(clf).predict_proba(X), clf.predict_proba(X), atol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        Pipeline([("scaler", MinMaxScaler()), ("clf", LogisticRegression(max_iter=500))]),
+        RandomForestClassifier(n_estimators=5, random_state=0),
+    ],
+)
+def test_unsupported_models_fall_back(iris, model):
+    """Test that unsupported models are returned unchanged."""
+    X, y = iris
+    model.fit(X, y)
+    assert compile_model(model) is model
+
+
+def test_wrong_feature_count_raises():
+    """Test that the fused model still rejects malformed input."""
+    fused = compile_model(main_module.sk_model)
+    with pytest.raises(ValueError):
+        fused.predict_proba(np.ones((1, 3)))
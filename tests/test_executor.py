@@ -0,0 +1,103 @@
+"""Tests for the inference executor."""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.admission import DeadlineExceeded
+from app.config import Settings
+from app.executor import InferenceExecutor
+
+
+async def test_inline_runs_on_event_loop_thread():
+    """Test that inline mode calls the function directly."""
+    executor = InferenceExecutor("inline")
+    assert await executor.run(threading.get_ident) == threading.get_ident()
+
+
+async def test_thread_mode_keeps_event_loop_free():
+    """Test that a slow call in thread mode does not block the loop."""
+    executor = InferenceExecutor("thread", max_workers=1)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    tick_task = asyncio.create_task(ticker())
+    await executor.run(time.sleep, 0.1)
+    tick_task.cancel()
+    executor.shutdown()
+    assert ticks > 5
+
+
+async def test_thread_mode_bounds_concurrency():
+    """Test that no more than max_workers calls run at once."""
+    executor = InferenceExecutor("thread", max_workers=2)
+    lock = threading.Lock()
+    active = peak = 0
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*(executor.run(work) for _ in range(8)))
+    executor.shutdown()
+    assert peak == 2
+
+
+async def test_deadline_expires_while_waiting_for_a_slot():
+    """Test that a call queued behind a busy pool is dropped once its deadline passes."""
+    executor = InferenceExecutor("thread", max_workers=1)
+    ran = []
+    busy = asyncio.create_task(executor.run(time.sleep, 0.3))
+    await asyncio.sleep(0.01)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        await executor.run(ran.append, 1, deadline=start + 0.05)
+    assert time.monotonic() - start < 0.2
+    await busy
+    # A call whose deadline has not passed still runs.
+    await executor.run(ran.append, 2, deadline=time.monotonic() + 1)
+    executor.shutdown()
+    assert ran == [2]
+
+
+async def test_warm_up_starts_every_process_worker():
+    """Test that warm_up runs the call once on each pool worker before serving."""
+    executor = InferenceExecutor("process", max_workers=2)
+    try:
+        pids = await executor.warm_up(abs, -1)
+    finally:
+        executor.shutdown()
+    assert len(pids) == 2
+    assert await InferenceExecutor("inline").warm_up(abs, -1) == set()
+
+
+def test_predict_with_process_executor(monkeypatch):
+    """Test /predict and /predict-batch through a process pool."""
+    monkeypatch.setattr(
+        main_module,
+        "settings",
+        Settings(inference_executor="process", inference_workers=1),
+    )
+    payload = {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5}
+    with TestClient(main_module.app) as client:
+        single = client.post("/predict", json=payload)
+        batch = client.post("/predict-batch", json={"items": [payload, payload]})
+        metrics = client.get("/metrics").text
+    assert single.status_code == 200
+    assert single.json()["predicted_class"] == "virginica"
+    assert batch.json()["count"] == 2
+    assert "inference_executor_capacity 1.0" in metrics
+    assert main_module.executor.mode == "inline"
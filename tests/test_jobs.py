@@ -0,0 +1,168 @@
+"""Tests for the asynchronous /jobs API."""
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import app.main as main_module
+from app.config import Settings
+from app.jobs import JobManager, JobQueueFull
+
+ROWS = [
+    {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+    {"sepal_length": 6.1, "sepal_width": 2.8, "petal_length": 4.7, "petal_width": 1.2},
+    {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5},
+]
+
+
+@pytest.fixture
+def jobs_app(monkeypatch, tmp_path):
+    """Spill jobs to a temporary directory in small chunks."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    monkeypatch.setattr(
+        main_module, "settings", Settings(jobs_dir=str(tmp_path), jobs_chunk_size=7)
+    )
+    return tmp_path
+
+
+def _wait_for(client, job_id: str) -> dict:
+    for _ in range(500):
+        info = client.get(f"/jobs/{job_id}").json()
+        if info["status"] in ("succeeded", "failed"):
+            return info
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish: {info}")
+
+
+def test_job_results_match_predict_batch(jobs_app):
+    """Test that a job scores every row and pages match /predict-batch."""
+    rows = [ROWS[i % len(ROWS)] for i in range(25)]
+    with TestClient(main_module.app) as client:
+        submitted = client.post("/jobs", json={"items": rows})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        info = _wait_for(client, job_id)
+        first = client.get(f"/jobs/{job_id}/results", params={"limit": 10}).json()
+        last = client.get(f"/jobs/{job_id}/results", params={"offset": 20, "limit": 10}).json()
+        expected = client.post("/predict-batch", json={"items": rows}).json()["items"]
+
+    assert info["status"] == "succeeded"
+    assert info["rows"] == info["rows_done"] == 25
+    assert info["model_version"] == "iris-logreg-v1"
+    assert info["rows_per_s"] > 0
+    assert first["items"] == expected[:10]
+    assert (first["count"], first["offset"], first["next_offset"], first["total"]) == (10, 0, 10, 25)
+    assert last["items"] == expected[20:]
+    assert last["next_offset"] is None
+    assert not (jobs_app / job_id / "features.npy").exists()
+
+
+def test_job_accepts_binary_body_and_columnar_pages(jobs_app):
+    """Test binary submissions and the columnar result layout."""
+    X = np.array([[r[name] for name in r] for r in ROWS], dtype="<f4")
+    with TestClient(main_module.app) as client:
+        job_id = client.post(
+            "/jobs", content=X.tobytes(), headers={"Content-Type": "application/octet-stream"}
+        ).json()["job_id"]
+        _wait_for(client, job_id)
+        page = client.get(f"/jobs/{job_id}/results", params={"layout": "columnar"}).json()
+    assert page["classes"] == ["setosa", "versicolor", "virginica"]
+    assert page["class_index"] == [0, 1, 2]
+    assert page["count"] == 3
+
+
+def test_job_rejects_invalid_rows(jobs_app):
+    """Test that rows are validated before a job is queued."""
+    with TestClient(main_module.app) as client:
+        response = client.post("/jobs", json={"items": [{**ROWS[0], "petal_length": 50.0}]})
+        empty = client.post("/jobs", json={"items": []})
+    assert response.status_code == 422
+    assert empty.status_code == 400
+
+
+def test_large_json_jobs_must_be_binary(jobs_app, monkeypatch):
+    """Test that JSON bodies over jobs_max_json_bytes get 413 while binary ones pass."""
+    monkeypatch.setattr(
+        main_module,
+        "settings",
+        main_module.settings.model_copy(update={"jobs_max_json_bytes": 1000}),
+    )
+    rows = [ROWS[i % len(ROWS)] for i in range(20)]
+    X = np.array([[r[name] for name in r] for r in rows], dtype="<f4")
+    with TestClient(main_module.app) as client:
+        response = client.post("/jobs", json={"items": rows})
+        binary = client.post(
+            "/jobs", content=X.tobytes(), headers={"Content-Type": "application/octet-stream"}
+        )
+    assert response.status_code == 413
+    assert "binary" in response.json()["detail"]
+    assert binary.status_code == 202
+
+
+def test_unknown_and_unfinished_jobs(jobs_app):
+    """Test 404 for unknown, malformed and deleted job ids."""
+    with TestClient(main_module.app) as client:
+        assert client.get("/jobs/" + "0" * 32).status_code == 404
+        assert client.get("/jobs/not-a-job").status_code == 404
+        job_id = client.post("/jobs", json={"items": ROWS}).json()["job_id"]
+        _wait_for(client, job_id)
+        assert client.delete(f"/jobs/{job_id}").status_code == 204
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+
+
+def _parsed(endpoint: str) -> float:
+    labels = {"endpoint": endpoint, "stage": "parse"}
+    return REGISTRY.get_sample_value("pred_stage_duration_seconds_count", labels) or 0.0
+
+
+def test_jobs_metrics_exposed(jobs_app):
+    """Test that job counters appear in /metrics and job stages are labelled as such."""
+    parsed = {endpoint: _parsed(endpoint) for endpoint in ("jobs", "predict-batch")}
+    with TestClient(main_module.app) as client:
+        _wait_for(client, client.post("/jobs", json={"items": ROWS}).json()["job_id"])
+        body = client.get("/metrics").text
+    for name in ("jobs_total", "jobs_queued", "job_rows_pending", "job_rows_scored_total",
+                 "job_throughput_rows_per_second"):
+        assert name in body
+    assert _parsed("jobs") == parsed["jobs"] + 1
+    assert _parsed("predict-batch") == parsed["predict-batch"]
+
+
+class TestJobManager:
+    async def test_queue_full_and_failed_job(self, tmp_path):
+        """Test queue bounds and that scoring errors fail the job."""
+
+        async def broken(X):
+            raise ValueError("boom")
+
+        manager = JobManager(tmp_path, broken, lambda: "v", max_queued=1)
+        info = await manager.submit(np.ones((3, 4)))
+        with pytest.raises(JobQueueFull):
+            await manager.submit(np.ones((3, 4)))
+        manager.start()
+        for _ in range(100):
+            if manager.info(info.job_id).status == "failed":
+                break
+            await asyncio.sleep(0.01)
+        await manager.stop()
+        failed = manager.info(info.job_id)
+        assert failed.status == "failed"
+        assert failed.error == "boom"
+
+    async def test_stop_fails_unfinished_jobs_and_sweep_removes_old(self, tmp_path):
+        """Test shutdown bookkeeping and expiry of finished jobs."""
+
+        async def score(X):
+            return np.zeros((len(X), 3))
+
+        manager = JobManager(tmp_path, score, lambda: "v", ttl_s=0.01)
+        info = await manager.submit(np.ones((3, 4)))
+        await manager.stop()
+        assert manager.info(info.job_id).status == "failed"
+        time.sleep(0.02)
+        manager.sweep()
+        assert not (tmp_path / info.job_id).exists()
@@ -0,0 +1,63 @@
+"""Tests for queued, sampled structured logging."""
+import io
+import json
+import logging
+
+import pytest
+
+from app import logging_config
+from app.logging_config import JSONFormatter, configure_logging, shutdown_logging
+
+ITEM = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    configure_logging()
+
+
+def test_json_formatter_includes_request_fields():
+    """Test that request_id and duration passed via extra reach the JSON output."""
+    record = logging.LogRecord("app.request", logging.INFO, __file__, 1, "GET /", None, None)
+    record.request_id = "abc123"
+    record.duration_ms = 1.5
+    data = json.loads(JSONFormatter().format(record))
+    assert data["request_id"] == "abc123"
+    assert data["duration_ms"] == 1.5
+    assert "status_code" not in data
+
+
+def test_records_written_by_background_thread(restore_logging):
+    """Test that records are queued and written as JSON by the listener."""
+    stream = io.StringIO()
+    configure_logging(stream=stream)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("test").exception("failed %s", "here", extra={"request_id": "r1"})
+    shutdown_logging()
+    data = json.loads(stream.getvalue())
+    assert data["message"] == "failed here"
+    assert data["request_id"] == "r1"
+    assert "ValueError: boom" in data["exception"]
+
+
+def test_request_log_has_duration(client, caplog):
+    """Test that each request is logged once with its id, status and duration."""
+    with caplog.at_level(logging.INFO, logger="app.request"):
+        client.post("/predict", json=ITEM, headers={"X-Request-ID": "req-42"})
+    [record] = [r for r in caplog.records if r.name == "app.request"]
+    assert record.request_id == "req-42"
+    assert record.status_code == 200
+    assert record.duration_ms >= 0
+
+
+def test_success_logs_sampled_errors_kept(client, caplog, monkeypatch):
+    """Test that a zero sample rate drops successes but still logs errors."""
+    monkeypatch.setattr(logging_config, "_success_sample_rate", 0.0)
+    with caplog.at_level(logging.INFO, logger="app.request"):
+        client.post("/predict", json=ITEM)
+        client.post("/predict", json={"sepal_length": "x"})
+    statuses = [r.status_code for r in caplog.records if r.name == "app.request"]
+    assert statuses == [422]
@@ -0,0 +1,118 @@
+"""Tests for latency, stage and error metrics."""
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY, Histogram
+
+from app.metrics import observe_bucket_counts, observe_many
+
+ITEM = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_latency_recorded_per_endpoint(client):
+    """Test that end-to-end latency is observed with the route as label."""
+    before = _sample("http_request_duration_seconds_count", endpoint="/predict", method="POST")
+    client.post("/predict", json=ITEM)
+    after = _sample("http_request_duration_seconds_count", endpoint="/predict", method="POST")
+    assert after == before + 1
+
+
+def test_unknown_paths_share_a_label(client):
+    """Test that unrouted paths do not create new label values."""
+    before = _sample("http_request_errors_total", endpoint="other", status="404")
+    client.get("/no-such-path-123")
+    assert _sample("http_request_errors_total", endpoint="other", status="404") == before + 1
+    assert _sample(
+        "http_request_duration_seconds_count", endpoint="/no-such-path-123", method="GET"
+    ) == 0
+
+
+def test_errors_counted_by_status(client):
+    """Test that 422 responses are counted."""
+    before = _sample("http_request_errors_total", endpoint="/predict", status="422")
+    client.post("/predict", json={"sepal_length": "x"})
+    assert _sample("http_request_errors_total", endpoint="/predict", status="422") == before + 1
+
+
+def _stage_counts(endpoint):
+    return {
+        stage: _sample("pred_stage_duration_seconds_count", endpoint=endpoint, stage=stage)
+        for stage in ("parse", "build", "predict", "serialize")
+    }
+
+
+def test_batch_stages_and_size(client):
+    """Test that batch requests record each hot-path stage and the batch size."""
+    before = _stage_counts("predict-batch")
+    single = _stage_counts("predict")
+    size_before = _sample("pred_batch_size_sum", endpoint="predict-batch")
+    client.post("/predict-batch", json={"items": [ITEM] * 7})
+    assert _stage_counts("predict-batch") == {s: n + 1 for s, n in before.items()}
+    assert _stage_counts("predict") == single
+    assert _sample("pred_batch_size_sum", endpoint="predict-batch") == size_before + 7
+
+
+def test_single_predict_stages(client):
+    """Test that /predict records its own parse, build, predict and serialize stages."""
+    before = _stage_counts("predict")
+    batch = _stage_counts("predict-batch")
+    assert client.post("/predict", json=ITEM).json()["predicted_class"] == "setosa"
+    assert _stage_counts("predict") == {s: n + 1 for s, n in before.items()}
+    assert _stage_counts("predict-batch") == batch
+
+
+def test_in_progress_gauge_exported(client):
+    """Test that the in-flight gauge is exposed and back to zero after requests."""
+    client.get("/health")
+    assert "http_requests_in_progress" in client.get("/metrics").text
+    assert _sample("http_requests_in_progress", endpoint="/health") == 0
+
+
+
+
+def test_observe_many_matches_observe():
+    """Test that bulk observations land in the same buckets as single ones."""
+    values = [0.0, 0.001, 0.003, 0.5, 0.7, 2.0]
+    one, many = (
+        Histogram(name, "test", buckets=(0.001, 0.01, 0.5, 1.0), registry=None)
+        for name in ("observe_one", "observe_many")
+    )
+    for value in values:
+        one.observe(value)
+    observe_many(many, np.array(values))
+    one_samples, many_samples = (
+        [s.value for s in h.collect()[0].samples if not s.name.endswith("_created")]
+        for h in (one, many)
+    )
+    assert many_samples == one_samples
+    assert many_samples[:5] == [2, 3, 4, 5, 6]
+
+
+def test_observe_bucket_counts_matches_observe():
+    """Test that pre-counted buckets export what observing each value would, labels included."""
+    values = [0.0, 0.001, 0.003, 0.5, 0.7, 2.0, 3.0]
+    one, counted = (
+        Histogram(name, "test", ["feature"], buckets=(0.001, 0.01, 0.5, 1.0), registry=None)
+        for name in ("observe_one", "observe_counted")
+    )
+    for value in values:
+        one.labels(feature="x").observe(value)
+    # Values per bucket: <=0.001, <=0.01, <=0.5, <=1.0, +Inf.
+    observe_bucket_counts(counted.labels(feature="x"), np.array([2, 1, 1, 1, 2]), sum(values))
+    one_samples, counted_samples = (
+        [(s.labels, s.value) for s in h.collect()[0].samples if not s.name.endswith("_created")]
+        for h in (one, counted)
+    )
+    assert counted_samples == one_samples
+
+
+def test_observe_bucket_counts_rejects_labelled_parent():
+    """Test that the parent of a labelled histogram is refused, as by observe."""
+    histogram = Histogram("observe_parent", "test", ["feature"], registry=None)
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+    with pytest.raises(ValueError):
+        observe_bucket_counts(histogram, np.array([1] + [0] * 14), 1.0)
@@ -0,0 +1,33 @@
+"""Tests for the request id, logging and rate-limit middleware."""
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+
+ITEM = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+def test_request_id_generated_when_missing(client):
+    """Test that a request id is generated and echoed when none is sent."""
+    response = client.get("/health")
+    assert len(response.headers["X-Request-ID"]) == 8
+
+
+def test_rate_limit_returns_429_with_request_id(client):
+    """Test that exceeding the per-endpoint limit yields 429 before the endpoint runs."""
+    for _ in range(10):
+        assert client.post("/predict", json=ITEM).status_code == 200
+    response = client.post("/predict", json=ITEM, headers={"X-Request-ID": "limited"})
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Rate limit exceeded: 10/minute"}
+    assert response.headers["X-Request-ID"] == "limited"
+    # Limits are per endpoint; unlimited routes are unaffected.
+    assert client.post("/predict-batch", json={"items": [ITEM]}).status_code == 200
+    assert client.get("/health").status_code == 200
+
+
+def test_rate_limit_disabled(monkeypatch):
+    """Test that a disabled limiter lets every request through."""
+    monkeypatch.setattr(main_module.limiter, "enabled", False)
+    client = TestClient(main_module.app)
+    statuses = {client.post("/predict", json=ITEM).status_code for _ in range(12)}
+    assert statuses == {200}
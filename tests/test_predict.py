@@ -264,6 +264,56 @@ class TestPredictBatchEndpoint:
         assert "confidence" in item
         assert "probabilities" in item
 
+    def test_predict_batch_matches_single_predictions(self, client):
+        """Test that vectorized batch results equal per-item /predict results."""
+        samples = [
+            {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+            {"sepal_length": 5.9, "sepal_width": 3.0, "petal_length": 4.2, "petal_width": 1.5},
+            {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5},
+        ]
+        batch = client.post("/predict-batch", json={"items": samples}).json()
+        for sample, item in zip(samples, batch["items"], strict=True):
+            single = client.post("/predict", json=sample).json()
+            assert item["predicted_class"] == single["predicted_class"]
+            assert item["class_index"] == single["class_index"]
+            assert abs(item["confidence"] - single["confidence"]) < 1e-9
+
+    def test_predict_batch_max_size(self, client):
+        """Test that a full 1000-item batch is scored in one request."""
+        item = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+        response = client.post("/predict-batch", json={"items": [item] * 1000})
+        assert response.status_code == 200
+        assert response.json()["count"] == 1000
+
+    def test_predict_batch_too_large(self, client):
+        """Test that batches over 1000 items are rejected."""
+        item = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+        response = client.post("/predict-batch", json={"items": [item] * 1001})
+        assert response.status_code == 400
+        assert "exceeds maximum" in response.json()["detail"]
+
+    def test_predict_batch_invalid_item_reports_index(self, client):
+        """Test that an invalid row is reported with its index."""
+        good = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+        bad = {**good, "sepal_length": 15.0}
+        response = client.post("/predict-batch", json={"items": [good, bad]})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][:3] == ["body", "items", 1]
+
+    def test_predict_batch_inference_error(self, client, monkeypatch):
+        """Test that a model failure is reported as a 400 inference error."""
+        import app.main as main_module
+
+        class BrokenModel:
+            def predict_proba(self, X):
+                raise ValueError("boom")
+
+        monkeypatch.setattr(main_module, "sk_model", BrokenModel())
+        item = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+        response = client.post("/predict-batch", json={"items": [item, item]})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Inference error: boom"
+
 
 class TestMetricsEndpoint:
     """Test suite for /metrics endpoint."""
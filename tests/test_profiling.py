@@ -0,0 +1,114 @@
+"""Tests for the on-demand profiler and /debug/profile."""
+import asyncio
+import re
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.config import Settings
+from app.profiling import Profiler, ProfilerBusy
+
+TOKEN = "s3cret"
+HEADERS = {"X-Admin-Token": TOKEN}
+COLLAPSED_LINE = re.compile(r"^[^;]+(;[^;]+)+ \d+$")
+
+
+@pytest.fixture
+def admin_app(monkeypatch):
+    """Enable admin endpoints and restore the active model afterwards."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    monkeypatch.setattr(main_module, "settings", Settings(admin_token=TOKEN))
+    return main_module.app
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile_hidden_without_token(client):
+    """Test that /debug/profile is unavailable unless an admin token is set."""
+    assert client.post("/debug/profile").status_code == 404
+
+
+def test_profile_stops_after_requests(admin_app):
+    """Test that a session ends once the requested number of requests finish."""
+    with TestClient(admin_app) as client, ThreadPoolExecutor(1) as pool:
+        started = time.monotonic()
+        pending = pool.submit(
+            client.post,
+            "/debug/profile",
+            json={"seconds": 30, "requests": 3, "include_idle": True},
+            headers=HEADERS,
+        )
+        while main_module.profiler.session is None:
+            time.sleep(0.01)
+        busy = client.post("/debug/profile", headers=HEADERS)
+        for _ in range(2):
+            client.get("/health")
+        response = pending.result(timeout=10)
+    assert busy.status_code == 409
+    assert response.status_code == 200
+    assert time.monotonic() - started < 10
+    body = response.json()
+    assert body["requests"] == 3
+    assert body["samples"] > 0
+    assert body["allocations"] is None
+    assert all(COLLAPSED_LINE.match(line) for line in body["collapsed"].splitlines())
+
+
+def test_profile_collapsed_text(admin_app):
+    """Test that format=collapsed returns flamegraph input as plain text."""
+    with TestClient(admin_app) as client:
+        response = client.post(
+            "/debug/profile",
+            params={"format": "collapsed"},
+            json={"seconds": 0.05, "include_idle": True},
+            headers=HEADERS,
+        )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text.endswith("\n")
+
+
+async def test_profiler_samples_cpu_and_allocations():
+    """Test that busy stacks and live allocations of the session are reported."""
+    profiler = Profiler()
+    stop = threading.Event()
+    spinner = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    spinner.start()
+    keep = []
+
+    async def allocate():
+        await asyncio.sleep(0.02)
+        keep.append([object() for _ in range(10_000)])
+
+    try:
+        result, _ = await asyncio.gather(
+            profiler.profile(0.2, interval_s=0.002, memory=True, top=50), allocate()
+        )
+    finally:
+        stop.set()
+        spinner.join()
+    assert "spinner;" in result["collapsed"]
+    assert "tests.test_profiling:_spin" in result["collapsed"]
+    assert any("test_profiling.py" in a["site"] for a in result["allocations"])
+    assert result["traced_peak_bytes"] >= result["traced_current_bytes"] > 0
+    assert not tracemalloc.is_tracing()
+    assert profiler.session is None
+
+
+async def test_profiler_allows_one_session():
+    """Test that a second concurrent session is refused."""
+    profiler = Profiler()
+    first = asyncio.create_task(profiler.profile(0.1))
+    await asyncio.sleep(0)
+    with pytest.raises(ProfilerBusy):
+        await profiler.profile(0.1)
+    await first
@@ -0,0 +1,120 @@
+"""Tests for row-weighted token-bucket rate limiting."""
+import sqlite3
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+import app.main as main_module
+from app.config import Settings
+from app.ratelimit import Limit, RateLimiter, SQLiteBucketStore
+
+ITEM = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+PARTNER_KEY = "partner-key"
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Replace the app's limits for one test."""
+
+    def configure(limits, key_limits=None):
+        configured = RateLimiter(limits, key_limits)
+        monkeypatch.setattr(main_module.limiter, "limits", configured.limits)
+        monkeypatch.setattr(main_module.limiter, "key_limits", configured.key_limits)
+
+    return configure
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("10/minute", Limit(10, 60.0)), ("5/seconds", Limit(5, 1.0)), ("1/day", Limit(1, 86400.0))],
+)
+def test_parse_limit(value, expected):
+    """Test that limits parse into a capacity and period."""
+    assert Limit.parse(value) == expected
+
+
+@pytest.mark.parametrize("value", ["10", "0/minute", "ten/minute", "10/fortnight"])
+def test_parse_limit_rejects_invalid(value):
+    """Test that malformed limits are rejected."""
+    with pytest.raises(ValueError):
+        Limit.parse(value)
+
+
+def test_batch_charged_per_row(client, limits):
+    """Test that batches draw one token per row and refusals carry Retry-After."""
+    limits({"/predict-batch": "100/minute"})
+    first = client.post("/predict-batch", json={"items": [ITEM] * 60})
+    second = client.post("/predict-batch", json={"items": [ITEM] * 60})
+    assert first.status_code == 200
+    assert first.headers["RateLimit-Limit"] == "100"
+    assert first.headers["RateLimit-Remaining"] == "40"
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) > 0
+    # A refused batch is not charged, so a smaller one still fits.
+    assert client.post("/predict-batch", json={"items": [ITEM] * 30}).status_code == 200
+
+
+def test_rows_beyond_capacity_are_not_retryable(client, limits):
+    """Test that a batch larger than the whole bucket gets 413, not a Retry-After."""
+    limits({"/predict-batch": "50/minute"})
+    response = client.post("/predict-batch", json={"items": [ITEM] * 60})
+    assert response.status_code == 413
+    assert "Retry-After" not in response.headers
+    # Nothing beyond the up-front token was taken.
+    assert client.post("/predict-batch", json={"items": [ITEM] * 48}).status_code == 200
+
+
+def test_default_jobs_bucket_holds_the_largest_job():
+    """Test that the default /jobs limit admits a job of jobs_max_rows rows."""
+    settings = Settings()
+    assert Limit.parse(settings.rate_limits["/jobs"]).capacity >= settings.jobs_max_rows
+
+
+def test_api_key_limits(client, limits):
+    """Test that configured API keys get their own limits and buckets."""
+    limits({"/predict": "1/minute"}, {PARTNER_KEY: {"/predict": "3/minute"}})
+    partner = {"X-API-Key": PARTNER_KEY}
+    assert [client.post("/predict", json=ITEM, headers=partner).status_code
+            for _ in range(4)] == [200, 200, 200, 429]
+    # Unknown keys share the caller's address bucket instead of getting a fresh one.
+    assert client.post("/predict", json=ITEM).status_code == 200
+    assert client.post("/predict", json=ITEM, headers={"X-API-Key": "made-up"}).status_code == 429
+
+
+def test_stream_rows_go_into_debt(client, limits):
+    """Test that a stream is never cut off but its rows are still charged."""
+    limits({"/predict-stream": "10/minute"})
+    body = "\n".join(['{"sepal_length":5.1,"sepal_width":3.5,"petal_length":1.4,"petal_width":0.2}'] * 25)
+    response = client.post("/predict-stream", content=body)
+    assert len(response.text.splitlines()) == 25
+    assert client.post("/predict-stream", content=body).status_code == 429
+
+
+def test_sqlite_store_shared_between_limiters(tmp_path):
+    """Test that limiters on one SQLite file, as in separate workers, share buckets."""
+    path = str(tmp_path / "buckets.sqlite")
+    workers = [RateLimiter({"/predict": "3/minute"}, store=SQLiteBucketStore(path))
+               for _ in range(2)]
+    scope = {"path": "/predict", "headers": [], "client": ("10.0.0.1", 1234)}
+    allowed = [workers[i % 2].take(scope, 1).allowed for i in range(4)]
+    assert allowed == [True, True, True, False]
+
+
+def test_sqlite_store_fails_open_when_locked(tmp_path):
+    """Test that a bucket locked by another worker lets requests through at once."""
+    path = str(tmp_path / "buckets.sqlite")
+    limiter = RateLimiter({"/predict": "3/minute"}, store=SQLiteBucketStore(path))
+    scope = {"path": "/predict", "headers": [], "client": ("10.0.0.1", 1234)}
+    busy = REGISTRY.get_sample_value("rate_limit_store_busy_total") or 0.0
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        start = time.perf_counter()
+        assert limiter.take(scope, 1) is None
+        assert time.perf_counter() - start < 0.5
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert REGISTRY.get_sample_value("rate_limit_store_busy_total") == busy + 1
+    assert limiter.take(scope, 1).allowed
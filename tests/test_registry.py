@@ -0,0 +1,120 @@
+"""Tests for model hot-swapping."""
+import shutil
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.config import Settings
+from app.registry import artifact_version, load_model
+
+ITEM = {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5}
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def admin_app(monkeypatch, tmp_path):
+    """Enable admin endpoints and restore the active model afterwards."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    model_path = tmp_path / "model.pkl"
+    shutil.copy(main_module.MODEL_PATH, model_path)
+    monkeypatch.setattr(
+        main_module,
+        "settings",
+        Settings(admin_token=TOKEN, model_path=str(model_path)),
+    )
+    return model_path
+
+
+def test_load_model_rejects_wrong_class_count():
+    """Test that warm-up refuses a model with unexpected output shape."""
+    with pytest.raises(ValueError, match="shape"):
+        load_model(main_module.MODEL_PATH, "v", n_classes=2)
+
+
+def test_admin_endpoints_hidden_without_token(client):
+    """Test that reload is unavailable unless an admin token is configured."""
+    assert client.post("/admin/model/reload").status_code == 404
+
+
+def test_reload_requires_matching_token(admin_app):
+    """Test that a wrong token is rejected."""
+    with TestClient(main_module.app) as client:
+        response = client.post("/admin/model/reload", headers={"X-Admin-Token": "nope"})
+    assert response.status_code == 403
+
+
+def test_reload_swaps_active_version(admin_app):
+    """Test that a reload activates the new version and keeps serving."""
+    with TestClient(main_module.app) as client:
+        response = client.post(
+            "/admin/model/reload",
+            json={"version": "iris-logreg-v2"},
+            headers={"X-Admin-Token": TOKEN},
+        )
+        health = client.get("/health").json()
+        predict = client.post("/predict", json=ITEM)
+    assert response.status_code == 200
+    assert response.json() == {
+        "model_version": "iris-logreg-v2",
+        "previous_version": "iris-logreg-v1",
+        "path": str(admin_app),
+    }
+    assert health["model_version"] == "iris-logreg-v2"
+    assert predict.json()["predicted_class"] == "virginica"
+
+
+def test_failed_reload_keeps_current_model(admin_app, tmp_path):
+    """Test that a broken artifact is rejected and the old model stays active."""
+    broken = tmp_path / "broken.pkl"
+    broken.write_bytes(b"not a model")
+    with TestClient(main_module.app) as client:
+        response = client.post(
+            "/admin/model/reload",
+            json={"path": str(broken)},
+            headers={"X-Admin-Token": TOKEN},
+        )
+        health = client.get("/health").json()
+        predict = client.post("/predict", json=ITEM)
+    assert response.status_code == 400
+    assert health["model_version"] == "iris-logreg-v1"
+    assert predict.status_code == 200
+
+
+def test_file_watch_reloads_changed_artifact(admin_app, monkeypatch):
+    """Test that rewriting the watched artifact hot-swaps it in."""
+    monkeypatch.setattr(
+        main_module,
+        "settings",
+        main_module.settings.model_copy(update={"model_watch_interval_s": 0.02}),
+    )
+    with TestClient(main_module.app) as client:
+        admin_app.write_bytes(admin_app.read_bytes())
+        expected = artifact_version(admin_app)
+        deadline = time.monotonic() + 5
+        while client.get("/health").json()["model_version"] != expected:
+            assert time.monotonic() < deadline, "model was not reloaded"
+            time.sleep(0.02)
+
+
+def test_reload_replaces_process_pool(admin_app, monkeypatch):
+    """Test that process-pool workers are replaced with ones running the new model."""
+    monkeypatch.setattr(
+        main_module,
+        "settings",
+        main_module.settings.model_copy(
+            update={"inference_executor": "process", "inference_workers": 1}
+        ),
+    )
+    with TestClient(main_module.app) as client:
+        old_executor = main_module.executor
+        client.post("/admin/model/reload", headers={"X-Admin-Token": TOKEN})
+        # The new pool's worker is running before any request reaches it.
+        assert len(main_module.executor._pool._processes) == 1
+        predict = client.post("/predict", json=ITEM)
+        metrics = client.get("/metrics").text
+        assert main_module.executor is not old_executor
+    assert predict.json()["predicted_class"] == "virginica"
+    assert "inference_executor_capacity 1.0" in metrics
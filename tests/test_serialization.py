@@ -0,0 +1,56 @@
+"""Tests for compact batch response layouts."""
+import pytest
+
+ITEMS = [
+    {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+    {"sepal_length": 5.9, "sepal_width": 3.0, "petal_length": 4.2, "petal_width": 1.5},
+    {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5},
+]
+
+
+class TestBatchResponseLayouts:
+    """Test suite for /predict-batch layout and top_k options."""
+
+    def test_columnar_matches_rows(self, client):
+        """Test that the columnar layout carries the same results as rows."""
+        rows = client.post("/predict-batch", json={"items": ITEMS}).json()
+        response = client.post("/predict-batch?layout=columnar", json={"items": ITEMS})
+        assert response.status_code == 200
+        cols = response.json()
+        assert cols["classes"] == ["setosa", "versicolor", "virginica"]
+        assert cols["count"] == 3
+        assert cols["class_index"] == [item["class_index"] for item in rows["items"]]
+        assert cols["confidence"] == pytest.approx([item["confidence"] for item in rows["items"]])
+        for item, probs in zip(rows["items"], cols["probabilities"], strict=True):
+            assert list(item["probabilities"].values()) == pytest.approx(probs)
+
+    def test_rows_top_k(self, client):
+        """Test that top_k keeps only the most likely classes per row."""
+        data = client.post("/predict-batch?top_k=1", json={"items": ITEMS}).json()
+        for item in data["items"]:
+            assert list(item["probabilities"]) == [item["predicted_class"]]
+            assert item["probabilities"][item["predicted_class"]] == item["confidence"]
+
+    def test_rows_without_probabilities(self, client):
+        """Test that top_k=0 drops probabilities."""
+        data = client.post("/predict-batch?top_k=0", json={"items": ITEMS}).json()
+        assert all(item["probabilities"] == {} for item in data["items"])
+
+    def test_columnar_top_k(self, client):
+        """Test that columnar top_k returns index and probability matrices."""
+        data = client.post("/predict-batch?layout=columnar&top_k=2", json={"items": ITEMS}).json()
+        assert "probabilities" not in data
+        assert [row[0] for row in data["top_k_index"]] == data["class_index"]
+        assert all(len(row) == 2 for row in data["top_k_probabilities"])
+        assert all(row[0] >= row[1] for row in data["top_k_probabilities"])
+
+    def test_top_k_larger_than_classes(self, client):
+        """Test that top_k is clamped to the number of classes."""
+        data = client.post("/predict-batch?top_k=10", json={"items": ITEMS}).json()
+        assert all(len(item["probabilities"]) == 3 for item in data["items"])
+
+    @pytest.mark.parametrize("query", ["layout=table", "top_k=-1"])
+    def test_invalid_options(self, client, query):
+        """Test that unknown layouts and negative top_k are rejected."""
+        response = client.post(f"/predict-batch?{query}", json={"items": ITEMS})
+        assert response.status_code == 422
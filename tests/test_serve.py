@@ -0,0 +1,29 @@
+"""Tests for the multi-worker serving helpers."""
+import numpy as np
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.config import Settings
+from app.metrics import MULTIPROC_DIR_ENV, render_metrics
+from app.serve import export_shared_model
+
+ITEM = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+def test_workers_memory_map_shared_model(tmp_path, monkeypatch):
+    """Test that the exported model is memory-mapped and serves predictions."""
+    monkeypatch.setattr(main_module, "meta", main_module.meta)
+    path = export_shared_model(main_module.MODEL_PATH, tmp_path, "float64", fused=True)
+    monkeypatch.setattr(main_module, "settings", Settings(shared_model_path=str(path)))
+    with TestClient(main_module.app) as client:
+        assert isinstance(main_module.sk_model.weights.base, np.memmap)
+        response = client.post("/predict", json=ITEM)
+    assert response.status_code == 200
+    assert response.json()["predicted_class"] == "setosa"
+
+
+def test_render_metrics_reads_multiprocess_dir(tmp_path, monkeypatch):
+    """Test that multi-process mode aggregates from the shared directory only."""
+    assert b"pred_requests_total" in render_metrics()
+    monkeypatch.setenv(MULTIPROC_DIR_ENV, str(tmp_path))
+    assert b"pred_requests_total" not in render_metrics()
@@ -0,0 +1,113 @@
+"""Tests for shadow model evaluation."""
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import app.main as main_module
+from app.config import Settings
+from app.shadow import ShadowScorer
+
+ITEM = {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5}
+PROBA = np.array([[0.9, 0.05, 0.05], [0.1, 0.8, 0.1], [0.2, 0.2, 0.6]])
+
+
+def _value(name: str, labels: dict | None = None) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class Swapped:
+    """Candidate that swaps the first two classes of the primary's output."""
+
+    def predict_proba(self, X):
+        return PROBA[:len(X)][:, [1, 0, 2]]
+
+
+class FailsOnce(Swapped):
+    """Candidate whose first call fails."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        if self.calls == 1:
+            raise ValueError("boom")
+        return super().predict_proba(X)
+
+
+def test_compare_records_agreement_and_deltas():
+    """Test agreement counts and probability deltas for one batch."""
+    agree = _value("shadow_rows_total", {"outcome": "agree"})
+    disagree = _value("shadow_rows_total", {"outcome": "disagree"})
+    small = _value("shadow_probability_delta_bucket", {"le": "0.001"})
+    total = _value("shadow_probability_delta_count")
+    ShadowScorer(Swapped(), "candidate").compare(np.zeros((3, 4)), PROBA)
+    assert _value("shadow_rows_total", {"outcome": "agree"}) - agree == 1
+    assert _value("shadow_rows_total", {"outcome": "disagree"}) - disagree == 2
+    # The third row is unchanged; the first two differ by 0.85 and 0.7.
+    assert _value("shadow_probability_delta_bucket", {"le": "0.001"}) - small == 1
+    assert _value("shadow_probability_delta_count") - total == 3
+
+
+def test_submit_drops_when_queue_is_full():
+    """Test that submit never blocks and counts the rows it drops."""
+    dropped = _value("shadow_dropped_rows_total")
+    scorer = ShadowScorer(Swapped(), "candidate", max_queued=1)
+    assert scorer.submit(np.zeros((3, 4)), PROBA)
+    assert not scorer.submit(np.zeros((3, 4)), PROBA)
+    assert _value("shadow_dropped_rows_total") - dropped == 3
+
+
+def test_failing_candidate_keeps_worker_alive():
+    """Test that scoring errors are counted and later batches still compared."""
+    errors = _value("shadow_errors_total")
+    scored = _value("shadow_predict_duration_seconds_count")
+    scorer = ShadowScorer(FailsOnce(), "flaky")
+    scorer.start()
+    scorer.submit(np.zeros((3, 4)), PROBA)
+    scorer.submit(np.zeros((3, 4)), PROBA)
+    scorer.stop()
+    assert _value("shadow_errors_total") - errors == 1
+    assert _value("shadow_predict_duration_seconds_count") - scored == 1
+
+
+@pytest.fixture
+def shadow_app(monkeypatch):
+    """Shadow the primary model with a copy of itself."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    monkeypatch.setattr(
+        main_module, "settings", Settings(shadow_model_path=str(main_module.MODEL_PATH))
+    )
+    return main_module.app
+
+
+def test_predictions_are_shadowed(shadow_app):
+    """Test that scored requests reach the shadow model off the request path."""
+    agree = _value("shadow_rows_total", {"outcome": "agree"})
+    with TestClient(shadow_app) as client:
+        assert main_module.shadow is not None
+        assert client.post("/predict-batch", json={"items": [ITEM] * 5}).status_code == 200
+        for _ in range(200):
+            if _value("shadow_rows_total", {"outcome": "agree"}) - agree == 5:
+                break
+            time.sleep(0.01)
+        body = client.get("/metrics").text
+    assert _value("shadow_rows_total", {"outcome": "agree"}) - agree == 5
+    assert "shadow_predict_duration_seconds" in body
+    assert main_module.shadow is None
+
+
+def test_unloadable_shadow_model_is_skipped(monkeypatch, tmp_path):
+    """Test that the service still starts when the candidate cannot be loaded."""
+    for name in ("sk_model", "_compiled", "meta"):
+        monkeypatch.setattr(main_module, name, getattr(main_module, name))
+    monkeypatch.setattr(
+        main_module, "settings", Settings(shadow_model_path=str(tmp_path / "missing.pkl"))
+    )
+    with TestClient(main_module.app) as client:
+        assert main_module.shadow is None
+        assert client.post("/predict-batch", json={"items": [ITEM]}).status_code == 200
@@ -0,0 +1,99 @@
+"""Tests for running feature and prediction statistics."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+import app.main as main_module
+from app.schemas.predict_schema import FEATURE_NAMES, TARGET_NAMES
+from app.stats import FeatureStats
+
+ITEMS = [
+    {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+    {"sepal_length": 6.1, "sepal_width": 2.8, "petal_length": 4.7, "petal_width": 1.2},
+    {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5},
+]
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _proba(classes: np.ndarray) -> np.ndarray:
+    return np.eye(len(TARGET_NAMES))[classes]
+
+
+def test_running_aggregates_match_numpy():
+    """Test that batch-merged aggregates equal those of all rows at once."""
+    rng = np.random.default_rng(0)
+    stats = FeatureStats(FEATURE_NAMES, TARGET_NAMES)
+    batches = [rng.uniform(0.1, 11.0, size=(n, 4)) for n in (1, 7, 1, 250, 3)]
+    # Values on bucket bounds belong to the bucket below; above the last, to the last.
+    batches.append(np.array([[0.5, 1.0, 10.0, 10.5], [0.1, 0.75, 9.99, 2.0]]))
+    labels = [rng.integers(0, 3, size=len(X)) for X in batches]
+    for X, y in zip(batches, labels, strict=True):
+        stats.update(X, _proba(y))
+    X, y = np.vstack(batches), np.concatenate(labels)
+
+    snapshot = stats.snapshot()
+    assert snapshot["rows"] == len(X)
+    for j, name in enumerate(FEATURE_NAMES):
+        feature = snapshot["features"][name]
+        assert feature["mean"] == pytest.approx(X[:, j].mean())
+        assert feature["variance"] == pytest.approx(X[:, j].var())
+        assert (feature["min"], feature["max"]) == (X[:, j].min(), X[:, j].max())
+        edges = [0.0, *snapshot["bucket_bounds"], np.inf]
+        expected = [
+            int(((X[:, j] > lo) & (X[:, j] <= hi)).sum())
+            for lo, hi in zip(edges[:-1], edges[1:], strict=True)
+        ]
+        assert feature["histogram"] == expected
+    assert list(snapshot["predicted_classes"].values()) == np.bincount(y, minlength=3).tolist()
+
+
+def test_empty_stats_snapshot():
+    """Test the snapshot before anything was scored."""
+    feature = FeatureStats(FEATURE_NAMES, TARGET_NAMES).snapshot()["features"]["sepal_length"]
+    assert (feature["mean"], feature["min"], feature["max"]) == (0.0, None, None)
+
+
+def test_concurrent_updates_are_not_lost():
+    """Test that updates from several threads all land in the totals."""
+    stats = FeatureStats(FEATURE_NAMES, TARGET_NAMES)
+    X = np.full((10, 4), 2.0)
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: stats.update(X, _proba(np.zeros(10, dtype=int))), range(200)))
+    snapshot = stats.snapshot()
+    assert snapshot["rows"] == 2000
+    assert snapshot["predicted_classes"]["setosa"] == 2000
+    assert snapshot["features"]["petal_width"]["variance"] == pytest.approx(0.0)
+
+
+def test_stats_endpoint_and_metrics(client, monkeypatch):
+    """Test that scored requests show up in /stats and /metrics."""
+    stats = FeatureStats(FEATURE_NAMES, TARGET_NAMES, flush_interval_s=3600)
+    monkeypatch.setattr(main_module, "feature_stats", stats)
+    counted = _sample("feature_value_count", feature="petal_length")
+    virginica = _sample("predicted_class_total", predicted_class="virginica")
+    client.post("/predict-batch", json={"items": ITEMS})
+    client.post("/predict", json=ITEMS[2])
+    # Nothing reaches Prometheus until the next flush, at the latest on /metrics.
+    assert _sample("feature_value_count", feature="petal_length") == counted
+
+    body = client.get("/stats").json()
+    metrics = client.get("/metrics").text
+    assert body["rows"] == 4
+    assert body["predicted_classes"] == {"setosa": 1, "versicolor": 1, "virginica": 2}
+    assert body["features"]["petal_length"]["max"] == 6.0
+    assert body["features"]["sepal_width"]["mean"] == pytest.approx((3.5 + 2.8 + 3.3 + 3.3) / 4)
+    assert _sample("feature_value_count", feature="petal_length") - counted == 4
+    assert _sample("predicted_class_total", predicted_class="virginica") - virginica == 2
+    assert 'feature_value_max{feature="petal_length"} 6.0' in metrics
+
+
+def test_stats_disabled(client, monkeypatch):
+    """Test that /stats answers 404 when statistics are off."""
+    monkeypatch.setattr(main_module, "feature_stats", None)
+    assert client.get("/stats").status_code == 404
+    assert client.post("/predict", json=ITEMS[0]).status_code == 200
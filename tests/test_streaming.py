@@ -0,0 +1,84 @@
+"""Tests for the /predict-stream NDJSON endpoint."""
+import json
+
+import numpy as np
+
+from app.streaming import iter_lines, stream_predictions
+
+SETOSA = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+VIRGINICA = {"sepal_length": 6.3, "sepal_width": 3.3, "petal_length": 6.0, "petal_width": 2.5}
+
+
+def _ndjson(rows) -> bytes:
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+class TestPredictStreamEndpoint:
+    """Test suite for /predict-stream."""
+
+    def test_stream_more_than_batch_limit(self, client):
+        """Test that streams are not capped at 1000 rows."""
+        body = _ndjson([SETOSA, VIRGINICA] * 1500)
+        response = client.post(
+            "/predict-stream", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 3000
+        assert lines[0]["predicted_class"] == "setosa"
+        assert lines[-1]["predicted_class"] == "virginica"
+
+    def test_invalid_lines_reported_in_place(self, client):
+        """Test that bad lines yield error objects without stopping the stream."""
+        body = b"\n".join([
+            json.dumps(SETOSA).encode(),
+            b"{not json",
+            json.dumps({**SETOSA, "sepal_length": 15.0}).encode(),
+            json.dumps({**SETOSA, "petal_width": -1}).encode(),
+            json.dumps(VIRGINICA).encode(),
+        ])
+        response = client.post("/predict-stream", content=body)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line.get("line") for line in lines] == [None, 2, 3, 4, None]
+        assert lines[1]["detail"][0]["type"] == "json_invalid"
+        assert "lengths look out of range" in lines[2]["detail"][0]["msg"]
+        assert lines[3]["detail"][0]["loc"] == ["petal_width"]
+        assert lines[4]["predicted_class"] == "virginica"
+
+
+async def _chunks(parts):
+    for part in parts:
+        yield part
+
+
+async def test_iter_lines_handles_split_rows():
+    """Test that rows split across network chunks are reassembled."""
+    lines = [line async for line in iter_lines(_chunks([b'{"a": ', b"1}\n\n{", b'"b": 2}']))]
+    assert lines == [b'{"a": 1}', b'{"b": 2}']
+
+
+async def test_results_stream_before_input_ends():
+    """Test that each chunk is scored and emitted before more input is read."""
+    events = []
+
+    class Result:
+        def __init__(self, value):
+            self.value = value
+
+        def model_dump_json(self):
+            return json.dumps(self.value)
+
+    async def score(X: np.ndarray):
+        events.append(f"score {len(X)}")
+        return [Result(float(x)) for x in X[:, 0]]
+
+    async def body():
+        for i in range(5):
+            events.append(f"read {i}")
+            yield _ndjson([SETOSA])
+
+    async for _ in stream_predictions(body(), score, chunk_size=2):
+        events.append("emit")
+    assert events[:5] == ["read 0", "read 1", "score 2", "emit", "emit"]
+    assert events.count("emit") == 5
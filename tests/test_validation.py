@@ -0,0 +1,59 @@
+"""Tests for vectorized batch validation on /predict-batch."""
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.predict_schema import IrisBatchRequest
+
+GOOD = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+def _pydantic_errors(items):
+    with pytest.raises(ValidationError) as info:
+        IrisBatchRequest(items=items)
+    return [
+        {"type": e["type"], "loc": ["body", *e["loc"]], "msg": e["msg"]}
+        for e in info.value.errors()
+    ]
+
+
+def _api_errors(client, items):
+    response = client.post("/predict-batch", json={"items": items})
+    assert response.status_code == 422
+    return [
+        {"type": e["type"], "loc": e["loc"], "msg": e["msg"]}
+        for e in response.json()["detail"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        # Range and gt=0 failures only: handled on the stacked array.
+        [
+            GOOD,
+            {**GOOD, "sepal_length": 0},
+            {**GOOD, "petal_length": 11, "sepal_width": 0.05},
+            {**GOOD, "petal_width": 10.5},
+            {**GOOD, "sepal_width": -1, "petal_width": -2},
+        ],
+        # Type errors mixed with range errors: falls back to the full schema.
+        [
+            {**GOOD, "sepal_length": "abc"},
+            {**GOOD, "sepal_length": 20},
+            {k: v for k, v in GOOD.items() if k != "petal_width"},
+        ],
+    ],
+)
+def test_batch_errors_match_per_item_validation(client, items):
+    """Test that batch 422 errors equal those of per-item IrisRequest validation."""
+    assert _api_errors(client, items) == _pydantic_errors(items)
+
+
+def test_valid_boundaries_accepted(client):
+    """Test that inclusive range limits are accepted as by check_ranges."""
+    items = [
+        {"sepal_length": 0.5, "sepal_width": 0.1, "petal_length": 10, "petal_width": 10},
+        {"sepal_length": 10, "sepal_width": 10, "petal_length": 0.5, "petal_width": 0.1},
+    ]
+    response = client.post("/predict-batch", json={"items": items})
+    assert response.status_code == 200